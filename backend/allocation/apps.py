@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AllocationConfig(AppConfig):
     name = 'allocation'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,249 @@
+"""
+Re-optimization of existing allocations.
+
+Takes the current allocations as the starting solution and improves total
+room compatibility by local search over pair swaps between rooms. Each swap is
+evaluated with an incremental delta (only the two students' pairs in the two
+rooms change), so a pass never re-scores whole rooms. The search stops when no
+improving swap is left, the moved-student limit is reached or the time budget
+runs out, and returns a move list that commit_moves applies atomically.
+"""
+import random
+import time
+from django.db import transaction
+from housing.models import Bed
+from student_requests.history import HistoryRecorder
+from users.models import CustomUser
+from .models import Allocation
+from .services import score_profiles, room_rules, batch_label, admits
+from .suggestions import Features, invalidate_room_summaries
+from users.me import invalidate_all_me
+
+INCOMPATIBLE_PENALTY = 100.0  # Cost of a pair that fails the hard constraints
+DEFAULT_MAX_MOVES = 50
+DEFAULT_TIME_BUDGET = 5.0  # seconds
+MIN_IMPROVEMENT = 1e-6
+
+def load_solution():
+    """Current allocations as in-memory state, from one query"""
+    rows = Allocation.objects.filter(bed__isnull=False, student__profile__isnull=False).values_list(
+        'student_id', 'bed_id', 'room_id', 'room__room_number', 'room__hostel__name',
+        'room__hostel__gender_type', 'room__hostel__allocated_batches',
+        'student__gender', 'student__profile__full_name', 'student__profile__batch_year',
+        'student__profile__wake_up_time', 'student__profile__requires_darkness',
+        'student__profile__cleanliness', 'student__profile__guest_tolerance', 'student__profile__dominance'
+    )
+
+    students = {}
+    rooms = {}
+    for (student_id, bed_id, room_id, room_number, hostel, hostel_gender, batches,
+         gender, name, batch_year, *features) in rows:
+        if room_id not in rooms:
+            rooms[room_id] = {**room_rules(f"{hostel} - {room_number}", hostel_gender, batches), 'members': set()}
+        rooms[room_id]['members'].add(student_id)
+        students[student_id] = {
+            'name': name,
+            'gender': gender,
+            'batch': batch_label(batch_year),
+            'features': Features(*features),
+            'bed': bed_id,
+            'room': room_id,
+            'original_bed': bed_id,
+            'original_room': room_id,
+        }
+    return students, rooms
+
+class LocalSearch:
+    """Pair-swap hill climbing over a loaded solution"""
+
+    def __init__(self, students, rooms, max_moves=DEFAULT_MAX_MOVES, time_budget=DEFAULT_TIME_BUDGET, seed=None):
+        self.students = students
+        self.rooms = rooms
+        self.max_moves = max_moves
+        self.time_budget = time_budget
+        self.random = random.Random(seed)
+        self.pair_costs = {}
+        self.moved = set()
+        self.swaps_applied = 0
+
+    def pair_cost(self, a, b):
+        key = (a, b) if a < b else (b, a)
+        cost = self.pair_costs.get(key)
+        if cost is None:
+            score = score_profiles(self.students[a]['features'], self.students[b]['features'])
+            cost = INCOMPATIBLE_PENALTY if score is None else score
+            self.pair_costs[key] = cost
+        return cost
+
+    def cost_in_room(self, student, room_id, excluding):
+        """Sum of the student's pair costs with a room's members, leaving out `excluding`"""
+        return sum(
+            self.pair_cost(student, other)
+            for other in self.rooms[room_id]['members']
+            if other != student and other != excluding
+        )
+
+    def total_cost(self):
+        total = 0
+        for room in self.rooms.values():
+            members = sorted(room['members'])
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    total += self.pair_cost(a, b)
+        return total
+
+    def can_live_in(self, student_id, room_id):
+        student = self.students[student_id]
+        return admits(self.rooms[room_id], student['gender'], student['batch'])
+
+    def swap_delta(self, a, b):
+        room_a = self.students[a]['room']
+        room_b = self.students[b]['room']
+        before = self.cost_in_room(a, room_a, b) + self.cost_in_room(b, room_b, a)
+        after = self.cost_in_room(a, room_b, b) + self.cost_in_room(b, room_a, a)
+        return after - before
+
+    def moved_after_swap(self, a, b):
+        """Size of the moved set if a and b exchanged beds"""
+        moved = set(self.moved)
+        for student_id, new_bed in ((a, self.students[b]['bed']), (b, self.students[a]['bed'])):
+            if new_bed == self.students[student_id]['original_bed']:
+                moved.discard(student_id)
+            else:
+                moved.add(student_id)
+        return moved
+
+    def apply_swap(self, a, b, moved):
+        student_a = self.students[a]
+        student_b = self.students[b]
+        room_a, room_b = student_a['room'], student_b['room']
+        self.rooms[room_a]['members'].discard(a)
+        self.rooms[room_b]['members'].discard(b)
+        self.rooms[room_a]['members'].add(b)
+        self.rooms[room_b]['members'].add(a)
+        student_a['room'], student_b['room'] = room_b, room_a
+        student_a['bed'], student_b['bed'] = student_b['bed'], student_a['bed']
+        self.moved = moved
+        self.swaps_applied += 1
+
+    def run(self):
+        deadline = time.perf_counter() + self.time_budget
+        order = list(self.students)
+        evaluations = 0
+
+        while True:
+            self.random.shuffle(order)
+            improved = False
+            for a in order:
+                best = None
+                for room_id, room in self.rooms.items():
+                    if room_id == self.students[a]['room'] or not self.can_live_in(a, room_id):
+                        continue
+                    for b in room['members']:
+                        evaluations += 1
+                        if evaluations % 256 == 0 and time.perf_counter() > deadline:
+                            return 'time_budget'
+                        if not self.can_live_in(b, self.students[a]['room']):
+                            continue
+                        delta = self.swap_delta(a, b)
+                        if delta < -MIN_IMPROVEMENT and (best is None or delta < best[0]):
+                            best = (delta, b)
+
+                if best is None:
+                    continue
+                moved = self.moved_after_swap(a, best[1])
+                if len(moved) > self.max_moves:
+                    continue
+                self.apply_swap(a, best[1], moved)
+                improved = True
+            if not improved:
+                return 'converged'
+            if len(self.moved) >= self.max_moves:
+                return 'max_moves'
+
+    def moves(self):
+        return [
+            {
+                'student': student_id,
+                'student_name': self.students[student_id]['name'],
+                'from_bed': self.students[student_id]['original_bed'],
+                'to_bed': self.students[student_id]['bed'],
+                'from_room': self.rooms[self.students[student_id]['original_room']]['label'],
+                'to_room': self.rooms[self.students[student_id]['room']]['label'],
+            }
+            for student_id in sorted(self.moved)
+        ]
+
+def propose_reoptimization(max_moves=DEFAULT_MAX_MOVES, time_budget=DEFAULT_TIME_BUDGET, seed=None):
+    """Run the local search on current allocations without writing anything"""
+    started = time.perf_counter()
+    students, rooms = load_solution()
+    search = LocalSearch(students, rooms, max_moves=max_moves, time_budget=time_budget, seed=seed)
+    initial = search.total_cost()
+    stopped = search.run()
+    final = search.total_cost()
+    return {
+        'initial_cost': round(initial, 2),
+        'final_cost': round(final, 2),
+        'improvement': round(initial - final, 2),
+        'swaps_applied': search.swaps_applied,
+        'students_moved': len(search.moved),
+        'stopped': stopped,
+        'elapsed_seconds': round(time.perf_counter() - started, 2),
+        'moves': search.moves(),
+    }
+
+def commit_moves(moves, changed_by=None):
+    """
+    Apply a proposed move list atomically. Every student must still hold the
+    from_bed of the proposal, the target beds must be exactly the beds being
+    vacated, and every target room's hostel must take the student (gender and
+    batch, as in the search); otherwise nothing is written and ValueError is
+    raised. Each move is recorded in the allocation's status history.
+    """
+    if not moves:
+        return 0
+    from_beds = {move['student']: move['from_bed'] for move in moves}
+    to_beds = {move['student']: move['to_bed'] for move in moves}
+    if sorted(from_beds.values()) != sorted(to_beds.values()) or len(from_beds) != len(moves):
+        raise ValueError('Moves must exchange beds among the moved students')
+
+    with transaction.atomic(), HistoryRecorder(changed_by=changed_by) as history:
+        allocations = list(Allocation.objects.select_for_update().filter(student_id__in=list(from_beds)))
+        if len(allocations) != len(from_beds) or any(
+            allocation.bed_id != from_beds[allocation.student_id] for allocation in allocations
+        ):
+            raise ValueError('Allocations changed since the proposal was made')
+
+        # A hand-edited or stale list must not bypass the search's hostel rules
+        rooms = {}
+        room_of_bed = {}
+        for bed_id, room_id, room_number, hostel, hostel_gender, batches in Bed.objects.filter(
+            id__in=list(from_beds.values())
+        ).values_list('id', 'room_id', 'room__room_number', 'room__hostel__name',
+                      'room__hostel__gender_type', 'room__hostel__allocated_batches'):
+            rooms[room_id] = room_rules(f"{hostel} - {room_number}", hostel_gender, batches)
+            room_of_bed[bed_id] = room_id
+        for student_id, gender, batch_year in CustomUser.objects.filter(id__in=list(from_beds)).values_list(
+            'id', 'gender', 'profile__batch_year'
+        ):
+            room = rooms[room_of_bed[to_beds[student_id]]]
+            if not admits(room, gender, batch_label(batch_year)):
+                raise ValueError(f"Student {student_id} cannot be moved to {room['label']}")
+
+        # Beds are one-to-one with allocations: release them before reassigning
+        Allocation.objects.filter(id__in=[allocation.id for allocation in allocations]).update(bed=None)
+        for allocation in allocations:
+            from_room = rooms[room_of_bed[allocation.bed_id]]['label']
+            allocation.bed_id = to_beds[allocation.student_id]
+            allocation.room_id = room_of_bed[allocation.bed_id]
+            history.record(
+                'allocation', allocation.id, 'ALLOCATED', 'MOVED',
+                f"Re-optimization: {from_room} -> {rooms[allocation.room_id]['label']}"
+            )
+        Allocation.objects.bulk_update(allocations, ['bed', 'room'])
+
+        # The same beds stay occupied, so room occupancy is unchanged
+        transaction.on_commit(invalidate_room_summaries)
+        transaction.on_commit(invalidate_all_me)
+    return len(allocations)
@@ -34,11 +34,14 @@ class AllocationSerializer(serializers.ModelSerializer):
         if not obj.room:
             return []
         
-        roommates = Allocation.objects.filter(
-            room=obj.room
-        ).exclude(
-            student=obj.student
-        ).select_related('student__profile', 'bed')
+        # Callers that already loaded the room's occupants (users.me) attach them here
+        roommates = getattr(obj, 'prefetched_roommates', None)
+        if roommates is None:
+            roommates = Allocation.objects.filter(
+                room=obj.room
+            ).exclude(
+                student=obj.student
+            ).select_related('student__profile', 'bed')
         
         return [
             {
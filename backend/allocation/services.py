@@ -2,6 +2,7 @@ from users.models import StudentProfile, CustomUser
 from housing.models import Room, Bed, Hostel
 from allocation.models import Allocation
 from student_requests.models import HostelRequest, RequestStatus
+from student_requests.history import HistoryRecorder
 from django.db import transaction
 from django.db.models import Q
 from datetime import datetime, timedelta
@@ -24,8 +25,37 @@ def parse_time_to_hours(time_obj):
         return 6.0 
     return time_obj.hour + time_obj.minute / 60.0
 
+def room_rules(label, hostel_gender, allocated_batches):
+    """Who a room's hostel takes, in the shape admits() checks"""
+    return {
+        'label': label,
+        'gender': hostel_gender,
+        'batches': {batch.strip() for batch in allocated_batches.split(',')} if allocated_batches else set(),
+    }
+
+def batch_label(batch_year):
+    """Batch year as written in Hostel.allocated_batches"""
+    return f"{batch_year:02d}" if batch_year is not None else None
+
+def admits(room, gender, batch):
+    """
+    Whether a room's hostel takes a student: same gender and, for a
+    batch-restricted hostel, an allowed batch. `room` holds the hostel's
+    'gender' and 'batches', as in room summaries and the re-optimizer.
+    """
+    if room['gender'] != gender:
+        return False
+    return not room['batches'] or batch in room['batches']
+
 def get_student_batch(user):
-    """Extract batch year from email (e.g., cst22001@std.uwu.ac.lk -> '22')"""
+    """Batch year as a 2-digit string (e.g., '22'), from the materialized profile column"""
+    try:
+        if user.profile.batch_year is not None:
+            return f"{user.profile.batch_year:02d}"
+    except StudentProfile.DoesNotExist:
+        pass
+    
+    # Fallback: extract from email (e.g., cst22001@std.uwu.ac.lk -> '22')
     email = user.email
     match = re.search(r'^[a-zA-Z]{3,4}(\d{2})\d{3}@std\.uwu\.ac\.lk$', email)
     if match:
@@ -90,6 +120,14 @@ def calculate_compatibility(student_a, student_b):
     except StudentProfile.DoesNotExist:
         return None  
     
+    return score_profiles(profile_a, profile_b)
+
+def score_profiles(profile_a, profile_b):
+    """
+    Pairwise score of two survey profiles (lower = better, None = incompatible).
+    Anything with the survey attributes works, e.g. the in-memory features of
+    allocation.suggestions.
+    """
     # Tier 1: Hard constraints
     if not tier1_biological_filter(profile_a, profile_b):
         return None  # Incompatible - never match
@@ -185,9 +223,14 @@ def get_eligible_students(semester, gender=None, batch=None):
     if gender:
         queryset = queryset.filter(gender=gender)
     
-    # Filter by batch if specified
+    # Filter by batch if specified (indexed column instead of an email regex scan)
     if batch:
-        queryset = queryset.filter(email__regex=rf'^[a-zA-Z]{{3,4}}{batch}\d{{3}}@std\.uwu\.ac\.lk$')
+        try:
+            batch_year = int(batch)
+        except (TypeError, ValueError):
+            # Not a batch year (e.g. '2a' from a query param): no student matches
+            return queryset.none()
+        queryset = queryset.filter(profile__batch_year=batch_year)
     
     return queryset
 
@@ -206,7 +249,7 @@ def get_suitable_hostel(student, semester):
     # If no batch-specific hostel, return any gender-matching hostel
     return hostels.first()
 
-def allocate_group_to_room(group, room, semester):
+def allocate_group_to_room(group, room, semester, history):
     from student_requests.models import HostelRequest, HostelRequestStatus
     
     available_beds = Bed.objects.filter(room=room, is_occupied=False)[:len(group)]
@@ -222,20 +265,25 @@ def allocate_group_to_room(group, room, semester):
         bed.is_occupied = True
         bed.save()
         allocations.append(allocation)
-        
-        # Update hostel request status to ALLOCATED
-        HostelRequest.objects.filter(
-            student=student,
-            status=HostelRequestStatus.PENDING
-        ).update(status=HostelRequestStatus.ALLOCATED)
+    
+    # Update hostel request status to ALLOCATED, recording each transition
+    pending_ids = list(HostelRequest.objects.filter(
+        student__in=[allocation.student_id for allocation in allocations],
+        status=HostelRequestStatus.PENDING
+    ).values_list('id', flat=True))
+    HostelRequest.objects.filter(id__in=pending_ids).update(status=HostelRequestStatus.ALLOCATED)
+    history.record_many(
+        'hostel_request', pending_ids, HostelRequestStatus.PENDING, HostelRequestStatus.ALLOCATED,
+        f'Allocated to room {room.room_number}'
+    )
     
     room.update_occupancy()
     return allocations
 
-def run_allocation(semester=""):
+def run_allocation(semester="", changed_by=None):
     allocated_count = 0
     
-    with transaction.atomic():
+    with transaction.atomic(), HistoryRecorder(changed_by=changed_by) as history:
         # Process each gender separately
         for gender in [CustomUser.Gender.MALE, CustomUser.Gender.FEMALE]:
             students = get_eligible_students(semester, gender=gender)
@@ -274,7 +322,7 @@ def run_allocation(semester=""):
                     ).distinct().first()
                 
                 if room:
-                    allocations = allocate_group_to_room(group, room, semester)
+                    allocations = allocate_group_to_room(group, room, semester, history)
                     allocated_count += len(allocations)
     
     return allocated_count
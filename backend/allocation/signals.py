@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import Allocation
+from .suggestions import invalidate_room_summaries
+from users.models import StudentProfile
+
+# Models whose writes change the cached room summaries used for swap suggestions
+ROOM_SUMMARY_MODELS = [Allocation, StudentProfile]
+
+def invalidate_room_summaries_on_write(sender, **kwargs):
+    # Defer until commit so a concurrent read cannot re-cache uncommitted state
+    transaction.on_commit(invalidate_room_summaries)
+
+for model in ROOM_SUMMARY_MODELS:
+    post_save.connect(invalidate_room_summaries_on_write, sender=model,
+                      dispatch_uid=f'room_summaries_save_{model.__name__}')
+    post_delete.connect(invalidate_room_summaries_on_write, sender=model,
+                        dispatch_uid=f'room_summaries_delete_{model.__name__}')
@@ -0,0 +1,143 @@
+"""
+Compatibility-aware swap suggestions.
+
+A per-room summary (hostel, gender, batches, and each occupant's survey
+features and current intra-room score) is built with one query and cached.
+Suggesting swaps for a student then only scores them against the few
+occupants of each candidate room in memory, instead of re-scoring every
+occupant pair in the database on every request.
+"""
+from collections import namedtuple
+from django.core.cache import cache
+from core.cache import cache_ttl
+from .models import Allocation
+from .services import score_profiles, get_student_batch, batch_label, admits
+
+ROOM_SUMMARIES_CACHE_KEY = 'allocation:room_summaries:v2'
+ROOM_SUMMARIES_TTL = 60 * 60  # seconds; writes invalidate it sooner
+DEFAULT_SUGGESTIONS = 5
+MAX_SUGGESTIONS = 20
+
+# The survey attributes score_profiles reads, detached from the ORM
+Features = namedtuple('Features', ['wake_up_time', 'requires_darkness', 'cleanliness', 'guest_tolerance', 'dominance'])
+
+def room_score(features, roommates):
+    """
+    Average pairwise score of a student against roommates' features
+    (lower = better). None if any pair is incompatible or there are no roommates.
+    """
+    if not roommates:
+        return None
+    total = 0
+    for other in roommates:
+        score = score_profiles(features, other)
+        if score is None:
+            return None
+        total += score
+    return total / len(roommates)
+
+def build_room_summaries():
+    """{room id: summary} for every room with allocations, from one query"""
+    rows = Allocation.objects.filter(student__profile__isnull=False).values_list(
+        'room_id', 'room__room_number', 'room__hostel__name', 'room__hostel__gender_type',
+        'room__hostel__allocated_batches', 'student_id', 'student__gender', 'student__profile__batch_year',
+        'student__profile__full_name', 'student__profile__enrollment_number', 'student__profile__wake_up_time',
+        'student__profile__requires_darkness', 'student__profile__cleanliness',
+        'student__profile__guest_tolerance', 'student__profile__dominance'
+    )
+
+    summaries = {}
+    for (room_id, room_number, hostel, gender, batches, student_id, student_gender, batch_year,
+         name, enrollment, *features) in rows:
+        summary = summaries.setdefault(room_id, {
+            'room_number': room_number,
+            'hostel': hostel,
+            'gender': gender,
+            'batches': [batch.strip() for batch in batches.split(',')] if batches else [],
+            'occupants': [],
+        })
+        summary['occupants'].append({
+            'id': student_id,
+            'gender': student_gender,
+            'batch': batch_label(batch_year),
+            'name': name,
+            'enrollment_number': enrollment,
+            'features': Features(*features),
+        })
+
+    for summary in summaries.values():
+        occupants = summary['occupants']
+        for occupant in occupants:
+            others = [other['features'] for other in occupants if other is not occupant]
+            occupant['score'] = room_score(occupant['features'], others)
+    return summaries
+
+def get_room_summaries():
+    """Cached room summaries, rebuilt on a miss"""
+    summaries = cache.get(ROOM_SUMMARIES_CACHE_KEY)
+    if summaries is None:
+        summaries = build_room_summaries()
+        cache.set(ROOM_SUMMARIES_CACHE_KEY, summaries, cache_ttl(ROOM_SUMMARIES_TTL))
+    return summaries
+
+def invalidate_room_summaries():
+    """Drop cached room summaries so the next request rebuilds them"""
+    cache.delete(ROOM_SUMMARIES_CACHE_KEY)
+
+def suggest_swaps(student, limit=DEFAULT_SUGGESTIONS):
+    """
+    Rooms and partners whose swap with `student` improves both sides' intra-room
+    scores, best combined improvement first. Both sides must be admitted by
+    the hostel they move to (gender and batch, as in the re-optimizer).
+    Returns None if the student has no allocation.
+    """
+    summaries = get_room_summaries()
+    allocation = Allocation.objects.filter(student=student).values_list('room_id', flat=True).first()
+    if allocation is None or allocation not in summaries:
+        return None
+
+    home = summaries[allocation]
+    me = next((occupant for occupant in home['occupants'] if occupant['id'] == student.id), None)
+    if me is None or me['score'] is None:
+        # No roommates (or already incompatible ones): nothing to measure improvement against
+        return []
+    home_roommates = [occupant['features'] for occupant in home['occupants'] if occupant is not me]
+    batch = get_student_batch(student)
+
+    suggestions = []
+    for room_id, room in summaries.items():
+        if room_id == allocation or not admits(room, student.gender, batch):
+            continue
+
+        for partner in room['occupants']:
+            if partner['score'] is None or not admits(home, partner['gender'], partner['batch']):
+                continue
+            # After the swap: I join the partner's roommates, the partner joins mine
+            my_score_after = room_score(
+                me['features'], [other['features'] for other in room['occupants'] if other is not partner]
+            )
+            if my_score_after is None or my_score_after >= me['score']:
+                continue
+            partner_score_after = room_score(partner['features'], home_roommates)
+            if partner_score_after is None or partner_score_after >= partner['score']:
+                continue
+
+            suggestions.append({
+                'room_id': room_id,
+                'room': f"{room['hostel']} - {room['room_number']}",
+                'partner': {
+                    'id': partner['id'],
+                    'name': partner['name'],
+                    'enrollment_number': partner['enrollment_number'],
+                },
+                'your_score': round(me['score'], 2),
+                'your_score_after': round(my_score_after, 2),
+                'partner_score': round(partner['score'], 2),
+                'partner_score_after': round(partner_score_after, 2),
+                'improvement': round(
+                    (me['score'] - my_score_after) + (partner['score'] - partner_score_after), 2
+                ),
+            })
+
+    suggestions.sort(key=lambda suggestion: -suggestion['improvement'])
+    return suggestions[:limit]
@@ -0,0 +1,238 @@
+"""
+Multi-party room swaps.
+
+Every pending SwapRequest is a desire: student_a wants student_b's bed (and
+once student_b has agreed, student_b wants student_a's bed too). These form a
+directed graph whose cycles are swaps everyone in them asked for:
+a -> b -> c -> a means a takes b's bed, b takes c's and c takes a's.
+
+Cycles are found in O(V + E) per strongly connected component plus a
+depth-limited search per node, then executed as one atomic reassignment with
+the involved Allocation and Bed rows locked.
+"""
+from collections import deque
+from django.db import transaction
+from django.utils import timezone
+from .models import Allocation
+from .services import room_rules, batch_label, admits
+from .suggestions import invalidate_room_summaries
+from housing.models import Bed
+from student_requests.models import SwapRequest
+from student_requests.history import HistoryRecorder
+from users.models import CustomUser
+from users.me import invalidate_all_me
+
+PENDING_SWAP_STATUSES = [SwapRequest.SwapStatus.PENDING_B_APPROVAL, SwapRequest.SwapStatus.PENDING_WARDEN]
+MAX_CYCLE_LENGTH = 6
+
+def build_swap_graph():
+    """
+    Adjacency of pending swap desires between allocated students.
+    Returns (graph {student: {target: swap id}}, beds {student: bed id}).
+    """
+    beds = dict(Allocation.objects.filter(bed__isnull=False).values_list('student_id', 'bed_id'))
+    graph = {}
+    swaps = SwapRequest.objects.filter(status__in=PENDING_SWAP_STATUSES).order_by('created_at', 'id')
+    for swap_id, student_a, student_b, agreed in swaps.values_list(
+        'id', 'student_a_id', 'student_b_id', 'student_b_agreed'
+    ):
+        if student_a == student_b or student_a not in beds or student_b not in beds:
+            continue
+        graph.setdefault(student_a, {}).setdefault(student_b, swap_id)
+        if agreed:
+            graph.setdefault(student_b, {}).setdefault(student_a, swap_id)
+    return graph, beds
+
+def strongly_connected_components(graph):
+    """Tarjan's algorithm, iterative. Returns components with two or more nodes."""
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in graph:
+        if root in index:
+            continue
+        work = [(root, iter(graph.get(root, ())))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, successors = work[-1]
+            advanced = False
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    advanced = True
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    components.append(component)
+    return components
+
+def _shortest_cycle_through(start, graph, allowed, max_length):
+    """Breadth-first search for the shortest cycle start -> ... -> start within `allowed`"""
+    parents = {start: None}
+    queue = deque([(start, 0)])
+    while queue:
+        node, depth = queue.popleft()
+        if depth >= max_length:
+            continue
+        for successor in graph.get(node, ()):
+            if successor == start:
+                cycle = [node]
+                while parents[cycle[-1]] is not None:
+                    cycle.append(parents[cycle[-1]])
+                return cycle[::-1]
+            if successor in allowed and successor not in parents:
+                parents[successor] = node
+                queue.append((successor, depth + 1))
+    return None
+
+def find_swap_cycles(graph, max_length=MAX_CYCLE_LENGTH):
+    """
+    Node-disjoint cycles of length 2..max_length in the desire graph.
+    Cycles can only exist inside a strongly connected component, so the search
+    is confined to those; shortest cycles are taken first, since every extra
+    participant is another move that can fail.
+    """
+    cycles = []
+    for component in strongly_connected_components(graph):
+        available = set(component)
+        for start in component:
+            if start not in available:
+                continue
+            cycle = _shortest_cycle_through(start, graph, available, max_length)
+            if cycle:
+                cycles.append(cycle)
+                available.difference_update(cycle)
+    return cycles
+
+def plan_swap_cycles(max_length=MAX_CYCLE_LENGTH):
+    """Cycles with the bed moves and swap requests they would settle, without writing"""
+    graph, beds = build_swap_graph()
+    plans = []
+    for cycle in find_swap_cycles(graph, max_length):
+        moves = []
+        for position, student in enumerate(cycle):
+            target = cycle[(position + 1) % len(cycle)]
+            moves.append({
+                'student': student,
+                'from_bed': beds[student],
+                'to_bed': beds[target],
+                'swap_request': graph[student][target],
+            })
+        plans.append({'students': cycle, 'moves': moves})
+    return plans
+
+def _cycle_respects_hostels(moves, beds):
+    """Whether every student's target bed is in a hostel that takes them (gender and batch)"""
+    students = {
+        student_id: (gender, batch_label(batch_year))
+        for student_id, gender, batch_year in CustomUser.objects.filter(
+            id__in=[move['student'] for move in moves]
+        ).values_list('id', 'gender', 'profile__batch_year')
+    }
+    for move in moves:
+        hostel = beds[move['to_bed']].room.hostel
+        rules = room_rules(hostel.name, hostel.gender_type, hostel.allocated_batches)
+        if move['student'] not in students or not admits(rules, *students[move['student']]):
+            return False
+    return True
+
+def execute_swap_cycle(plan, changed_by=None):
+    """
+    Apply one planned cycle atomically. Returns False (and changes nothing)
+    if any participant's bed or swap request changed since planning, or if a
+    participant's target hostel does not take them.
+    """
+    students = plan['students']
+    swap_ids = {move['swap_request'] for move in plan['moves']}
+
+    with transaction.atomic(), HistoryRecorder(changed_by=changed_by) as history:
+        allocations = {
+            allocation.student_id: allocation
+            for allocation in Allocation.objects.select_for_update().filter(student_id__in=students)
+        }
+        beds = {
+            bed.id: bed
+            for bed in Bed.objects.select_for_update(of=('self',)).filter(
+                id__in=[move['from_bed'] for move in plan['moves']]
+            ).select_related('room__hostel')
+        }
+        swaps = list(SwapRequest.objects.select_for_update().filter(
+            id__in=swap_ids, status__in=PENDING_SWAP_STATUSES
+        ).only('id', 'status'))
+
+        stale = (
+            len(swaps) != len(swap_ids) or len(beds) != len(students) or
+            any(allocations.get(move['student']) is None or
+                allocations[move['student']].bed_id != move['from_bed'] for move in plan['moves'])
+        )
+        if stale or not _cycle_respects_hostels(plan['moves'], beds):
+            return False
+
+        # Beds are one-to-one with allocations: release them before reassigning
+        moved = [allocations[move['student']] for move in plan['moves']]
+        Allocation.objects.filter(id__in=[allocation.id for allocation in moved]).update(bed=None)
+        for move in plan['moves']:
+            allocation = allocations[move['student']]
+            allocation.bed_id = move['to_bed']
+            allocation.room_id = beds[move['to_bed']].room_id
+        Allocation.objects.bulk_update(moved, ['bed', 'room'])
+
+        # Every bed in the cycle stays occupied, so no room occupancy changes
+        notes = f'{len(students)}-way swap executed'
+        for swap in swaps:
+            history.record('swap_request', swap.id, swap.status, SwapRequest.SwapStatus.APPROVED, notes)
+        SwapRequest.objects.filter(id__in=swap_ids).update(
+            status=SwapRequest.SwapStatus.APPROVED, warden_notes=notes, updated_at=timezone.now()
+        )
+
+        # update()/bulk_update() send no post_save, so caches are dropped here
+        from operations.services import invalidate_dashboard_stats
+        transaction.on_commit(invalidate_dashboard_stats)
+        transaction.on_commit(invalidate_room_summaries)
+        transaction.on_commit(invalidate_all_me)
+    return True
+
+def execute_swap_cycles(changed_by=None, max_length=MAX_CYCLE_LENGTH, dry_run=False):
+    """Find all swap cycles and execute each one atomically"""
+    plans = plan_swap_cycles(max_length)
+    executed = 0
+    if not dry_run:
+        # Each cycle commits on its own, so one stale cycle does not block the rest
+        for plan in plans:
+            plan['executed'] = execute_swap_cycle(plan, changed_by)
+            executed += plan['executed']
+    return {
+        'cycles_found': len(plans),
+        'cycles_executed': executed,
+        'students_moved': sum(len(plan['students']) for plan in plans if plan.get('executed')),
+        'cycles': plans,
+        'dry_run': dry_run,
+    }
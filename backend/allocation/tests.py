@@ -1,3 +1,168 @@
 from django.test import TestCase
+from core.testing import make_student, make_hostel, house_students
+from housing.models import Room
+from student_requests.models import SwapRequest, StatusHistory
+from .models import Allocation
+from .swap_cycles import find_swap_cycles, execute_swap_cycles
+from .suggestions import suggest_swaps, invalidate_room_summaries
+from .reoptimize import propose_reoptimization, commit_moves
 
-# Create your tests here.
+
+class FindSwapCyclesTest(TestCase):
+    def test_finds_disjoint_cycles_and_ignores_chains(self):
+        graph = {
+            1: {2: 10}, 2: {3: 11}, 3: {1: 12},  # 3-cycle
+            4: {5: 13}, 5: {4: 14},              # mutual swap
+            6: {7: 15}, 7: {8: 16},              # chain, no cycle
+        }
+        cycles = sorted(sorted(cycle) for cycle in find_swap_cycles(graph))
+        self.assertEqual(cycles, [[1, 2, 3], [4, 5]])
+
+    def test_cycles_do_not_share_students(self):
+        graph = {1: {2: 10, 3: 11}, 2: {1: 12}, 3: {1: 13}}
+        cycles = find_swap_cycles(graph)
+        self.assertEqual(len(cycles), 1)
+
+    def test_respects_max_length(self):
+        graph = {n: {n % 8 + 1: n} for n in range(1, 9)}  # one 8-cycle
+        self.assertEqual(find_swap_cycles(graph, max_length=6), [])
+        self.assertEqual(len(find_swap_cycles(graph, max_length=8)[0]), 8)
+
+
+class ExecuteSwapCyclesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [make_student(n) for n in range(1, 4)]
+        cls.beds = [room.beds.get() for room in house_students(cls.students)]
+
+        # Each student wants the next one's bed
+        for i, student in enumerate(cls.students):
+            target = cls.students[(i + 1) % 3]
+            SwapRequest.objects.create(
+                student_a=student, student_b=target,
+                student_b_enrollment=target.profile.enrollment_number
+            )
+
+    def test_three_way_swap_is_executed(self):
+        result = execute_swap_cycles()
+
+        self.assertEqual(result['cycles_executed'], 1)
+        self.assertEqual(result['students_moved'], 3)
+        for i, student in enumerate(self.students):
+            allocation = Allocation.objects.get(student=student)
+            self.assertEqual(allocation.bed_id, self.beds[(i + 1) % 3].id)
+            self.assertEqual(allocation.room_id, self.beds[(i + 1) % 3].room_id)
+        self.assertFalse(SwapRequest.objects.exclude(status=SwapRequest.SwapStatus.APPROVED).exists())
+        self.assertEqual(StatusHistory.objects.filter(content_type='swap_request').count(), 3)
+
+    def test_cycle_breaking_hostel_rules_is_not_executed(self):
+        # Student 2 would move into student 3's room, now in a hostel that only takes batch 23
+        Room.objects.filter(pk=self.beds[2].room_id).update(hostel=make_hostel('Block B', allocated_batches='23'))
+        result = execute_swap_cycles()
+
+        self.assertEqual((result['cycles_found'], result['cycles_executed']), (1, 0))
+        for student, bed in zip(self.students, self.beds):
+            self.assertEqual(Allocation.objects.get(student=student).bed_id, bed.id)
+        self.assertFalse(SwapRequest.objects.filter(status=SwapRequest.SwapStatus.APPROVED).exists())
+
+    def test_dry_run_changes_nothing(self):
+        result = execute_swap_cycles(dry_run=True)
+
+        self.assertEqual(result['cycles_found'], 1)
+        self.assertEqual(result['cycles_executed'], 0)
+        self.assertEqual(Allocation.objects.get(student=self.students[0]).bed_id, self.beds[0].id)
+
+
+class SwapSuggestionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Each room pairs a tidy student with a messy one; swapping fixes both rooms
+        cls.students = [make_student(n, cleanliness=value) for n, value in enumerate([5, 1, 1, 5], start=1)]
+        house_students(cls.students, per_room=2)
+
+    def setUp(self):
+        # on_commit invalidation does not run inside TestCase transactions
+        invalidate_room_summaries()
+
+    def test_suggests_swap_improving_both_rooms(self):
+        suggestions = suggest_swaps(self.students[0])
+
+        self.assertEqual(len(suggestions), 1)
+        self.assertEqual(suggestions[0]['partner']['id'], self.students[2].id)
+        self.assertLess(suggestions[0]['your_score_after'], suggestions[0]['your_score'])
+        self.assertLess(suggestions[0]['partner_score_after'], suggestions[0]['partner_score'])
+
+
+class SwapSuggestionHostelRulesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Block A takes batch 22 only, Block B takes 22 and 23
+        cls.student, roommate = make_student(1, cleanliness=5), make_student(2, cleanliness=1)
+        house_students([cls.student, roommate], hostel=make_hostel('Block A', allocated_batches='22'), per_room=2)
+        # In each Block B room the messy occupant would swap with student 1; only room 201's is batch 22
+        cls.batch_23 = make_student(3, cleanliness=1, enrollment_number='UWU/CST/23/003')
+        cls.batch_22 = make_student(5, cleanliness=1)
+        house_students(
+            [cls.batch_23, make_student(4, cleanliness=5), cls.batch_22, make_student(6, cleanliness=5)],
+            hostel=make_hostel('Block B', allocated_batches='22,23'), per_room=2, first_room=200
+        )
+
+    def setUp(self):
+        invalidate_room_summaries()
+
+    def test_partner_must_be_admitted_by_the_requesters_hostel(self):
+        self.assertEqual(self.batch_23.profile.batch_year, 23)
+        suggestions = suggest_swaps(self.student)
+        self.assertEqual([suggestion['partner']['id'] for suggestion in suggestions], [self.batch_22.id])
+
+
+class ReoptimizeAllocationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Two mixed rooms; regrouping tidy with tidy and messy with messy is optimal
+        cls.students = [make_student(n, cleanliness=value) for n, value in enumerate([5, 1, 1, 5], start=1)]
+        cls.rooms = house_students(cls.students, per_room=2)
+
+    def test_proposal_improves_and_commits(self):
+        proposal = propose_reoptimization(seed=1)
+
+        self.assertEqual(proposal['students_moved'], 2)
+        self.assertLess(proposal['final_cost'], proposal['initial_cost'])
+        self.assertEqual(Allocation.objects.get(student=self.students[0]).room, self.rooms[0])
+
+        self.assertEqual(commit_moves(proposal['moves']), 2)
+        rooms = {student.id: Allocation.objects.get(student=student).room_id for student in self.students}
+        self.assertEqual(rooms[self.students[0].id], rooms[self.students[3].id])
+        self.assertEqual(rooms[self.students[1].id], rooms[self.students[2].id])
+
+        history = StatusHistory.objects.filter(content_type='allocation')
+        self.assertEqual(history.count(), 2)
+        self.assertTrue(all(entry.notes.startswith('Re-optimization: Block A - ') for entry in history))
+
+    def test_respects_max_moves(self):
+        self.assertEqual(propose_reoptimization(max_moves=1)['moves'], [])
+
+    def test_stale_proposal_is_rejected(self):
+        proposal = propose_reoptimization(seed=1)
+        moved = proposal['moves'][0]['student']
+        Allocation.objects.filter(student_id=moved).update(bed=None)
+
+        with self.assertRaises(ValueError):
+            commit_moves(proposal['moves'])
+
+    def test_hand_edited_move_must_respect_hostel_rules(self):
+        # Student 5 is batch 22 in a 23-only hostel; exchanging beds with student 1 breaks the batch rule
+        outsider = make_student(5)
+        room, = house_students([outsider], hostel=make_hostel('Block B', allocated_batches='23'), first_room=200)
+        beds = {
+            student.id: Allocation.objects.get(student=student).bed_id for student in (self.students[0], outsider)
+        }
+        moves = [
+            {'student': self.students[0].id, 'from_bed': beds[self.students[0].id], 'to_bed': beds[outsider.id]},
+            {'student': outsider.id, 'from_bed': beds[outsider.id], 'to_bed': beds[self.students[0].id]},
+        ]
+
+        with self.assertRaisesMessage(ValueError, 'cannot be moved to Block B - 200'):
+            commit_moves(moves)
+        self.assertEqual(Allocation.objects.get(student=outsider).room, room)
+        self.assertFalse(StatusHistory.objects.filter(content_type='allocation').exists())
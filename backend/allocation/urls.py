@@ -1,7 +1,8 @@
 from django.urls import path
 from .views import (
     RunAllocationView, AllocationPreviewView, MyRoomView,
-    AllocationListView, AllocationStatsView, ResetAllocationsView
+    AllocationListView, AllocationStatsView, ResetAllocationsView,
+    SwapCyclesView, SwapSuggestionsView, ReoptimizeAllocationsView
 )
 
 urlpatterns = [
@@ -11,5 +12,8 @@ urlpatterns = [
     path('list/', AllocationListView.as_view(), name='allocation-list'),
     path('stats/', AllocationStatsView.as_view(), name='allocation-stats'),
     path('reset/', ResetAllocationsView.as_view(), name='reset-allocations'),
+    path('swap-cycles/', SwapCyclesView.as_view(), name='swap-cycles'),
+    path('swap-suggestions/', SwapSuggestionsView.as_view(), name='swap-suggestions'),
+    path('reoptimize/', ReoptimizeAllocationsView.as_view(), name='reoptimize-allocations'),
 ]
 
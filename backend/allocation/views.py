@@ -11,7 +11,7 @@ class RunAllocationView(views.APIView):
 
     def post(self, request):
         semester = request.data.get('semester', 'Fall 2025')
-        count = run_allocation(semester=semester)
+        count = run_allocation(semester=semester, changed_by=request.user)
         return Response({
             "message": f"Successfully allocated {count} students",
             "count": count,
@@ -103,6 +103,7 @@ class ResetAllocationsView(views.APIView):
     def post(self, request):
         from housing.models import Bed, Room
         from student_requests.models import HostelRequest, HostelRequestStatus
+        from student_requests.history import HistoryRecorder
         from django.db import transaction
         
         semester = request.data.get('semester')
@@ -113,7 +114,7 @@ class ResetAllocationsView(views.APIView):
                 'error': 'Please confirm reset by setting confirm=true'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        with transaction.atomic():
+        with transaction.atomic(), HistoryRecorder(changed_by=request.user) as history:
             # Get allocations to reset
             if semester:
                 allocations = Allocation.objects.filter(semester=semester)
@@ -138,9 +139,14 @@ class ResetAllocationsView(views.APIView):
             
             # Reset hostel request statuses to allow new requests
             # Only reset ALLOCATED requests back to allow re-request
-            HostelRequest.objects.filter(
+            reset_ids = list(HostelRequest.objects.filter(
                 status=HostelRequestStatus.ALLOCATED
-            ).update(status=HostelRequestStatus.PENDING)
+            ).values_list('id', flat=True))
+            HostelRequest.objects.filter(id__in=reset_ids).update(status=HostelRequestStatus.PENDING)
+            history.record_many(
+                'hostel_request', reset_ids, HostelRequestStatus.ALLOCATED, HostelRequestStatus.PENDING,
+                'Allocation reset'
+            )
             
             # Count pending requests that were reset
             pending_reset = HostelRequest.objects.filter(
@@ -154,3 +160,94 @@ class ResetAllocationsView(views.APIView):
             'pending_requests': pending_reset,
             'semester': semester or 'all'
         })
+
+
+class SwapCyclesView(views.APIView):
+    """
+    Multi-party swaps from pending swap requests.
+    GET previews the swap cycles found; POST executes them (each cycle atomically).
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get_max_length(self, value):
+        from .swap_cycles import MAX_CYCLE_LENGTH
+        try:
+            return min(max(int(value or MAX_CYCLE_LENGTH), 2), 12)
+        except (TypeError, ValueError):
+            return None
+    
+    def get(self, request):
+        from .swap_cycles import execute_swap_cycles
+        
+        max_length = self.get_max_length(request.query_params.get('max_length'))
+        if max_length is None:
+            return Response({'error': 'max_length must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(execute_swap_cycles(max_length=max_length, dry_run=True))
+    
+    def post(self, request):
+        from .swap_cycles import execute_swap_cycles
+        
+        max_length = self.get_max_length(request.data.get('max_length'))
+        if max_length is None:
+            return Response({'error': 'max_length must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        result = execute_swap_cycles(changed_by=request.user, max_length=max_length)
+        result['message'] = f"Executed {result['cycles_executed']} of {result['cycles_found']} swap cycles"
+        return Response(result)
+
+
+class SwapSuggestionsView(views.APIView):
+    """Rooms/partners whose swap with the current student improves both sides' compatibility"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        from .suggestions import suggest_swaps, DEFAULT_SUGGESTIONS, MAX_SUGGESTIONS
+        
+        try:
+            limit = min(max(int(request.query_params.get('k', DEFAULT_SUGGESTIONS)), 1), MAX_SUGGESTIONS)
+        except (TypeError, ValueError):
+            return Response({'error': 'k must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        suggestions = suggest_swaps(request.user, limit)
+        if suggestions is None:
+            return Response({'error': 'You do not have a room allocation'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'suggestions': suggestions})
+
+
+class ReoptimizeAllocationsView(views.APIView):
+    """
+    Global re-optimization of current allocations by pair swaps between rooms.
+    POST with no moves proposes a move list (committed directly if commit is true);
+    POST with a previously proposed moves list commits it atomically.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def post(self, request):
+        from .reoptimize import propose_reoptimization, commit_moves, DEFAULT_MAX_MOVES, DEFAULT_TIME_BUDGET
+        
+        moves = request.data.get('moves')
+        if moves is not None:
+            try:
+                moves = [
+                    {key: int(move[key]) for key in ('student', 'from_bed', 'to_bed')}
+                    for move in moves
+                ]
+                moved = commit_moves(moves, changed_by=request.user)
+            except (TypeError, KeyError, ValueError) as e:
+                return Response({'error': str(e) or 'Invalid moves'}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'message': f'Moved {moved} students', 'students_moved': moved})
+        
+        try:
+            max_moves = min(max(int(request.data.get('max_moves', DEFAULT_MAX_MOVES)), 2), 500)
+            time_budget = min(max(float(request.data.get('time_budget', DEFAULT_TIME_BUDGET)), 0.1), 30.0)
+        except (TypeError, ValueError):
+            return Response({'error': 'max_moves and time_budget must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        proposal = propose_reoptimization(max_moves=max_moves, time_budget=time_budget)
+        proposal['committed'] = False
+        if request.data.get('commit') and proposal['moves']:
+            try:
+                commit_moves(proposal['moves'], changed_by=request.user)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+            proposal['committed'] = True
+        return Response(proposal)
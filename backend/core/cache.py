@@ -0,0 +1,22 @@
+"""
+Cache timeouts that account for where the cache lives.
+
+Cached payloads are dropped by signals in the process that made the write.
+With a shared backend (Redis, Memcached) that reaches every worker; with a
+process-local one (LocMemCache, the default when REDIS_URL is unset) the
+other workers keep their copy until it expires, so timeouts there are capped
+to LOCAL_CACHE_MAX_TTL seconds.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+def cache_is_shared():
+    """Whether writes to the default cache are seen by every worker"""
+    return not isinstance(caches['default'], LocMemCache)
+
+def cache_ttl(seconds):
+    """A timeout no longer than the cache's invalidation can be trusted for"""
+    if cache_is_shared():
+        return seconds
+    return min(seconds, settings.LOCAL_CACHE_MAX_TTL)
@@ -167,3 +167,20 @@ DJOSER = {
     }
 }
 
+# Cache: invalidation signals only reach other workers through a shared
+# backend. Without REDIS_URL each process has its own LocMemCache and
+# core.cache.cache_ttl caps every timeout to LOCAL_CACHE_MAX_TTL seconds.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+LOCAL_CACHE_MAX_TTL = int(os.getenv('LOCAL_CACHE_MAX_TTL', '5'))  # seconds
+
+# Signed outpass tokens: Ed25519, so gate verifiers only hold the public key
+# (`manage.py outpass_token_keys --generate` prints a new pair). Required to
+# approve outpasses; there is no fallback to SECRET_KEY.
+OUTPASS_TOKEN_PRIVATE_KEY = os.getenv('OUTPASS_TOKEN_PRIVATE_KEY')
@@ -0,0 +1,48 @@
+"""
+Fixtures shared by the apps' test suites.
+"""
+from users.models import CustomUser
+from housing.models import Hostel, Room, Bed
+from allocation.models import Allocation
+
+SEMESTER = '2025/2026'
+
+def make_student(n, **profile_fields):
+    """Student number n of the 2022 CST batch; the profile is created by the post_save signal"""
+    student = CustomUser.objects.create_user(
+        username=f'cst22{n:03d}',
+        email=f'cst22{n:03d}@std.uwu.ac.lk',
+        password=None,
+        role=CustomUser.Role.STUDENT
+    )
+    if profile_fields:
+        for field, value in profile_fields.items():
+            setattr(student.profile, field, value)
+        student.profile.save()
+    return student
+
+def make_warden(username='warden'):
+    return CustomUser.objects.create_user(
+        username=username, email=f'{username}@himate.com', password=None,
+        role=CustomUser.Role.WARDEN, is_staff=True
+    )
+
+def make_hostel(name='Block A', gender_type='MALE', **fields):
+    return Hostel.objects.create(name=name, gender_type=gender_type, caretaker_name='John', **fields)
+
+def house_students(students, hostel=None, per_room=1, beds=True, first_room=100):
+    """
+    Allocate students to consecutive rooms of `per_room`, in order, each on
+    their own occupied bed (or without a bed when beds=False). Returns the rooms.
+    """
+    hostel = hostel or make_hostel()
+    rooms = []
+    for start in range(0, len(students), per_room):
+        room = Room.objects.create(
+            hostel=hostel, room_number=str(first_room + len(rooms)), capacity=per_room
+        )
+        for number, student in enumerate(students[start:start + per_room]):
+            bed = Bed.objects.create(room=room, bed_number=str(number), is_occupied=True) if beds else None
+            Allocation.objects.create(student=student, room=room, bed=bed, semester=SEMESTER)
+        rooms.append(room)
+    return rooms
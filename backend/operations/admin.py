@@ -1,9 +1,9 @@
 from django.contrib import admin
-from .models import MaintenanceTicket
+from .models import MaintenanceTicket, DailyStats, TicketCluster, TicketResolutionDaily
 
 @admin.register(MaintenanceTicket)
 class MaintenanceTicketAdmin(admin.ModelAdmin):
-    list_display = ['id', 'category', 'priority', 'title', 'status', 'student', 'created_at']
+    list_display = ['id', 'category', 'priority', 'title', 'status', 'student', 'cluster', 'created_at']
     list_filter = ['status', 'category', 'priority']
     search_fields = ['title', 'description', 'student__email']
     readonly_fields = ['created_at', 'updated_at', 'resolved_at']
@@ -13,10 +13,26 @@ class MaintenanceTicketAdmin(admin.ModelAdmin):
             'fields': ('student', 'room', 'category', 'priority', 'title', 'description')
         }),
         ('Status', {
-            'fields': ('status', 'feedback', 'assigned_to')
+            'fields': ('status', 'feedback', 'assigned_to', 'cluster')
         }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'resolved_at'),
             'classes': ('collapse',)
         }),
     )
+
+@admin.register(DailyStats)
+class DailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'occupancy_rate', 'open_tickets', 'pending_outpasses', 'allocations_made']
+    readonly_fields = ['updated_at']
+
+@admin.register(TicketCluster)
+class TicketClusterAdmin(admin.ModelAdmin):
+    list_display = ['id', 'category', 'scope', 'hostel', 'floor', 'room', 'created_at']
+    list_filter = ['category', 'scope']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(TicketResolutionDaily)
+class TicketResolutionDailyAdmin(admin.ModelAdmin):
+    list_display = ['date', 'category', 'hostel', 'assigned_to', 'resolved_count']
+    list_filter = ['category', 'hostel']
@@ -0,0 +1,245 @@
+"""
+Maintenance ticket SLA and resolution-time analytics.
+
+StatusHistory rows for tickets are folded, past a RollupWatermark like the
+daily stats rollup, into:
+  - TicketDuration: per-ticket time in each status, first response and
+    time to resolution;
+  - TicketResolutionDaily: per day, category, hostel and staff member, the
+    number of resolutions, their total time and a log-scale histogram of
+    resolution times.
+
+Reports merge the daily histograms, so p50/p90 over any window and grouping
+come from a few hundred aggregate rows instead of every ticket's history.
+Percentiles are bucket upper edges, i.e. within one bucket (25%) of the truth.
+"""
+import math
+from bisect import bisect_left
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import MaintenanceTicket, TicketDuration, TicketResolutionDaily, RollupWatermark
+from .services import ROLLUP_SETTLE_TIME
+from student_requests.models import StatusHistory
+
+SLA_WATERMARK = 'ticket_sla_history'
+SLA_CHUNK_SIZE = 2000
+CLOSED_TICKET_STATUSES = [MaintenanceTicket.Status.RESOLVED, MaintenanceTicket.Status.CLOSED]
+
+# Histogram bucket upper edges in seconds: 5 minutes to ~90 days, 25% apart
+RESOLUTION_BUCKETS = []
+_edge = 300.0
+while _edge < 90 * 86400:
+    RESOLUTION_BUCKETS.append(int(_edge))
+    _edge *= 1.25
+RESOLUTION_BUCKETS.append(int(_edge))
+
+GROUP_FIELDS = ['category', 'hostel', 'assigned_to']
+
+def bucket_index(seconds):
+    return min(bisect_left(RESOLUTION_BUCKETS, seconds), len(RESOLUTION_BUCKETS) - 1)
+
+def merge_histogram(into, histogram):
+    if len(into) < len(RESOLUTION_BUCKETS):
+        into.extend([0] * (len(RESOLUTION_BUCKETS) - len(into)))
+    for index, count in enumerate(histogram):
+        into[index] += count
+    return into
+
+def histogram_percentile(histogram, q):
+    """Upper edge (seconds) of the bucket holding the q-quantile, or None if empty"""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = math.ceil(q * total)
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return RESOLUTION_BUCKETS[index]
+    return RESOLUTION_BUCKETS[-1]
+
+def _new_duration(ticket_id, info):
+    category, hostel, assigned_to, created_at = info
+    return TicketDuration(
+        ticket_id=ticket_id, category=category, hostel=hostel or '', assigned_to=assigned_to or '',
+        opened_at=created_at, current_status=MaintenanceTicket.Status.OPEN, status_since=created_at,
+        status_seconds={}
+    )
+
+def _fold_transition(duration, old_status, new_status, at, resolutions, info=None):
+    """
+    Apply one status change to a ticket's durations; record resolutions by
+    aggregate key. `info` is the ticket's current (category, hostel,
+    assigned_to, created_at), which resolutions are attributed to.
+    """
+    if not old_status:
+        duration.opened_at = at
+        duration.current_status, duration.status_since = new_status, at
+        return
+    if old_status == new_status:
+        return  # feedback/assignment notes only
+
+    if duration.status_since:
+        spent = max(int((at - duration.status_since).total_seconds()), 0)
+        duration.status_seconds[old_status] = duration.status_seconds.get(old_status, 0) + spent
+    duration.current_status, duration.status_since = new_status, at
+    if duration.first_response_at is None and new_status != MaintenanceTicket.Status.OPEN:
+        duration.first_response_at = at
+
+    if new_status in CLOSED_TICKET_STATUSES and old_status not in CLOSED_TICKET_STATUSES:
+        if info is not None:
+            # Staff are usually assigned after the ticket is first seen, so re-read them at resolution
+            _, hostel, assigned_to, _ = info
+            duration.hostel, duration.assigned_to = hostel or '', assigned_to or ''
+        duration.resolved_at = at
+        duration.resolution_seconds = max(int((at - duration.opened_at).total_seconds()), 0)
+        key = (timezone.localdate(at), duration.category, duration.hostel, duration.assigned_to)
+        resolutions.setdefault(key, []).append((duration.resolution_seconds, dict(duration.status_seconds)))
+    elif old_status in CLOSED_TICKET_STATUSES and new_status not in CLOSED_TICKET_STATUSES:
+        # Reopened: the next resolution is counted again with the full elapsed time
+        duration.resolved_at = None
+        duration.resolution_seconds = None
+
+def _save_resolutions(resolutions):
+    """Add resolutions to TicketResolutionDaily rows, creating missing ones"""
+    if not resolutions:
+        return
+    dates = {key[0] for key in resolutions}
+    existing = {
+        (row.date, row.category, row.hostel, row.assigned_to): row
+        for row in TicketResolutionDaily.objects.select_for_update().filter(date__in=dates)
+    }
+    to_create, to_update = [], []
+    for key, resolved in resolutions.items():
+        row = existing.get(key)
+        if row is None:
+            date, category, hostel, assigned_to = key
+            row = TicketResolutionDaily(date=date, category=category, hostel=hostel, assigned_to=assigned_to,
+                                        histogram=[], status_seconds={})
+            to_create.append(row)
+        else:
+            to_update.append(row)
+        for seconds, status_seconds in resolved:
+            row.resolved_count += 1
+            row.total_resolution_seconds += seconds
+            counts = [0] * len(RESOLUTION_BUCKETS)
+            counts[bucket_index(seconds)] = 1
+            row.histogram = merge_histogram(list(row.histogram), counts)
+            for status, spent in status_seconds.items():
+                row.status_seconds[status] = row.status_seconds.get(status, 0) + spent
+    TicketResolutionDaily.objects.bulk_create(to_create)
+    TicketResolutionDaily.objects.bulk_update(
+        to_update, ['resolved_count', 'total_resolution_seconds', 'histogram', 'status_seconds']
+    )
+
+def _rollup_chunk(after_id, settled_before):
+    """
+    Fold up to SLA_CHUNK_SIZE ticket history rows past after_id, stopping at
+    the first row created after settled_before. Returns (rows folded, last id).
+    """
+    rows = list(StatusHistory.objects.filter(
+        content_type='ticket', id__gt=after_id
+    ).order_by('id').values_list('id', 'object_id', 'old_status', 'new_status', 'created_at')[:SLA_CHUNK_SIZE])
+    for index, row in enumerate(rows):
+        if row[4] > settled_before:
+            rows = rows[:index]
+            break
+    if not rows:
+        return 0, after_id
+
+    ticket_ids = {row[1] for row in rows}
+    durations = {duration.ticket_id: duration for duration in TicketDuration.objects.filter(ticket_id__in=ticket_ids)}
+    missing = ticket_ids - set(durations)
+    info = {
+        ticket_id: rest for ticket_id, *rest in MaintenanceTicket.objects.filter(id__in=ticket_ids).values_list(
+            'id', 'category', 'room__hostel__name', 'assigned_to', 'created_at'
+        )
+    }
+    new_ids = set()
+    for ticket_id in missing:
+        if ticket_id in info:  # history of deleted tickets is skipped
+            durations[ticket_id] = _new_duration(ticket_id, info[ticket_id])
+            new_ids.add(ticket_id)
+
+    resolutions = {}
+    for _, ticket_id, old_status, new_status, created_at in rows:
+        if ticket_id in durations:
+            _fold_transition(durations[ticket_id], old_status, new_status, created_at, resolutions, info.get(ticket_id))
+
+    if new_ids:
+        TicketDuration.objects.bulk_create([durations[ticket_id] for ticket_id in new_ids])
+    TicketDuration.objects.bulk_update(
+        [duration for ticket_id, duration in durations.items() if ticket_id not in new_ids],
+        ['hostel', 'assigned_to', 'opened_at', 'first_response_at', 'resolved_at', 'resolution_seconds',
+         'status_seconds', 'current_status', 'status_since']
+    )
+    _save_resolutions(resolutions)
+    return len(rows), rows[-1][0]
+
+def rollup_ticket_sla():
+    """
+    Incrementally fold ticket StatusHistory rows created since the last run into
+    TicketDuration and TicketResolutionDaily, one chunk per transaction. Like
+    the daily stats rollup, rows younger than ROLLUP_SETTLE_TIME wait for the
+    next run.
+    """
+    settled_before = timezone.now() - ROLLUP_SETTLE_TIME
+    processed = 0
+    while True:
+        with transaction.atomic():
+            watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=SLA_WATERMARK)
+            count, last_id = _rollup_chunk(watermark.last_id, settled_before)
+            if not count:
+                return {'rows_processed': processed, 'watermark': watermark.last_id}
+            watermark.last_id = last_id
+            watermark.save()
+        processed += count
+
+def ticket_sla_report(days=30, group_by=None):
+    """
+    Resolution-time report for tickets resolved in the last `days` days, overall
+    and per value of group_by (one of GROUP_FIELDS). Hours throughout.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rows = TicketResolutionDaily.objects.filter(date__gte=since).values_list(
+        'category', 'hostel', 'assigned_to', 'resolved_count', 'total_resolution_seconds',
+        'histogram', 'status_seconds'
+    )
+
+    overall = {'resolved': 0, 'seconds': 0, 'histogram': [], 'status_seconds': {}}
+    groups = {}
+    for category, hostel, assigned_to, count, seconds, histogram, status_seconds in rows:
+        targets = [overall]
+        if group_by:
+            value = {'category': category, 'hostel': hostel, 'assigned_to': assigned_to}[group_by]
+            targets.append(groups.setdefault(value, {'resolved': 0, 'seconds': 0, 'histogram': [], 'status_seconds': {}}))
+        for target in targets:
+            target['resolved'] += count
+            target['seconds'] += seconds
+            merge_histogram(target['histogram'], histogram)
+            for status, spent in status_seconds.items():
+                target['status_seconds'][status] = target['status_seconds'].get(status, 0) + spent
+
+    def summarize(totals):
+        def hours(seconds):
+            return round(seconds / 3600, 1) if seconds is not None else None
+        resolved = totals['resolved']
+        return {
+            'resolved': resolved,
+            'avg_hours': hours(totals['seconds'] / resolved) if resolved else None,
+            'p50_hours': hours(histogram_percentile(totals['histogram'], 0.5)),
+            'p90_hours': hours(histogram_percentile(totals['histogram'], 0.9)),
+            'avg_hours_in_status': {
+                status: hours(spent / resolved) for status, spent in sorted(totals['status_seconds'].items())
+            } if resolved else {},
+        }
+
+    report = {'days': days, 'since': since, 'overall': summarize(overall)}
+    if group_by:
+        report['group_by'] = group_by
+        report['groups'] = [
+            {group_by: value or None, **summarize(totals)}
+            for value, totals in sorted(groups.items(), key=lambda item: -item[1]['resolved'])
+        ]
+    return report
@@ -0,0 +1,145 @@
+"""
+Duplicate maintenance ticket clustering.
+
+When a ticket is created it is compared with recent open tickets of the same
+category around the same place: the same room, the same floor for electrical
+faults, or the whole hostel for WiFi outages. Text similarity is a MinHash
+estimate of Jaccard similarity over in-word character shingles of title and
+description; signatures are stored on the ticket, so each comparison is a
+32-slot equality count instead of re-reading and re-shingling old tickets.
+
+A match above the threshold joins the new ticket to the matched ticket's
+cluster (creating one if needed). Staff then see the cluster as one work item
+and can resolve all of its open tickets with one bulk update.
+"""
+import random
+import re
+import zlib
+from django.db import transaction
+from .models import MaintenanceTicket, TicketCluster
+
+Category = MaintenanceTicket.Category
+Status = MaintenanceTicket.Status
+Scope = TicketCluster.Scope
+
+OPEN_TICKET_STATUSES = [Status.OPEN, Status.VIEWED, Status.IN_PROGRESS, Status.WAITING_PARTS]
+
+# How far apart two reports of the same problem can plausibly be
+CATEGORY_SCOPES = {
+    Category.WIFI: Scope.HOSTEL,
+    Category.ELECTRICAL: Scope.FLOOR,
+}
+
+NUM_HASHES = 32
+SHINGLE_SIZE = 3
+SIMILARITY_THRESHOLD = 0.5
+MAX_CANDIDATES = 200  # most recent open tickets in scope that a new ticket is compared against
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20251019)  # fixed, so stored signatures stay comparable
+_HASH_PARAMS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_HASHES)]
+
+def shingles(text):
+    """
+    Hashes of character shingles taken within each (space-padded) word, so
+    extra or reordered words barely move the similarity and typos only touch
+    the shingles of one word
+    """
+    hashes = set()
+    for word in re.findall(r'[a-z0-9]+', text.lower()):
+        word = f' {word} '
+        hashes.update(zlib.crc32(word[i:i + SHINGLE_SIZE].encode()) for i in range(len(word) - SHINGLE_SIZE + 1))
+    return hashes
+
+def minhash(text):
+    """NUM_HASHES 32-bit minima, or None for text without shingles"""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    return [
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes) & 0xFFFFFFFF
+        for a, b in _HASH_PARAMS
+    ]
+
+def encode_signature(signature):
+    return ''.join(f'{value:08x}' for value in signature) if signature else ''
+
+def decode_signature(encoded):
+    if len(encoded) != NUM_HASHES * 8:
+        return None
+    return [int(encoded[i:i + 8], 16) for i in range(0, len(encoded), 8)]
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return sum(a == b for a, b in zip(signature_a, signature_b)) / NUM_HASHES
+
+def ticket_signature(ticket):
+    return minhash(f'{ticket.title} {ticket.description}')
+
+def cluster_location(ticket):
+    """(scope, filter for candidate tickets, cluster fields) or None for tickets without a room"""
+    room = ticket.room
+    if room is None:
+        return None
+    scope = CATEGORY_SCOPES.get(ticket.category, Scope.ROOM)
+    if scope == Scope.HOSTEL:
+        return scope, {'room__hostel_id': room.hostel_id}, {'hostel_id': room.hostel_id}
+    if scope == Scope.FLOOR:
+        return (scope, {'room__hostel_id': room.hostel_id, 'room__floor': room.floor},
+                {'hostel_id': room.hostel_id, 'floor': room.floor})
+    return scope, {'room_id': room.id}, {'hostel_id': room.hostel_id, 'floor': room.floor, 'room_id': room.id}
+
+def assign_ticket_cluster(ticket):
+    """
+    Store the new ticket's signature and join it to the cluster of the most
+    similar open ticket nearby, if any is similar enough. Returns the cluster or None.
+    """
+    signature = ticket_signature(ticket)
+    encoded = encode_signature(signature)
+    location = cluster_location(ticket)
+    if signature is None or location is None:
+        MaintenanceTicket.objects.filter(pk=ticket.pk).update(text_signature=encoded)
+        return None
+    scope, candidate_filter, cluster_fields = location
+
+    candidates = MaintenanceTicket.objects.filter(
+        category=ticket.category, status__in=OPEN_TICKET_STATUSES, **candidate_filter
+    ).exclude(pk=ticket.pk).order_by('-created_at').only(
+        'id', 'cluster_id', 'text_signature', 'title', 'description'
+    )[:MAX_CANDIDATES]
+
+    best, best_similarity = None, SIMILARITY_THRESHOLD
+    backfill = []
+    for candidate in candidates:
+        candidate_signature = decode_signature(candidate.text_signature)
+        if candidate_signature is None:
+            # Tickets from before clustering: sign them once
+            candidate_signature = ticket_signature(candidate)
+            if candidate_signature is None:
+                continue
+            candidate.text_signature = encode_signature(candidate_signature)
+            backfill.append(candidate)
+        score = similarity(signature, candidate_signature)
+        if score >= best_similarity:
+            best, best_similarity = candidate, score
+
+    with transaction.atomic():
+        if backfill:
+            MaintenanceTicket.objects.bulk_update(backfill, ['text_signature'])
+        cluster = None
+        if best is not None:
+            if best.cluster_id:
+                cluster = TicketCluster.objects.get(pk=best.cluster_id)
+                cluster.save(update_fields=['updated_at'])
+            else:
+                cluster = TicketCluster.objects.create(category=ticket.category, scope=scope, **cluster_fields)
+                MaintenanceTicket.objects.filter(pk=best.pk).update(cluster=cluster)
+        MaintenanceTicket.objects.filter(pk=ticket.pk).update(text_signature=encoded, cluster=cluster)
+    ticket.text_signature, ticket.cluster = encoded, cluster
+    return cluster
+
+def resolve_cluster(cluster, changed_by, new_status=Status.RESOLVED, feedback=None):
+    """Apply one status update to every open ticket in a cluster"""
+    from .services import bulk_update_tickets
+    ids = list(cluster.tickets.filter(status__in=OPEN_TICKET_STATUSES).values_list('id', flat=True))
+    return bulk_update_tickets(ids, changed_by, new_status=new_status, feedback=feedback)
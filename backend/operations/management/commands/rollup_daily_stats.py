@@ -0,0 +1,21 @@
+"""
+Management command to roll up daily dashboard statistics.
+Run it from a scheduler (e.g. nightly cron); each run only reads rows added since the last one.
+"""
+from django.core.management.base import BaseCommand
+from operations.services import rollup_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Incrementally roll up StatusHistory, Allocation, ticket and outpass activity into DailyStats'
+
+    def handle(self, *args, **options):
+        result = rollup_daily_stats()
+        self.stdout.write(
+            f"Touched {result['days_touched']} day(s), created {result['days_created']} row(s)"
+        )
+        self.stdout.write(
+            f"Watermarks: history={result['history_watermark']}, "
+            f"allocations={result['allocation_watermark']}"
+        )
+        self.stdout.write(self.style.SUCCESS('Done!'))
@@ -0,0 +1,15 @@
+"""
+Management command to roll up ticket resolution times for SLA reports.
+Run it from a scheduler alongside rollup_daily_stats; each run only reads history added since the last one.
+"""
+from django.core.management.base import BaseCommand
+from operations.analytics import rollup_ticket_sla
+
+
+class Command(BaseCommand):
+    help = 'Incrementally fold ticket StatusHistory into per-ticket durations and daily resolution aggregates'
+
+    def handle(self, *args, **options):
+        result = rollup_ticket_sla()
+        self.stdout.write(f"Processed {result['rows_processed']} history row(s), watermark={result['watermark']}")
+        self.stdout.write(self.style.SUCCESS('Done!'))
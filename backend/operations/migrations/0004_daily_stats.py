@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0003_alter_maintenanceticket_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total_beds', models.IntegerField(default=0)),
+                ('occupied_beds', models.IntegerField(default=0)),
+                ('occupancy_rate', models.FloatField(default=0)),
+                ('allocations_made', models.IntegerField(default=0)),
+                ('tickets_opened', models.IntegerField(default=0)),
+                ('tickets_resolved', models.IntegerField(default=0)),
+                ('outpasses_requested', models.IntegerField(default=0)),
+                ('status_changes', models.IntegerField(default=0)),
+                ('open_tickets', models.IntegerField(default=0)),
+                ('pending_outpasses', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Daily stats',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-19 19:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('housing', '0002_alter_room_options_hostel_address_and_more'),
+        ('operations', '0007_ticket_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='text_signature',
+            field=models.CharField(blank=True, editable=False, max_length=256),
+        ),
+        migrations.CreateModel(
+            name='TicketCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=20)),
+                ('scope', models.CharField(choices=[('ROOM', 'Room'), ('FLOOR', 'Floor'), ('HOSTEL', 'Hostel')], max_length=10)),
+                ('floor', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hostel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ticket_clusters', to='housing.hostel')),
+                ('room', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ticket_clusters', to='housing.room')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='cluster',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tickets', to='operations.ticketcluster'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(fields=['category', 'status'], name='ticket_category_status_idx'),
+        ),
+    ]
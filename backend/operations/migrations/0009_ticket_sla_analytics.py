@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-19 20:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0008_ticket_clusters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDuration',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='duration', serialize=False, to='operations.maintenanceticket')),
+                ('category', models.CharField(max_length=20)),
+                ('hostel', models.CharField(blank=True, max_length=100)),
+                ('assigned_to', models.CharField(blank=True, max_length=100)),
+                ('opened_at', models.DateTimeField()),
+                ('first_response_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('resolution_seconds', models.IntegerField(blank=True, null=True)),
+                ('status_seconds', models.JSONField(default=dict)),
+                ('current_status', models.CharField(blank=True, max_length=20)),
+                ('status_since', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolved_at'], name='ticketduration_resolved_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TicketResolutionDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=20)),
+                ('hostel', models.CharField(blank=True, max_length=100)),
+                ('assigned_to', models.CharField(blank=True, max_length=100)),
+                ('resolved_count', models.IntegerField(default=0)),
+                ('total_resolution_seconds', models.BigIntegerField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('status_seconds', models.JSONField(default=dict)),
+            ],
+            options={
+                'verbose_name_plural': 'Ticket resolution daily stats',
+                'ordering': ['date'],
+                'unique_together': {('date', 'category', 'hostel', 'assigned_to')},
+            },
+        ),
+    ]
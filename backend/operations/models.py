@@ -2,6 +2,28 @@ from django.db import models
 from django.conf import settings
 from housing.models import Room
 
+class TicketCluster(models.Model):
+    """Open tickets reporting the same problem in the same place (see operations.clustering)"""
+    class Scope(models.TextChoices):
+        ROOM = 'ROOM', 'Room'
+        FLOOR = 'FLOOR', 'Floor'
+        HOSTEL = 'HOSTEL', 'Hostel'
+
+    category = models.CharField(max_length=20)
+    scope = models.CharField(max_length=10, choices=Scope.choices)
+    hostel = models.ForeignKey('housing.Hostel', on_delete=models.CASCADE, related_name='ticket_clusters')
+    floor = models.IntegerField(null=True, blank=True)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='ticket_clusters', null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Cluster #{self.id} {self.category} ({self.scope})"
+
 class MaintenanceTicket(models.Model):
     class Status(models.TextChoices):
         OPEN = 'OPEN', 'Open'
@@ -41,12 +63,111 @@ class MaintenanceTicket(models.Model):
     feedback = models.TextField(blank=True, help_text="Response or feedback from maintenance staff")
     assigned_to = models.CharField(max_length=100, blank=True)
     
+    # Duplicate detection: MinHash of title + description, and the cluster it joined
+    text_signature = models.CharField(max_length=256, blank=True, editable=False)
+    cluster = models.ForeignKey(TicketCluster, on_delete=models.SET_NULL, related_name='tickets', null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='ticket_status_created_idx'),
+            models.Index(fields=['student', '-created_at'], name='ticket_student_created_idx'),
+            # Unfiltered lists: keyset pagination on (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='ticket_created_id_idx'),
+            # Triage queue: incremental sync of changed tickets
+            models.Index(fields=['updated_at'], name='ticket_updated_idx'),
+            # Duplicate detection: open tickets of a category near a new one
+            models.Index(fields=['category', 'status'], name='ticket_category_status_idx'),
+        ]
 
     def __str__(self):
         return f"#{self.id} {self.category} - {self.status}"
+
+class DailyStats(models.Model):
+    """Per-day rollup of warden dashboard metrics (see rollup_daily_stats command)"""
+    date = models.DateField(unique=True)
+    
+    # Occupancy snapshot (carried forward on days the rollup did not run)
+    total_beds = models.IntegerField(default=0)
+    occupied_beds = models.IntegerField(default=0)
+    occupancy_rate = models.FloatField(default=0)
+    
+    # Flows: events that happened on this day
+    allocations_made = models.IntegerField(default=0)
+    tickets_opened = models.IntegerField(default=0)
+    tickets_resolved = models.IntegerField(default=0)
+    outpasses_requested = models.IntegerField(default=0)
+    status_changes = models.IntegerField(default=0)
+    
+    # Levels: totals at the end of this day
+    open_tickets = models.IntegerField(default=0)
+    pending_outpasses = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'Daily stats'
+
+    def __str__(self):
+        return f"Stats for {self.date}"
+
+class RollupWatermark(models.Model):
+    """Last source row id processed by an incremental rollup"""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+class TicketDuration(models.Model):
+    """Per-ticket time-in-status, folded from StatusHistory (see operations.analytics)"""
+    ticket = models.OneToOneField(MaintenanceTicket, on_delete=models.CASCADE, primary_key=True, related_name='duration')
+    category = models.CharField(max_length=20)
+    hostel = models.CharField(max_length=100, blank=True)
+    assigned_to = models.CharField(max_length=100, blank=True)
+    
+    opened_at = models.DateTimeField()
+    first_response_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    resolution_seconds = models.IntegerField(null=True, blank=True)
+    
+    # Seconds spent in each status left so far, plus where the ticket is now
+    status_seconds = models.JSONField(default=dict)
+    current_status = models.CharField(max_length=20, blank=True)
+    status_since = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['resolved_at'], name='ticketduration_resolved_idx'),
+        ]
+
+    def __str__(self):
+        return f"Durations for ticket #{self.ticket_id}"
+
+class TicketResolutionDaily(models.Model):
+    """Tickets resolved per day, category, hostel and staff member, with a resolution-time histogram"""
+    date = models.DateField()
+    category = models.CharField(max_length=20)
+    hostel = models.CharField(max_length=100, blank=True)
+    assigned_to = models.CharField(max_length=100, blank=True)
+    
+    resolved_count = models.IntegerField(default=0)
+    total_resolution_seconds = models.BigIntegerField(default=0)
+    # Counts per log-scale bucket of resolution time (see analytics.RESOLUTION_BUCKETS)
+    histogram = models.JSONField(default=list)
+    # Summed seconds in each status for the tickets resolved
+    status_seconds = models.JSONField(default=dict)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ('date', 'category', 'hostel', 'assigned_to')
+        verbose_name_plural = 'Ticket resolution daily stats'
+
+    def __str__(self):
+        return f"{self.date} {self.category} {self.hostel or '-'} {self.assigned_to or '-'}"
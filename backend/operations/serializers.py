@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import MaintenanceTicket
+from .models import MaintenanceTicket, TicketCluster
 from student_requests.models import StatusHistory
+from student_requests.serializers import get_status_history_entries, StatusHistoryListSerializer
 
 class StatusHistorySerializer(serializers.ModelSerializer):
     changed_by_name = serializers.SerializerMethodField()
@@ -16,19 +17,24 @@ class StatusHistorySerializer(serializers.ModelSerializer):
             return obj.changed_by.username
         return 'System'
 
+# Relations MaintenanceTicketSerializer reads; querysets it serializes should select_related these
+TICKET_SERIALIZER_RELATIONS = ('room__hostel', 'student__profile', 'student__allocation__room__hostel')
+
 class MaintenanceTicketSerializer(serializers.ModelSerializer):
     student_name = serializers.SerializerMethodField()
     student_enrollment = serializers.SerializerMethodField()
     room_info = serializers.SerializerMethodField()
     status_history = serializers.SerializerMethodField()
+    status_history_content_type = 'ticket'
     
     class Meta:
         model = MaintenanceTicket
+        list_serializer_class = StatusHistoryListSerializer
         fields = ['id', 'student', 'student_name', 'student_enrollment',
                   'room', 'room_info', 'category', 'priority', 'title', 
-                  'description', 'status', 'feedback', 'assigned_to',
+                  'description', 'status', 'feedback', 'assigned_to', 'cluster',
                   'created_at', 'updated_at', 'resolved_at', 'status_history']
-        read_only_fields = ['student', 'status', 'feedback', 'assigned_to', 
+        read_only_fields = ['student', 'status', 'feedback', 'assigned_to', 'cluster',
                            'created_at', 'updated_at', 'resolved_at']
     
     def get_student_name(self, obj):
@@ -42,29 +48,29 @@ class MaintenanceTicketSerializer(serializers.ModelSerializer):
         return None
     
     def get_room_info(self, obj):
-        if obj.room:
-            return {
-                'id': obj.room.id,
-                'room_number': obj.room.room_number,
-                'hostel': obj.room.hostel.name
-            }
-        # Try to get from student's allocation
-        if hasattr(obj.student, 'allocation'):
-            alloc = obj.student.allocation
-            return {
-                'id': alloc.room.id,
-                'room_number': alloc.room.room_number,
-                'hostel': alloc.room.hostel.name
-            }
-        return None
+        # The ticket's room, else the student's current room
+        room = obj.room
+        if room is None:
+            allocation = getattr(obj.student, 'allocation', None)
+            room = allocation.room if allocation else None
+        if room is None:
+            return None
+        return {
+            'id': room.id,
+            'room_number': room.room_number,
+            'hostel': room.hostel.name
+        }
     
     def get_status_history(self, obj):
-        history = StatusHistory.objects.filter(
-            content_type='ticket',
-            object_id=obj.id
-        )
+        history = get_status_history_entries(obj, self.status_history_content_type)
         return StatusHistorySerializer(history, many=True).data
 
+class MaintenanceTicketListSerializer(MaintenanceTicketSerializer):
+    """Lean list representation; history is only served by the detail view"""
+    class Meta(MaintenanceTicketSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+        fields = [field for field in MaintenanceTicketSerializer.Meta.fields if field != 'status_history']
+
 class MaintenanceTicketCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating tickets"""
     class Meta:
@@ -76,3 +82,32 @@ class MaintenanceTicketUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = MaintenanceTicket
         fields = ['status', 'feedback', 'assigned_to', 'priority']
+
+class ClusterTicketSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MaintenanceTicket
+        fields = ['id', 'title', 'priority', 'status', 'created_at']
+
+class TicketClusterSerializer(serializers.ModelSerializer):
+    """A duplicate cluster as one work item; expects open_tickets prefetched and open_count annotated"""
+    location = serializers.SerializerMethodField()
+    ticket_count = serializers.IntegerField(source='open_count', read_only=True)
+    highest_priority = serializers.SerializerMethodField()
+    tickets = ClusterTicketSerializer(source='open_tickets', many=True, read_only=True)
+    
+    class Meta:
+        model = TicketCluster
+        fields = ['id', 'category', 'scope', 'location', 'ticket_count',
+                  'highest_priority', 'tickets', 'created_at', 'updated_at']
+    
+    def get_location(self, obj):
+        if obj.scope == TicketCluster.Scope.ROOM and obj.room:
+            return f"{obj.hostel.name} - {obj.room.room_number}"
+        if obj.scope == TicketCluster.Scope.FLOOR:
+            return f"{obj.hostel.name} - Floor {obj.floor}"
+        return obj.hostel.name
+    
+    def get_highest_priority(self, obj):
+        order = list(MaintenanceTicket.Priority.values)
+        priorities = [ticket.priority for ticket in obj.open_tickets]
+        return max(priorities, key=order.index) if priorities else None
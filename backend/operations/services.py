@@ -0,0 +1,378 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, F
+from django.utils import timezone
+from datetime import timedelta
+from core.cache import cache_ttl
+from .models import MaintenanceTicket, DailyStats, RollupWatermark
+from student_requests.history import HistoryRecorder
+from student_requests.services import bulk_result
+from users.models import CustomUser
+from housing.models import Room, Hostel, Bed
+from allocation.models import Allocation
+from student_requests.models import (
+    HostelRequest, HostelRequestStatus, SwapRequest, OutPass, RequestStatus, StatusHistory
+)
+
+DASHBOARD_STATS_CACHE_KEY = 'operations:dashboard_stats'
+DASHBOARD_STATS_TTL = 60  # seconds
+
+ACTIVE_TICKET_STATUSES = [MaintenanceTicket.Status.OPEN, MaintenanceTicket.Status.IN_PROGRESS]
+
+def compute_dashboard_stats():
+    """
+    Build the warden dashboard payload with one grouped query per table.
+    Each table is read once using conditional aggregation (Count with filter).
+    """
+    students = CustomUser.objects.filter(role=CustomUser.Role.STUDENT).aggregate(
+        total=Count('id'),
+        profile_complete=Count('id', filter=Q(is_profile_complete=True))
+    )
+    allocated_students = Allocation.objects.count()
+
+    rooms = Room.objects.aggregate(
+        total=Count('id'),
+        available=Count('id', filter=Q(status=Room.Status.AVAILABLE)),
+        full=Count('id', filter=Q(status=Room.Status.FULL)),
+        maintenance=Count('id', filter=Q(status=Room.Status.MAINTENANCE))
+    )
+
+    beds = Bed.objects.aggregate(
+        total=Count('id'),
+        occupied=Count('id', filter=Q(is_occupied=True))
+    )
+    total_beds = beds['total']
+    occupied_beds = beds['occupied']
+
+    # distinct=True so the beds join does not multiply the room count
+    hostels = Hostel.objects.annotate(
+        room_count=Count('rooms', distinct=True),
+        occupied_beds=Count('rooms__beds', filter=Q(rooms__beds__is_occupied=True))
+    ).values('id', 'name', 'gender_type', 'room_count', 'occupied_beds')
+
+    hostel_requests = HostelRequest.objects.aggregate(
+        pending=Count('id', filter=Q(status=HostelRequestStatus.PENDING)),
+        allocated=Count('id', filter=Q(status=HostelRequestStatus.ALLOCATED)),
+        rejected=Count('id', filter=Q(status=HostelRequestStatus.REJECTED))
+    )
+
+    pending_swaps = SwapRequest.objects.filter(
+        status__in=[SwapRequest.SwapStatus.PENDING_B_APPROVAL, SwapRequest.SwapStatus.PENDING_WARDEN]
+    ).count()
+    pending_outpasses = OutPass.objects.filter(status=RequestStatus.PENDING).count()
+
+    # Tickets: one grouped query gives both per-status totals and per-category counts
+    ticket_rows = MaintenanceTicket.objects.filter(
+        status__in=ACTIVE_TICKET_STATUSES
+    ).values('category', 'status').annotate(count=Count('id'))
+
+    open_tickets = 0
+    in_progress_tickets = 0
+    by_category = {}
+    for row in ticket_rows:
+        if row['status'] == MaintenanceTicket.Status.OPEN:
+            open_tickets += row['count']
+        else:
+            in_progress_tickets += row['count']
+        by_category[row['category']] = by_category.get(row['category'], 0) + row['count']
+
+    return {
+        'students': {
+            'total': students['total'],
+            'profile_complete': students['profile_complete'],
+            'allocated': allocated_students,
+            'pending_allocation': hostel_requests['pending']  # Students with pending hostel requests
+        },
+        'rooms': rooms,
+        'beds': {
+            'total': total_beds,
+            'occupied': occupied_beds,
+            'available': total_beds - occupied_beds,
+            'occupancy_rate': round((occupied_beds / total_beds * 100), 1) if total_beds > 0 else 0
+        },
+        'hostels': list(hostels),
+        'requests': {
+            'pending_hostel': hostel_requests['pending'],
+            'allocated_hostel': hostel_requests['allocated'],
+            'rejected_hostel': hostel_requests['rejected'],
+            'pending_swaps': pending_swaps,
+            'pending_outpasses': pending_outpasses
+        },
+        'tickets': {
+            'open': open_tickets,
+            'in_progress': in_progress_tickets,
+            'total_active': open_tickets + in_progress_tickets,
+            'by_category': [
+                {'category': category, 'count': count}
+                for category, count in by_category.items()
+            ]
+        }
+    }
+
+def get_dashboard_stats():
+    """Return cached dashboard stats, recomputing on a miss"""
+    stats = cache.get(DASHBOARD_STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(DASHBOARD_STATS_CACHE_KEY, stats, cache_ttl(DASHBOARD_STATS_TTL))
+    return stats
+
+def invalidate_dashboard_stats():
+    """Drop cached dashboard stats so the next request recomputes them"""
+    cache.delete(DASHBOARD_STATS_CACHE_KEY)
+
+# ================= Daily Stats Rollup =================
+
+HISTORY_WATERMARK = 'daily_stats_history'
+ALLOCATION_WATERMARK = 'daily_stats_allocations'
+ROLLUP_CHUNK_SIZE = 2000
+
+# Ids are assigned at INSERT but rows become visible at COMMIT, so a row can
+# appear after a higher id was already read. Rollups stop at the first row
+# younger than this, assuming no transaction writing them stays open longer.
+ROLLUP_SETTLE_TIME = timedelta(minutes=5)
+
+CLOSED_TICKET_STATUSES = [MaintenanceTicket.Status.RESOLVED, MaintenanceTicket.Status.CLOSED]
+
+def _ticket_is_open(status):
+    # Same definition as the dashboard's open + in-progress total
+    return status in ACTIVE_TICKET_STATUSES
+
+def _outpass_is_pending(status):
+    return status == RequestStatus.PENDING
+
+def _empty_day():
+    return {
+        'allocations_made': 0,
+        'tickets_opened': 0,
+        'tickets_resolved': 0,
+        'outpasses_requested': 0,
+        'status_changes': 0,
+        'open_tickets_delta': 0,
+        'pending_outpasses_delta': 0,
+    }
+
+def _get_watermark(name):
+    """(watermark, created) for an incremental rollup, locked for this transaction"""
+    return RollupWatermark.objects.select_for_update().get_or_create(name=name)
+
+def _initial_levels():
+    """
+    Levels before the first history row: today's counts minus the net change
+    recorded in history, i.e. what was already open or pending when history
+    recording started (or was written without history)
+    """
+    net = StatusHistory.objects.aggregate(
+        tickets_in=Count('id', filter=Q(content_type='ticket', new_status__in=ACTIVE_TICKET_STATUSES)),
+        tickets_out=Count('id', filter=Q(content_type='ticket', old_status__in=ACTIVE_TICKET_STATUSES)),
+        outpasses_in=Count('id', filter=Q(content_type='outpass', new_status=RequestStatus.PENDING)),
+        outpasses_out=Count('id', filter=Q(content_type='outpass', old_status=RequestStatus.PENDING)),
+    )
+    open_tickets = MaintenanceTicket.objects.filter(status__in=ACTIVE_TICKET_STATUSES).count()
+    pending_outpasses = OutPass.objects.filter(status=RequestStatus.PENDING).count()
+    return {
+        'open_tickets': open_tickets - (net['tickets_in'] - net['tickets_out']),
+        'pending_outpasses': pending_outpasses - (net['outpasses_in'] - net['outpasses_out']),
+    }
+
+def _collect_history_deltas(days, after_id, settled_before):
+    """
+    Fold StatusHistory rows with id > after_id into per-day deltas, stopping at
+    the first row created after settled_before. Returns last id folded.
+    """
+    last_id = after_id
+    rows = StatusHistory.objects.filter(id__gt=after_id).order_by('id').values_list(
+        'id', 'content_type', 'old_status', 'new_status', 'created_at'
+    )
+    for row_id, content_type, old_status, new_status, created_at in rows.iterator(chunk_size=ROLLUP_CHUNK_SIZE):
+        if created_at > settled_before:
+            break
+        day = days.setdefault(timezone.localdate(created_at), _empty_day())
+        day['status_changes'] += 1
+        
+        if content_type == 'ticket':
+            if not old_status:
+                day['tickets_opened'] += 1
+            if new_status in CLOSED_TICKET_STATUSES and old_status not in CLOSED_TICKET_STATUSES:
+                day['tickets_resolved'] += 1
+            day['open_tickets_delta'] += _ticket_is_open(new_status) - _ticket_is_open(old_status)
+        elif content_type == 'outpass':
+            if not old_status:
+                day['outpasses_requested'] += 1
+            day['pending_outpasses_delta'] += _outpass_is_pending(new_status) - _outpass_is_pending(old_status)
+        
+        last_id = row_id
+    return last_id
+
+def _collect_allocation_deltas(days, after_id, settled_before):
+    """
+    Count allocations with id > after_id per allocation day, stopping at the
+    first one made after settled_before. Returns last id counted.
+    """
+    last_id = after_id
+    rows = Allocation.objects.filter(id__gt=after_id).order_by('id').values_list('id', 'allocated_at')
+    for row_id, allocated_at in rows.iterator(chunk_size=ROLLUP_CHUNK_SIZE):
+        if allocated_at and allocated_at > settled_before:
+            break
+        if allocated_at:
+            days.setdefault(timezone.localdate(allocated_at), _empty_day())['allocations_made'] += 1
+        last_id = row_id
+    return last_id
+
+LEVEL_FIELDS = ['total_beds', 'occupied_beds', 'occupancy_rate', 'open_tickets', 'pending_outpasses']
+
+def _ensure_days(first_day, last_day, initial_levels=None):
+    """
+    Create missing DailyStats rows in [first_day, last_day], carrying levels
+    forward (from initial_levels when there is no earlier row)
+    """
+    existing = {
+        row['date']: row
+        for row in DailyStats.objects.filter(
+            date__gte=first_day, date__lte=last_day
+        ).values('date', *LEVEL_FIELDS)
+    }
+    
+    previous = DailyStats.objects.filter(date__lt=first_day).order_by('-date').values(*LEVEL_FIELDS).first()
+    carry = previous or {**{field: 0 for field in LEVEL_FIELDS}, **(initial_levels or {})}
+    
+    missing = []
+    day = first_day
+    while day <= last_day:
+        if day in existing:
+            carry = {field: existing[day][field] for field in LEVEL_FIELDS}
+        else:
+            missing.append(DailyStats(date=day, **carry))
+        day += timedelta(days=1)
+    DailyStats.objects.bulk_create(missing)
+    return len(missing)
+
+def rollup_daily_stats():
+    """
+    Incrementally update DailyStats from StatusHistory and Allocation rows
+    created since the last run, then snapshot today's bed occupancy.
+    Only rows past each watermark are read, so runs stay cheap as history grows;
+    rows younger than ROLLUP_SETTLE_TIME are left for the next run.
+    The first run seeds the ticket and outpass levels from current counts.
+    """
+    today = timezone.localdate()
+    settled_before = timezone.now() - ROLLUP_SETTLE_TIME
+    
+    with transaction.atomic():
+        history_mark, first_run = _get_watermark(HISTORY_WATERMARK)
+        allocation_mark, _ = _get_watermark(ALLOCATION_WATERMARK)
+        initial_levels = _initial_levels() if first_run else None
+        
+        days = {}
+        history_last = _collect_history_deltas(days, history_mark.last_id, settled_before)
+        allocation_last = _collect_allocation_deltas(days, allocation_mark.last_id, settled_before)
+        
+        created = _ensure_days(min([today, *days]), max([today, *days]), initial_levels)
+        
+        for date, delta in sorted(days.items()):
+            DailyStats.objects.filter(date=date).update(
+                allocations_made=F('allocations_made') + delta['allocations_made'],
+                tickets_opened=F('tickets_opened') + delta['tickets_opened'],
+                tickets_resolved=F('tickets_resolved') + delta['tickets_resolved'],
+                outpasses_requested=F('outpasses_requested') + delta['outpasses_requested'],
+                status_changes=F('status_changes') + delta['status_changes'],
+            )
+            # Levels change from this day onwards
+            if delta['open_tickets_delta'] or delta['pending_outpasses_delta']:
+                DailyStats.objects.filter(date__gte=date).update(
+                    open_tickets=F('open_tickets') + delta['open_tickets_delta'],
+                    pending_outpasses=F('pending_outpasses') + delta['pending_outpasses_delta'],
+                )
+        
+        beds = Bed.objects.aggregate(
+            total=Count('id'),
+            occupied=Count('id', filter=Q(is_occupied=True))
+        )
+        DailyStats.objects.filter(date=today).update(
+            total_beds=beds['total'],
+            occupied_beds=beds['occupied'],
+            occupancy_rate=round((beds['occupied'] / beds['total'] * 100), 1) if beds['total'] > 0 else 0
+        )
+        
+        history_mark.last_id = history_last
+        history_mark.save()
+        allocation_mark.last_id = allocation_last
+        allocation_mark.save()
+    
+    return {
+        'days_touched': len(days),
+        'days_created': created,
+        'history_watermark': history_last,
+        'allocation_watermark': allocation_last,
+    }
+
+def get_daily_trends(days=30):
+    """Time-series of rolled-up stats for the last `days` days"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(DailyStats.objects.filter(date__gte=since).values(
+        'date', 'total_beds', 'occupied_beds', 'occupancy_rate',
+        'allocations_made', 'tickets_opened', 'tickets_resolved',
+        'outpasses_requested', 'status_changes', 'open_tickets', 'pending_outpasses'
+    ))
+
+# ================= Bulk Ticket Updates =================
+
+def bulk_update_tickets(ids, changed_by, new_status=None, feedback=None, assigned_to=None, priority=None):
+    """
+    Apply the same update to many tickets with set-based UPDATEs.
+    Mirrors MaintenanceTicketUpdateView: status changes to RESOLVED/CLOSED stamp
+    resolved_at, and history is recorded for every ticket that changed.
+    Raises ValueError for an invalid status or priority.
+    """
+    if new_status and new_status not in MaintenanceTicket.Status.values:
+        raise ValueError('Invalid status')
+    if priority and priority not in MaintenanceTicket.Priority.values:
+        raise ValueError('Invalid priority')
+    
+    now = timezone.now()
+    common = {'updated_at': now}
+    common_notes = []
+    if feedback:
+        common['feedback'] = feedback
+        common_notes.append('Feedback added')
+    if assigned_to:
+        common['assigned_to'] = assigned_to
+        common_notes.append(f'Assigned to: {assigned_to}')
+    if priority:
+        common['priority'] = priority
+    
+    with transaction.atomic():
+        current = dict(
+            MaintenanceTicket.objects.select_for_update().filter(id__in=ids).values_list('id', 'status')
+        )
+        errors = {ticket_id: 'Ticket not found' for ticket_id in ids if ticket_id not in current}
+        found = [ticket_id for ticket_id in ids if ticket_id in current]
+        changing = [ticket_id for ticket_id in found if new_status and current[ticket_id] != new_status]
+        
+        MaintenanceTicket.objects.filter(id__in=found).update(**common)
+        if changing:
+            status_update = {'status': new_status}
+            if new_status in CLOSED_TICKET_STATUSES:
+                status_update['resolved_at'] = now
+            MaintenanceTicket.objects.filter(id__in=changing).update(**status_update)
+        
+        changing = set(changing)
+        with HistoryRecorder(changed_by=changed_by) as history:
+            for ticket_id in found:
+                old_status = current[ticket_id]
+                notes_parts = [f'Status: {old_status} → {new_status}'] if ticket_id in changing else []
+                notes_parts += common_notes
+                if notes_parts:
+                    history.record(
+                        'ticket', ticket_id, old_status,
+                        new_status if ticket_id in changing else old_status, '; '.join(notes_parts)
+                    )
+        
+        # update() sends no post_save, so the dashboard cache is dropped here
+        transaction.on_commit(invalidate_dashboard_stats)
+    
+    statuses = {
+        ticket_id: new_status if ticket_id in changing else current[ticket_id]
+        for ticket_id in found
+    }
+    return bulk_result(ids, errors, statuses)
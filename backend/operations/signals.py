@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import MaintenanceTicket
+from .services import invalidate_dashboard_stats
+from users.models import CustomUser
+from housing.models import Room, Bed, Hostel
+from allocation.models import Allocation
+from student_requests.models import HostelRequest, SwapRequest, OutPass
+
+# Models whose writes change the warden dashboard numbers
+DASHBOARD_MODELS = [
+    CustomUser, Allocation, Hostel, Room, Bed,
+    HostelRequest, SwapRequest, OutPass, MaintenanceTicket,
+]
+
+def invalidate_dashboard_on_write(sender, **kwargs):
+    # Defer until commit so a concurrent read cannot re-cache uncommitted state
+    transaction.on_commit(invalidate_dashboard_stats)
+
+for model in DASHBOARD_MODELS:
+    post_save.connect(invalidate_dashboard_on_write, sender=model,
+                      dispatch_uid=f'dashboard_stats_save_{model.__name__}')
+    post_delete.connect(invalidate_dashboard_on_write, sender=model,
+                        dispatch_uid=f'dashboard_stats_delete_{model.__name__}')
+
+def discard_deleted_ticket(sender, instance, **kwargs):
+    # Deletions leave no updated_at for the triage queue's watermark to find
+    from .triage import queue
+    ticket_id = instance.id
+    transaction.on_commit(lambda: queue.discard(ticket_id))
+
+post_delete.connect(discard_deleted_ticket, sender=MaintenanceTicket,
+                    dispatch_uid='ticket_triage_delete')
@@ -1,3 +1,394 @@
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.testing import make_student, make_warden, house_students
+from housing.models import Room
+from student_requests.models import HostelRequest, SwapRequest, OutPass, StatusHistory
+from .models import MaintenanceTicket, DailyStats, TicketDuration, RollupWatermark
+from .services import get_dashboard_stats, rollup_daily_stats, bulk_update_tickets
+from .triage import queue
+from .clustering import minhash, similarity
+from .analytics import rollup_ticket_sla, ticket_sla_report
 
-# Create your tests here.
+
+class DashboardStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [make_student(n) for n in range(1, 5)]
+        house_students(cls.students[:3], per_room=2)  # two rooms, three occupied beds
+        Status = MaintenanceTicket.Status
+        for status in (Status.OPEN, Status.OPEN, Status.IN_PROGRESS, Status.RESOLVED):
+            MaintenanceTicket.objects.create(student=cls.students[0], category='WIFI', description='x', status=status)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_aggregates(self):
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['students']['total'], 4)
+        self.assertEqual(stats['students']['allocated'], 3)
+        self.assertEqual(stats['rooms']['total'], 2)
+        self.assertEqual(stats['beds'], {'total': 3, 'occupied': 3, 'available': 0, 'occupancy_rate': 100.0})
+        self.assertEqual(stats['hostels'][0]['room_count'], 2)  # not inflated by the beds join
+        self.assertEqual(stats['tickets']['open'], 2)
+        self.assertEqual(stats['tickets']['in_progress'], 1)
+        self.assertEqual(stats['tickets']['by_category'], [{'category': 'WIFI', 'count': 3}])
+
+    def test_cached_until_a_write_commits(self):
+        get_dashboard_stats()
+        with CaptureQueriesContext(connection) as ctx:
+            get_dashboard_stats()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MaintenanceTicket.objects.create(student=self.students[1], category='PLUMBING', description='x')
+        self.assertEqual(get_dashboard_stats()['tickets']['open'], 3)
+
+
+class DailyStatsRollupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_student(1)
+        cls.today = timezone.localdate()
+        # Open since before history was recorded: no StatusHistory rows
+        MaintenanceTicket.objects.create(student=cls.student, category='WIFI', description='old')
+
+    def file_ticket(self, days_ago, resolved_after_hours=None):
+        Status = MaintenanceTicket.Status
+        ticket = MaintenanceTicket.objects.create(student=self.student, category='WIFI', description='x')
+        at = timezone.now() - timedelta(days=days_ago)
+        transitions = [('', Status.OPEN, 0)]
+        if resolved_after_hours is not None:
+            ticket.status = Status.RESOLVED
+            ticket.save()
+            transitions.append((Status.OPEN, Status.RESOLVED, resolved_after_hours))
+        for old, new, hours in transitions:
+            entry = StatusHistory.objects.create(content_type='ticket', object_id=ticket.id, old_status=old, new_status=new)
+            StatusHistory.objects.filter(pk=entry.pk).update(created_at=at + timedelta(hours=hours))
+        return ticket
+
+    def level(self, days_ago=0):
+        return DailyStats.objects.get(date=self.today - timedelta(days=days_ago)).open_tickets
+
+    def test_first_run_counts_tickets_open_before_history(self):
+        self.file_ticket(days_ago=3)
+        self.file_ticket(days_ago=2, resolved_after_hours=0)
+
+        rollup_daily_stats()
+        self.assertEqual(self.level(), get_dashboard_stats()['tickets']['total_active'])
+        self.assertEqual(self.level(), 2)
+        self.assertEqual(self.level(days_ago=3), 2)
+        self.assertEqual(DailyStats.objects.get(date=self.today - timedelta(days=2)).tickets_resolved, 1)
+
+    def test_incremental_runs_wait_for_rows_to_settle(self):
+        self.file_ticket(days_ago=3)
+        first = rollup_daily_stats()
+
+        self.file_ticket(days_ago=1)
+        fresh = MaintenanceTicket.objects.create(student=self.student, category='WIFI', description='new')
+        entry = StatusHistory.objects.create(content_type='ticket', object_id=fresh.id, new_status='OPEN')
+
+        second = rollup_daily_stats()
+        self.assertEqual(second['history_watermark'], first['history_watermark'] + 1)
+        self.assertEqual(self.level(days_ago=1), 3)
+        self.assertEqual(self.level(), 3)  # the fresh ticket is not folded yet
+
+        StatusHistory.objects.filter(pk=entry.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(rollup_daily_stats()['history_watermark'], entry.pk)
+        self.assertEqual(self.level(), 4)
+
+
+class BulkTicketUpdateTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        student = make_student(1)
+        cls.tickets = [
+            MaintenanceTicket.objects.create(student=student, category='WIFI', description='x') for _ in range(3)
+        ]
+        MaintenanceTicket.objects.filter(pk=cls.tickets[2].pk).update(status=MaintenanceTicket.Status.RESOLVED)
+
+    def test_updates_found_tickets_and_records_history(self):
+        ids = [ticket.id for ticket in self.tickets] + [999999]
+        result = bulk_update_tickets(
+            ids, self.warden, new_status=MaintenanceTicket.Status.RESOLVED, assigned_to='Nimal'
+        )
+
+        self.assertEqual((result['succeeded'], result['failed']), (3, 1))
+        self.assertEqual(result['results'][3]['error'], 'Ticket not found')
+        tickets = MaintenanceTicket.objects.in_bulk([ticket.id for ticket in self.tickets])
+        self.assertTrue(all(ticket.assigned_to == 'Nimal' for ticket in tickets.values()))
+        self.assertIsNotNone(tickets[self.tickets[0].id].resolved_at)
+        self.assertIsNone(tickets[self.tickets[2].id].resolved_at)  # already resolved: not re-stamped
+
+        history = {row.object_id: row for row in StatusHistory.objects.filter(content_type='ticket')}
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history[self.tickets[0].id].new_status, MaintenanceTicket.Status.RESOLVED)
+        self.assertEqual(history[self.tickets[2].id].notes, 'Assigned to: Nimal')
+
+    def test_invalid_status_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.warden)
+        response = client.post(reverse('ticket-bulk-update'), {
+            'ids': [self.tickets[0].id], 'status': 'DONE'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StatusHistory.objects.exists())
+
+
+class RequestsSummaryQueryCountTest(TestCase):
+    """The warden summary must not issue queries per listed object"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        cls.students = [make_student(n) for n in range(1, 21)]
+        house_students(cls.students)
+        
+        leave = date.today()
+        for i, student in enumerate(cls.students[:10]):
+            objects = [
+                ('hostel_request', HostelRequest.objects.create(student=student)),
+                ('swap_request', SwapRequest.objects.create(
+                    student_a=student, student_b=cls.students[i + 10],
+                    student_b_enrollment=cls.students[i + 10].profile.enrollment_number
+                )),
+                ('outpass', OutPass.objects.create(
+                    student=student, leave_date=leave,
+                    return_date=leave + timedelta(days=2), reason='Home'
+                )),
+                ('ticket', MaintenanceTicket.objects.create(
+                    student=student, category='WIFI', description='No signal'
+                )),
+            ]
+            for content_type, obj in objects:
+                StatusHistory.objects.create(
+                    content_type=content_type, object_id=obj.id,
+                    new_status='PENDING', changed_by=student
+                )
+                StatusHistory.objects.create(
+                    content_type=content_type, object_id=obj.id,
+                    old_status='PENDING', new_status='VIEWED', changed_by=cls.warden
+                )
+
+    def test_summary_query_ceiling(self):
+        client = APIClient()
+        client.force_authenticate(self.warden)
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('requests-summary'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['hostel_requests']), 10)
+        self.assertEqual(len(response.data['swap_requests']), 10)
+        self.assertEqual(len(response.data['outpasses']), 10)
+        self.assertEqual(len(response.data['tickets']), 10)
+        self.assertEqual(len(response.data['tickets'][0]['status_history']), 2)
+        self.assertIsNotNone(response.data['swap_requests'][0]['student_b_room'])
+        # 4 listings + 4 history loads, independent of how many objects are listed
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+
+
+class TicketTriageQueueTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        student = make_student(1)
+        Priority, Category = MaintenanceTicket.Priority, MaintenanceTicket.Category
+        specs = [
+            ('low furniture', Priority.LOW, Category.FURNITURE),    # due in 210h
+            ('urgent electrical', Priority.URGENT, Category.ELECTRICAL),  # due in ~2.7h
+            ('medium wifi', Priority.MEDIUM, Category.WIFI),       # due in 60h
+            ('high plumbing', Priority.HIGH, Category.PLUMBING),   # due in ~18.5h
+        ]
+        cls.tickets = {
+            title: MaintenanceTicket.objects.create(
+                student=student, title=title, priority=priority, category=category, description='Broken'
+            )
+            for title, priority, category in specs
+        }
+        MaintenanceTicket.objects.create(
+            student=student, title='done', category=Category.OTHER, description='x',
+            status=MaintenanceTicket.Status.RESOLVED
+        )
+
+    def setUp(self):
+        queue.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.warden)
+
+    def titles(self, **params):
+        response = self.client.get(reverse('ticket-queue'), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['title'] for row in response.data['results']], response.data
+
+    def test_ranked_by_sla_deadline_and_paginated(self):
+        titles, data = self.titles(page_size=2)
+        self.assertEqual(titles, ['urgent electrical', 'high plumbing'])
+        self.assertEqual(data['count'], 4)
+
+        titles, data = self.titles(page_size=2, cursor=data['next'])
+        self.assertEqual(titles, ['medium wifi', 'low furniture'])
+        self.assertIsNone(data['next'])
+
+    def test_updates_move_tickets_between_queues(self):
+        self.titles()  # loads the queue
+        ticket = self.tickets['high plumbing']
+        response = self.client.patch(reverse('ticket-update', args=[ticket.pk]), {'assigned_to': 'Nimal'})
+        self.assertEqual(response.status_code, 200)
+        self.client.patch(reverse('ticket-update', args=[self.tickets['urgent electrical'].pk]),
+                          {'status': MaintenanceTicket.Status.RESOLVED})
+
+        self.assertEqual(self.titles(assigned_to='Nimal')[0], ['high plumbing'])
+        self.assertEqual(self.titles(assigned_to='')[0], ['medium wifi', 'low furniture'])
+
+
+class TicketClusteringTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        cls.students = [make_student(n) for n in range(1, 5)]
+        rooms = house_students(cls.students, beds=False)
+        Room.objects.filter(pk__in=[room.pk for room in rooms[1::2]]).update(floor=2)
+
+    def file_ticket(self, student, category, title, description):
+        client = APIClient()
+        client.force_authenticate(student)
+        response = client.post(reverse('ticket-create'), {
+            'category': category, 'title': title, 'description': description
+        })
+        self.assertEqual(response.status_code, 201)
+        return MaintenanceTicket.objects.latest('id')
+
+    def test_similar_text_scores_higher(self):
+        wifi = minhash('WiFi down in the whole block since morning')
+        self.assertGreater(similarity(wifi, minhash('wifi is down in whole block since this morning')), 0.5)
+        self.assertLess(similarity(wifi, minhash('Leaking tap in the bathroom')), 0.2)
+
+    def test_hostel_wide_wifi_reports_cluster_and_resolve_together(self):
+        Category = MaintenanceTicket.Category
+        first = self.file_ticket(self.students[0], Category.WIFI, 'WiFi down', 'No internet in the block since morning')
+        second = self.file_ticket(self.students[1], Category.WIFI, 'Wifi down', 'no internet in block since this morning')
+        third = self.file_ticket(self.students[2], Category.WIFI, 'WiFi is down', 'No internet in the block since morning!')
+        other = self.file_ticket(self.students[3], Category.PLUMBING, 'Leaking tap', 'Tap in bathroom leaks')
+
+        for ticket in (first, second, third, other):
+            ticket.refresh_from_db()
+        clusters = {ticket.cluster_id for ticket in (first, second, third)}
+        self.assertEqual(len(clusters), 1)
+        self.assertIsNotNone(clusters.pop())
+        self.assertIsNone(other.cluster_id)
+
+        client = APIClient()
+        client.force_authenticate(self.warden)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('ticket-cluster-list'))
+        self.assertEqual(len(ctx.captured_queries), 2)
+        work_item = response.data['results'][0]
+        self.assertEqual(work_item['ticket_count'], 3)
+        self.assertEqual(work_item['location'], 'Block A')
+
+        response = client.post(reverse('ticket-cluster-resolve', args=[work_item['id']]), {'feedback': 'Router replaced'})
+        self.assertEqual(response.data['succeeded'], 3)
+        self.assertEqual(
+            MaintenanceTicket.objects.filter(status=MaintenanceTicket.Status.RESOLVED).count(), 3
+        )
+
+
+class TicketSLAAnalyticsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        student = make_student(1)
+        cls.start = timezone.now() - timedelta(days=2)
+        Status = MaintenanceTicket.Status
+        # (category, hours until IN_PROGRESS, hours until RESOLVED)
+        for category, respond, resolve in [('WIFI', 1, 4), ('WIFI', 2, 10), ('PLUMBING', 5, 30)]:
+            ticket = MaintenanceTicket.objects.create(student=student, category=category, description='x')
+            for old, new, hours in [('', Status.OPEN, 0), (Status.OPEN, Status.IN_PROGRESS, respond),
+                                    (Status.IN_PROGRESS, Status.RESOLVED, resolve)]:
+                entry = StatusHistory.objects.create(
+                    content_type='ticket', object_id=ticket.id, old_status=old, new_status=new
+                )
+                StatusHistory.objects.filter(pk=entry.pk).update(created_at=cls.start + timedelta(hours=hours))
+
+    def test_rollup_is_incremental_and_reports_percentiles(self):
+        self.assertEqual(rollup_ticket_sla()['rows_processed'], 9)
+        self.assertEqual(rollup_ticket_sla()['rows_processed'], 0)
+
+        report = ticket_sla_report(days=7, group_by='category')
+        self.assertEqual(report['overall']['resolved'], 3)
+        self.assertAlmostEqual(report['overall']['avg_hours'], 14.7, places=1)
+        wifi = next(group for group in report['groups'] if group['category'] == 'WIFI')
+        self.assertEqual(wifi['resolved'], 2)
+        # Bucketed percentiles are within 25% above the true value
+        self.assertTrue(4 <= wifi['p50_hours'] <= 5)
+        self.assertTrue(10 <= wifi['p90_hours'] <= 12.5)
+        self.assertAlmostEqual(wifi['avg_hours_in_status']['OPEN'], 1.5, places=1)
+
+    def test_resolution_is_credited_to_staff_assigned_after_first_rollup(self):
+        Status = MaintenanceTicket.Status
+        student = make_student(2)
+        room, = house_students([student])
+        ticket = MaintenanceTicket.objects.create(student=student, room=room, category='ELECTRICAL', description='x')
+
+        def record(old, new, hours_ago):
+            entry = StatusHistory.objects.create(content_type='ticket', object_id=ticket.id, old_status=old, new_status=new)
+            StatusHistory.objects.filter(pk=entry.pk).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+            return entry
+
+        record('', Status.OPEN, 3)
+        self.assertEqual(rollup_ticket_sla()['rows_processed'], 10)
+
+        MaintenanceTicket.objects.filter(pk=ticket.pk).update(assigned_to='Sunil', status=Status.RESOLVED)
+        record(Status.OPEN, Status.RESOLVED, 1)
+        fresh = StatusHistory.objects.create(content_type='ticket', object_id=ticket.id,
+                                             old_status=Status.RESOLVED, new_status=Status.OPEN)
+        self.assertEqual(rollup_ticket_sla()['rows_processed'], 1)  # the fresh reopen waits to settle
+
+        report = ticket_sla_report(days=7, group_by='assigned_to')
+        sunil = next(group for group in report['groups'] if group['assigned_to'] == 'Sunil')
+        self.assertEqual(sunil['resolved'], 1)
+        duration = TicketDuration.objects.get(ticket=ticket)
+        self.assertEqual((duration.hostel, duration.assigned_to), ('Block A', 'Sunil'))
+        self.assertEqual(duration.current_status, Status.RESOLVED)
+        self.assertLess(RollupWatermark.objects.get(name='ticket_sla_history').last_id, fresh.pk)
+
+
+class MaintenanceTicketQueryCountTest(TestCase):
+    """Ticket list/detail serialize room, hostel, student and profile from one joined query"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        students = [make_student(n) for n in range(1, 101)]
+        rooms = house_students(students, beds=False)
+        # Half the tickets have no room and fall back to the student's allocation
+        cls.tickets = [
+            MaintenanceTicket.objects.create(
+                student=student, room=room if n % 2 else None, category='WIFI', description='x'
+            )
+            for n, (student, room) in enumerate(zip(students, rooms), start=1)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.warden)
+
+    def test_list_page_of_100_is_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('ticket-list'), {'page_size': 100})
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertTrue(all(row['room_info']['hostel'] == 'Block A' for row in response.data['results']))
+        self.assertTrue(all(row['student_enrollment'] for row in response.data['results']))
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_detail_is_ticket_plus_history(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('ticket-detail', args=[self.tickets[1].pk]))
+        self.assertEqual(response.data['room_info']['hostel'], 'Block A')
+        self.assertEqual(len(ctx.captured_queries), 2)
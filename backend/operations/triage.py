@@ -0,0 +1,200 @@
+"""
+Maintenance ticket triage queue.
+
+Each workable ticket gets an SLA deadline: created_at plus its priority's
+SLA target, shortened for categories that hurt more while broken. Ranking by
+deadline is equivalent to ranking by the share of SLA used (weighted by
+category) at any moment, but unlike that score it does not change as time
+passes, so the order only changes when a ticket does.
+
+Tickets are kept in memory in lists sorted by (deadline, id), one per
+assigned_to value plus a global one, so inserts, removals and cursor seeks are
+binary searches rather than a sort of the whole table per request. The queue
+syncs incrementally from tickets changed since the last updated_at watermark,
+like the outpass presence ledger.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.utils import timezone
+from .models import MaintenanceTicket
+
+Status = MaintenanceTicket.Status
+Priority = MaintenanceTicket.Priority
+Category = MaintenanceTicket.Category
+
+# Tickets someone can work on now (WAITING_PARTS is blocked on delivery)
+TRIAGE_STATUSES = [Status.OPEN, Status.VIEWED, Status.IN_PROGRESS]
+
+SLA_HOURS = {
+    Priority.URGENT: 4,
+    Priority.HIGH: 24,
+    Priority.MEDIUM: 72,
+    Priority.LOW: 168,
+}
+
+# >1 shortens the SLA for categories that affect safety or basic living
+CATEGORY_WEIGHTS = {
+    Category.ELECTRICAL: 1.5,
+    Category.DOOR_LOCK: 1.5,
+    Category.PLUMBING: 1.3,
+    Category.WIFI: 1.2,
+    Category.AC_FAN: 1.0,
+    Category.CLEANING: 1.0,
+    Category.FURNITURE: 0.8,
+    Category.OTHER: 1.0,
+}
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+FULL_RELOAD_INTERVAL = 10 * 60  # seconds
+WATERMARK_SLACK = timedelta(minutes=1)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+TriageEntry = namedtuple('TriageEntry', [
+    'ticket_id', 'title', 'category', 'priority', 'status', 'assigned_to',
+    'hostel', 'room', 'created_at', 'due_at',
+])
+
+TRIAGE_FIELDS = (
+    'id', 'title', 'category', 'priority', 'status', 'assigned_to',
+    'room__hostel__name', 'room__room_number', 'created_at',
+)
+
+def sla_hours(priority, category):
+    """Effective SLA target in hours for a ticket"""
+    return SLA_HOURS.get(priority, SLA_HOURS[Priority.MEDIUM]) / CATEGORY_WEIGHTS.get(category, 1.0)
+
+def make_entry(row):
+    ticket_id, title, category, priority, ticket_status, assigned_to, hostel, room, created_at = row
+    due_at = created_at + timedelta(hours=sla_hours(priority, category))
+    return TriageEntry(ticket_id, title, category, priority, ticket_status, assigned_to,
+                       hostel, room, created_at, due_at)
+
+def sort_key(entry):
+    return (entry.due_at, entry.ticket_id)
+
+class TriageQueue:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.queues = {}  # assigned_to -> sorted [(due_at, ticket id)]
+        self.all = []
+        self.watermark = None
+        self.loaded_at = None
+
+    def _insert(self, entry):
+        key = sort_key(entry)
+        insort(self.all, key)
+        insort(self.queues.setdefault(entry.assigned_to, []), key)
+        self.entries[entry.ticket_id] = entry
+
+    def _remove(self, ticket_id):
+        entry = self.entries.pop(ticket_id, None)
+        if entry is None:
+            return
+        key = sort_key(entry)
+        for keys in (self.all, self.queues[entry.assigned_to]):
+            index = bisect_left(keys, key)
+            if index < len(keys) and keys[index] == key:
+                del keys[index]
+
+    def _apply(self, ticket_id, entry):
+        if self.entries.get(ticket_id) == entry:
+            return
+        self._remove(ticket_id)
+        if entry is not None:
+            self._insert(entry)
+
+    def _full_reload(self):
+        self.watermark = timezone.now()
+        entries = [make_entry(row) for row in MaintenanceTicket.objects.filter(
+            status__in=TRIAGE_STATUSES
+        ).values_list(*TRIAGE_FIELDS)]
+        self.entries = {entry.ticket_id: entry for entry in entries}
+        self.all = sorted(sort_key(entry) for entry in entries)
+        self.queues = {}
+        for entry in entries:
+            self.queues.setdefault(entry.assigned_to, []).append(sort_key(entry))
+        for keys in self.queues.values():
+            keys.sort()
+        self.loaded_at = time.monotonic()
+
+    def _sync(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > FULL_RELOAD_INTERVAL:
+            self._full_reload()
+            return
+
+        since = self.watermark - WATERMARK_SLACK
+        self.watermark = timezone.now()
+        changed = MaintenanceTicket.objects.filter(updated_at__gte=since)
+        for ticket_id in changed.exclude(status__in=TRIAGE_STATUSES).values_list('id', flat=True):
+            self._apply(ticket_id, None)
+        for row in changed.filter(status__in=TRIAGE_STATUSES).values_list(*TRIAGE_FIELDS):
+            self._apply(row[0], make_entry(row))
+
+    def reset(self):
+        """Forget everything; the next query reloads from the database"""
+        with self.lock:
+            self.loaded_at = None
+
+    def discard(self, ticket_id):
+        """Drop a ticket (e.g. on delete, which the updated_at watermark cannot see)"""
+        with self.lock:
+            if self.loaded_at is not None:
+                self._remove(ticket_id)
+
+    def page(self, assigned_to=None, after=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Up to `limit` entries in deadline order, starting after the (due_at, id)
+        cursor. assigned_to=None is the whole queue; '' is unassigned tickets.
+        Returns (entries, total in that queue, has more).
+        """
+        with self.lock:
+            self._sync()
+            keys = self.all if assigned_to is None else self.queues.get(assigned_to, [])
+            start = bisect_right(keys, after) if after else 0
+            window = keys[start:start + limit]
+            return [self.entries[ticket_id] for _, ticket_id in window], len(keys), start + limit < len(keys)
+
+queue = TriageQueue()
+
+def encode_cursor(entry):
+    # Exact microseconds, so the cursor round-trips to the same sort key
+    return f'{(entry.due_at - EPOCH) // timedelta(microseconds=1)}_{entry.ticket_id}'
+
+def decode_cursor(cursor):
+    """(due_at, ticket id) from encode_cursor's output; ValueError if malformed"""
+    micros, ticket_id = cursor.split('_')
+    return (EPOCH + timedelta(microseconds=int(micros)), int(ticket_id))
+
+def entry_data(entry, now):
+    hours = sla_hours(entry.priority, entry.category)
+    return {
+        'id': entry.ticket_id,
+        'title': entry.title,
+        'category': entry.category,
+        'priority': entry.priority,
+        'status': entry.status,
+        'assigned_to': entry.assigned_to,
+        'room': f"{entry.hostel} - {entry.room}" if entry.hostel else None,
+        'created_at': entry.created_at,
+        'due_at': entry.due_at,
+        'sla_hours': round(hours, 1),
+        'sla_used': round((now - entry.created_at).total_seconds() / 3600 / hours, 2),
+        'overdue': now > entry.due_at,
+    }
+
+def next_work(assigned_to=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """A page of the triage queue, most urgent first; raises ValueError for a bad cursor"""
+    after = decode_cursor(cursor) if cursor else None
+    entries, total, has_more = queue.page(assigned_to, after, page_size)
+    now = timezone.now()
+    return {
+        'assigned_to': assigned_to,
+        'count': total,
+        'next': encode_cursor(entries[-1]) if has_more and entries else None,
+        'results': [entry_data(entry, now) for entry in entries],
+    }
@@ -1,8 +1,9 @@
 from django.urls import path
 from .views import (
     MaintenanceTicketCreateView, MaintenanceTicketListView,
-    MaintenanceTicketDetailView, MaintenanceTicketUpdateView,
-    DashboardStatsView, RequestsSummaryView
+    MaintenanceTicketDetailView, MaintenanceTicketUpdateView, MaintenanceTicketBulkUpdateView,
+    MaintenanceTicketQueueView, TicketClusterListView, TicketClusterResolveView,
+    DashboardStatsView, DashboardTrendsView, TicketSLAReportView, RequestsSummaryView
 )
 
 urlpatterns = [
@@ -11,8 +12,14 @@ urlpatterns = [
     path('ticket/list/', MaintenanceTicketListView.as_view(), name='ticket-list'),
     path('ticket/<int:pk>/', MaintenanceTicketDetailView.as_view(), name='ticket-detail'),
     path('ticket/<int:pk>/update/', MaintenanceTicketUpdateView.as_view(), name='ticket-update'),
+    path('ticket/bulk/update/', MaintenanceTicketBulkUpdateView.as_view(), name='ticket-bulk-update'),
+    path('ticket/queue/', MaintenanceTicketQueueView.as_view(), name='ticket-queue'),
+    path('ticket/clusters/', TicketClusterListView.as_view(), name='ticket-cluster-list'),
+    path('ticket/clusters/<int:pk>/resolve/', TicketClusterResolveView.as_view(), name='ticket-cluster-resolve'),
     
     # Dashboard
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('dashboard/trends/', DashboardTrendsView.as_view(), name='dashboard-trends'),
+    path('dashboard/ticket-sla/', TicketSLAReportView.as_view(), name='ticket-sla-report'),
     path('dashboard/requests/', RequestsSummaryView.as_view(), name='requests-summary'),
 ]
@@ -1,27 +1,16 @@
 from rest_framework import generics, permissions, views, status
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Count, Q
-from .models import MaintenanceTicket
+from .models import MaintenanceTicket, TicketCluster
 from .serializers import (
-    MaintenanceTicketSerializer, MaintenanceTicketCreateSerializer,
-    MaintenanceTicketUpdateSerializer
+    MaintenanceTicketSerializer, MaintenanceTicketListSerializer,
+    MaintenanceTicketCreateSerializer, MaintenanceTicketUpdateSerializer,
+    TicketClusterSerializer, TICKET_SERIALIZER_RELATIONS
 )
-from users.models import CustomUser
-from housing.models import Room, Hostel, Bed
-from allocation.models import Allocation
-from student_requests.models import HostelRequest, SwapRequest, OutPass, StatusHistory, RequestStatus
-
-def create_status_history(object_id, old_status, new_status, user, notes=''):
-    """Utility to create status history for tickets"""
-    StatusHistory.objects.create(
-        content_type='ticket',
-        object_id=object_id,
-        old_status=old_status,
-        new_status=new_status,
-        changed_by=user,
-        notes=notes
-    )
+from .services import get_dashboard_stats, get_daily_trends
+from student_requests.models import HostelRequest, SwapRequest, OutPass, RequestStatus
+from student_requests.history import create_status_history
+from student_requests.pagination import CreatedAtCursorPagination
 
 class IsOwnerOrWarden(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -44,18 +33,23 @@ class MaintenanceTicketCreateView(generics.CreateAPIView):
         
         ticket = serializer.save(student=self.request.user, room=room)
         create_status_history(
-            ticket.id, '', MaintenanceTicket.Status.OPEN,
+            'ticket', ticket.id, '', MaintenanceTicket.Status.OPEN,
             self.request.user, 'Ticket created'
         )
+        
+        # Group with near-identical open reports from the same place
+        from .clustering import assign_ticket_cluster
+        assign_ticket_cluster(ticket)
 
 class MaintenanceTicketListView(generics.ListAPIView):
-    """List maintenance tickets"""
-    serializer_class = MaintenanceTicketSerializer
+    """List maintenance tickets (cursor-paginated, without history)"""
+    serializer_class = MaintenanceTicketListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         user = self.request.user
-        queryset = MaintenanceTicket.objects.all()
+        queryset = MaintenanceTicket.objects.select_related(*TICKET_SERIALIZER_RELATIONS)
         
         if not (user.role == 'WARDEN' or user.is_staff):
             queryset = queryset.filter(student=user)
@@ -81,7 +75,7 @@ class MaintenanceTicketDetailView(generics.RetrieveAPIView):
     """View ticket details"""
     serializer_class = MaintenanceTicketSerializer
     permission_classes = [IsOwnerOrWarden]
-    queryset = MaintenanceTicket.objects.all()
+    queryset = MaintenanceTicket.objects.select_related(*TICKET_SERIALIZER_RELATIONS)
 
 class MaintenanceTicketUpdateView(views.APIView):
     """Warden updates ticket status/feedback"""
@@ -123,7 +117,7 @@ class MaintenanceTicketUpdateView(views.APIView):
             
             if notes_parts:
                 create_status_history(
-                    pk, old_status, ticket.status, 
+                    'ticket', pk, old_status, ticket.status, 
                     request.user, '; '.join(notes_parts)
                 )
             
@@ -134,96 +128,136 @@ class MaintenanceTicketUpdateView(views.APIView):
         except MaintenanceTicket.DoesNotExist:
             return Response({'error': 'Ticket not found'}, status=status.HTTP_404_NOT_FOUND)
 
-# ================= Dashboard Stats View =================
-
-class DashboardStatsView(views.APIView):
-    """Comprehensive dashboard statistics for warden"""
+class MaintenanceTicketBulkUpdateView(views.APIView):
+    """Warden/Staff updates many tickets at once: {ids, status, feedback, assigned_to, priority}"""
     permission_classes = [permissions.IsAdminUser]
-
-    def get(self, request):
-        from student_requests.models import HostelRequestStatus
-        
-        # Student stats
-        total_students = CustomUser.objects.filter(role=CustomUser.Role.STUDENT).count()
-        profile_complete = CustomUser.objects.filter(
-            role=CustomUser.Role.STUDENT, 
-            is_profile_complete=True
-        ).count()
-        allocated_students = Allocation.objects.count()
-        
-        # Count students with pending hostel requests
-        pending_hostel = HostelRequest.objects.filter(status=HostelRequestStatus.PENDING).count()
-        
-        # Room stats
-        total_rooms = Room.objects.count()
-        available_rooms = Room.objects.filter(status=Room.Status.AVAILABLE).count()
-        full_rooms = Room.objects.filter(status=Room.Status.FULL).count()
-        maintenance_rooms = Room.objects.filter(status=Room.Status.MAINTENANCE).count()
-        
-        # Bed stats
-        total_beds = Bed.objects.count()
-        occupied_beds = Bed.objects.filter(is_occupied=True).count()
+    
+    def post(self, request):
+        from student_requests.services import clean_bulk_ids
+        from .services import bulk_update_tickets
         
-        # Hostel stats
-        hostels = Hostel.objects.annotate(
-            room_count=Count('rooms'),
-            occupied_beds=Count('rooms__beds', filter=Q(rooms__beds__is_occupied=True))
-        ).values('id', 'name', 'gender_type', 'room_count', 'occupied_beds')
+        try:
+            ids = clean_bulk_ids(request.data.get('ids'))
+            result = bulk_update_tickets(
+                ids, request.user,
+                new_status=request.data.get('status'),
+                feedback=request.data.get('feedback'),
+                assigned_to=request.data.get('assigned_to'),
+                priority=request.data.get('priority')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Request stats (using correct status enums)
-        pending_hostel_requests = HostelRequest.objects.filter(status=HostelRequestStatus.PENDING).count()
-        allocated_hostel_requests = HostelRequest.objects.filter(status=HostelRequestStatus.ALLOCATED).count()
-        rejected_hostel_requests = HostelRequest.objects.filter(status=HostelRequestStatus.REJECTED).count()
+        return Response(result)
+
+class MaintenanceTicketQueueView(views.APIView):
+    """
+    Triage queue: workable tickets, most urgent (earliest SLA deadline) first.
+    ?assigned_to= limits to one staff member ('' for unassigned); ?cursor= and
+    ?page_size= page through it.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        from .triage import next_work, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
         
-        pending_swaps = SwapRequest.objects.filter(
-            status__in=[SwapRequest.SwapStatus.PENDING_B_APPROVAL, SwapRequest.SwapStatus.PENDING_WARDEN]
-        ).count()
-        pending_outpasses = OutPass.objects.filter(status=RequestStatus.PENDING).count()
+        try:
+            page_size = min(max(int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            return Response(next_work(
+                assigned_to=request.query_params.get('assigned_to'),
+                cursor=request.query_params.get('cursor'),
+                page_size=page_size
+            ))
+        except ValueError:
+            return Response({'error': 'Invalid cursor or page_size'}, status=status.HTTP_400_BAD_REQUEST)
+
+class TicketClusterListView(generics.ListAPIView):
+    """Duplicate clusters with two or more open tickets, each as one work item"""
+    serializer_class = TicketClusterSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = CreatedAtCursorPagination
+    
+    def get_queryset(self):
+        from django.db.models import Count, Prefetch, Q
+        from .clustering import OPEN_TICKET_STATUSES
         
-        # Ticket stats
-        open_tickets = MaintenanceTicket.objects.filter(status=MaintenanceTicket.Status.OPEN).count()
-        in_progress_tickets = MaintenanceTicket.objects.filter(status=MaintenanceTicket.Status.IN_PROGRESS).count()
+        queryset = TicketCluster.objects.select_related('hostel', 'room').annotate(
+            open_count=Count('tickets', filter=Q(tickets__status__in=OPEN_TICKET_STATUSES))
+        ).filter(open_count__gte=2).prefetch_related(Prefetch(
+            'tickets',
+            queryset=MaintenanceTicket.objects.filter(status__in=OPEN_TICKET_STATUSES).order_by('created_at'),
+            to_attr='open_tickets'
+        ))
+        category = self.request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset
+
+class TicketClusterResolveView(views.APIView):
+    """Update every open ticket in a cluster at once: {status (default RESOLVED), feedback}"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def post(self, request, pk):
+        from .clustering import resolve_cluster
         
-        # Tickets by category
-        tickets_by_category = MaintenanceTicket.objects.filter(
-            status__in=[MaintenanceTicket.Status.OPEN, MaintenanceTicket.Status.IN_PROGRESS]
-        ).values('category').annotate(count=Count('id'))
+        try:
+            cluster = TicketCluster.objects.get(pk=pk)
+        except TicketCluster.DoesNotExist:
+            return Response({'error': 'Cluster not found'}, status=status.HTTP_404_NOT_FOUND)
         
+        try:
+            result = resolve_cluster(
+                cluster, request.user,
+                new_status=request.data.get('status') or MaintenanceTicket.Status.RESOLVED,
+                feedback=request.data.get('feedback')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+# ================= Dashboard Stats View =================
+
+class DashboardStatsView(views.APIView):
+    """Comprehensive dashboard statistics for warden"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_dashboard_stats())
+
+class DashboardTrendsView(views.APIView):
+    """Daily time-series for warden trend charts, served from the DailyStats rollup"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        days = max(1, min(days, 366))
         return Response({
-            'students': {
-                'total': total_students,
-                'profile_complete': profile_complete,
-                'allocated': allocated_students,
-                'pending_allocation': pending_hostel  # Students with pending hostel requests
-            },
-            'rooms': {
-                'total': total_rooms,
-                'available': available_rooms,
-                'full': full_rooms,
-                'maintenance': maintenance_rooms
-            },
-            'beds': {
-                'total': total_beds,
-                'occupied': occupied_beds,
-                'available': total_beds - occupied_beds,
-                'occupancy_rate': round((occupied_beds / total_beds * 100), 1) if total_beds > 0 else 0
-            },
-            'hostels': list(hostels),
-            'requests': {
-                'pending_hostel': pending_hostel_requests,
-                'allocated_hostel': allocated_hostel_requests,
-                'rejected_hostel': rejected_hostel_requests,
-                'pending_swaps': pending_swaps,
-                'pending_outpasses': pending_outpasses
-            },
-            'tickets': {
-                'open': open_tickets,
-                'in_progress': in_progress_tickets,
-                'total_active': open_tickets + in_progress_tickets,
-                'by_category': list(tickets_by_category)
-            }
+            'days': days,
+            'series': get_daily_trends(days)
         })
 
+class TicketSLAReportView(views.APIView):
+    """Ticket resolution times (avg, p50, p90, time in status) from the SLA rollup"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        from .analytics import ticket_sla_report, GROUP_FIELDS
+        
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        group_by = request.query_params.get('group_by') or None
+        if group_by and group_by not in GROUP_FIELDS:
+            return Response(
+                {'error': f"group_by must be one of {', '.join(GROUP_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(ticket_sla_report(max(1, min(days, 366)), group_by))
+
 class RequestsSummaryView(views.APIView):
     """Summary of all pending requests for warden"""
     permission_classes = [permissions.IsAdminUser]
@@ -234,25 +268,30 @@ class RequestsSummaryView(views.APIView):
         )
         from student_requests.models import HostelRequestStatus
         
+        # Everything the serializers' method fields touch is joined up front;
+        # the list serializers load histories with one query per request type.
         # Recent pending hostel requests
         hostel_requests = HostelRequest.objects.filter(
             status=HostelRequestStatus.PENDING
-        ).order_by('-created_at')[:10]
+        ).select_related('student__profile').order_by('-created_at')[:10]
         
         # Pending swaps (both stages)
         swaps = SwapRequest.objects.filter(
             status__in=[SwapRequest.SwapStatus.PENDING_B_APPROVAL, SwapRequest.SwapStatus.PENDING_WARDEN]
+        ).select_related(
+            'student_a__profile', 'student_a__allocation__room__hostel',
+            'student_b__profile', 'student_b__allocation__room__hostel'
         ).order_by('-created_at')[:10]
         
         # Pending outpasses
         outpasses = OutPass.objects.filter(
             status=RequestStatus.PENDING
-        ).order_by('-created_at')[:10]
+        ).select_related('student__profile').order_by('-created_at')[:10]
         
         # Recent tickets
         tickets = MaintenanceTicket.objects.filter(
             status__in=[MaintenanceTicket.Status.OPEN, MaintenanceTicket.Status.IN_PROGRESS]
-        ).order_by('-created_at')[:10]
+        ).select_related(*TICKET_SERIALIZER_RELATIONS).order_by('-created_at')[:10]
         
         return Response({
             'hostel_requests': HostelRequestSerializer(hostel_requests, many=True).data,
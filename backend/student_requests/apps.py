@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class StudentRequestsConfig(AppConfig):
     name = 'student_requests'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
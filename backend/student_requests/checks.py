@@ -0,0 +1,29 @@
+"""
+System checks for settings the outpass workflow depends on.
+"""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from django.core.exceptions import ImproperlyConfigured
+
+
+@register()
+def check_outpass_token_key(app_configs, **kwargs):
+    """Outpass approvals sign a token, so they are refused without a usable key"""
+    from .verification import load_signing_key
+
+    encoded = settings.OUTPASS_TOKEN_PRIVATE_KEY
+    if not encoded:
+        return [Warning(
+            'OUTPASS_TOKEN_PRIVATE_KEY is not set; outpass approvals and token verification will return 503.',
+            hint='Generate one with: python manage.py outpass_token_keys --generate',
+            id='student_requests.W001',
+        )]
+    try:
+        load_signing_key(encoded)
+    except ImproperlyConfigured as e:
+        return [Error(
+            str(e),
+            hint='Generate one with: python manage.py outpass_token_keys --generate',
+            id='student_requests.E001',
+        )]
+    return []
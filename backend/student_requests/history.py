@@ -0,0 +1,70 @@
+"""
+Status history writers.
+
+HistoryRecorder buffers transitions and writes them with bulk_create, so bulk
+operations (allocation, resets, warden bulk actions) record every transition
+without a round-trip per row. create_status_history is the one-off form used by
+single-object views.
+"""
+from .models import StatusHistory
+
+HISTORY_BATCH_SIZE = 1000
+
+
+class HistoryRecorder:
+    """
+    Collect status transitions and flush them with bulk_create.
+
+    Use as a context manager inside the transaction that makes the changes:
+    rows are written when the block exits cleanly (and whenever batch_size rows
+    are buffered); if the block raises, buffered rows are discarded.
+
+        with HistoryRecorder(changed_by=request.user) as history:
+            history.record('outpass', outpass.id, old_status, new_status)
+    """
+
+    def __init__(self, changed_by=None, batch_size=HISTORY_BATCH_SIZE):
+        self.changed_by = changed_by
+        self.batch_size = batch_size
+        self.pending = []
+        self.written = 0
+
+    def record(self, content_type, object_id, old_status, new_status, notes='', changed_by=None):
+        self.pending.append(StatusHistory(
+            content_type=content_type,
+            object_id=object_id,
+            old_status=old_status or '',
+            new_status=new_status,
+            changed_by=changed_by or self.changed_by,
+            notes=notes
+        ))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def record_many(self, content_type, object_ids, old_status, new_status, notes='', changed_by=None):
+        """Record the same transition for many objects"""
+        for object_id in object_ids:
+            self.record(content_type, object_id, old_status, new_status, notes, changed_by)
+
+    def flush(self):
+        if self.pending:
+            StatusHistory.objects.bulk_create(self.pending, batch_size=self.batch_size)
+            self.written += len(self.pending)
+            self.pending = []
+        return self.written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.pending = []
+        return False
+
+
+def create_status_history(content_type, object_id, old_status, new_status, user, notes=''):
+    """Utility to create status history entry"""
+    with HistoryRecorder(changed_by=user) as history:
+        history.record(content_type, object_id, old_status, new_status, notes)
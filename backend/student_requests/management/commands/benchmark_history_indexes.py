@@ -0,0 +1,141 @@
+"""
+Management command to benchmark the hot-filter indexes on requests, tickets and status history.
+
+Seeds synthetic StatusHistory rows, then times each hot query and prints its
+query plan twice: once with the composite indexes dropped ("before") and once
+with them in place ("after"). Seeded rows are removed at the end unless --keep is given.
+Do not run this against production.
+"""
+import random
+import time
+from contextlib import contextmanager
+from django.core.management.base import BaseCommand
+from django.db import connection
+from student_requests.models import (
+    HostelRequest, HostelRequestStatus, SwapRequest, OutPass, StatusHistory, RequestStatus
+)
+from operations.models import MaintenanceTicket
+
+BENCHMARK_NOTE = '__benchmark__'
+INDEXED_MODELS = [StatusHistory, HostelRequest, SwapRequest, OutPass, MaintenanceTicket]
+
+
+class Command(BaseCommand):
+    help = 'Seed StatusHistory rows and report query plans and latencies with and without the hot-filter indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='History rows to seed')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per query when timing')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows afterwards')
+
+    def handle(self, *args, **options):
+        self.seed_history(options['rows'], options['batch_size'])
+
+        try:
+            self.stdout.write(self.style.MIGRATE_HEADING('\nBefore (composite indexes dropped)'))
+            with self.indexes_dropped():
+                before = self.run_queries(options['repeat'])
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\nAfter (composite indexes present)'))
+            after = self.run_queries(options['repeat'])
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (avg ms)'))
+            for name in before:
+                speedup = before[name] / after[name] if after[name] else float('inf')
+                self.stdout.write(f"{name:<32} {before[name]:>9.2f} -> {after[name]:>9.2f}  ({speedup:.1f}x)")
+        finally:
+            if not options['keep']:
+                deleted, _ = StatusHistory.objects.filter(notes=BENCHMARK_NOTE).delete()
+                self.stdout.write(f"\nRemoved {deleted} seeded rows")
+
+        self.stdout.write(self.style.SUCCESS('Done!'))
+
+    def seed_history(self, rows, batch_size):
+        content_types = [choice for choice, _ in StatusHistory.CONTENT_TYPES]
+        statuses = [RequestStatus.PENDING, RequestStatus.VIEWED, RequestStatus.APPROVED, RequestStatus.REJECTED]
+        max_object_id = max(rows // 5, 1)  # ~5 transitions per object
+
+        self.stdout.write(f"Seeding {rows} StatusHistory rows...")
+        started = time.perf_counter()
+        created = 0
+        while created < rows:
+            size = min(batch_size, rows - created)
+            StatusHistory.objects.bulk_create([
+                StatusHistory(
+                    content_type=random.choice(content_types),
+                    object_id=random.randint(1, max_object_id),
+                    old_status=random.choice(statuses),
+                    new_status=random.choice(statuses),
+                    notes=BENCHMARK_NOTE
+                )
+                for _ in range(size)
+            ])
+            created += size
+            self.stdout.write(f"  {created}/{rows}", ending='\r')
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"\nSeeded in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)")
+
+        # Refresh planner statistics so the plans reflect the new table size
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ANALYZE TABLE {StatusHistory._meta.db_table}')
+            else:
+                cursor.execute(f'ANALYZE {StatusHistory._meta.db_table}')
+
+    def hot_queries(self):
+        """The filters the views actually issue, keyed by a display name"""
+        history_target = StatusHistory.objects.filter(notes=BENCHMARK_NOTE).values_list(
+            'content_type', 'object_id'
+        ).first() or ('outpass', 1)
+        student_id = HostelRequest.objects.values_list('student_id', flat=True).first() or 1
+
+        return {
+            'history for one object': StatusHistory.objects.filter(
+                content_type=history_target[0], object_id=history_target[1]
+            ),
+            'hostel request by student+status': HostelRequest.objects.filter(
+                student_id=student_id, status=HostelRequestStatus.PENDING
+            ),
+            'pending hostel requests': HostelRequest.objects.filter(
+                status=HostelRequestStatus.PENDING
+            )[:50],
+            'pending swaps': SwapRequest.objects.filter(
+                status=SwapRequest.SwapStatus.PENDING_WARDEN
+            )[:50],
+            'pending outpasses': OutPass.objects.filter(status=RequestStatus.PENDING)[:50],
+            'open tickets': MaintenanceTicket.objects.filter(
+                status=MaintenanceTicket.Status.OPEN
+            )[:50],
+        }
+
+    def run_queries(self, repeat):
+        timings = {}
+        for name, queryset in self.hot_queries().items():
+            self.stdout.write(self.style.HTTP_INFO(f"\n{name}"))
+            self.stdout.write(queryset.explain())
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            timings[name] = (time.perf_counter() - started) / repeat * 1000
+            self.stdout.write(f"avg {timings[name]:.2f} ms over {repeat} runs")
+        return timings
+
+    @contextmanager
+    def indexes_dropped(self):
+        """Temporarily remove the composite indexes declared in Meta.indexes"""
+        dropped = []
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    editor.remove_index(model, index)
+                    dropped.append((model, index))
+        self.stdout.write(f"Dropped {len(dropped)} indexes")
+        try:
+            yield
+        finally:
+            with connection.schema_editor() as editor:
+                for model, index in dropped:
+                    editor.add_index(model, index)
+            self.stdout.write(f"Restored {len(dropped)} indexes")
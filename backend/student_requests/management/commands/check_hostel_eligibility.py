@@ -0,0 +1,41 @@
+"""
+Management command to check hostel eligibility for all students in one pass.
+Run it after a semester change to find pending hostel requests that are no longer
+eligible; --auto-reject rejects them in bulk.
+"""
+from django.core.management.base import BaseCommand
+from student_requests.services import evaluate_bulk_eligibility
+
+
+class Command(BaseCommand):
+    help = 'Evaluate hostel eligibility for every student and optionally reject ineligible pending requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pending-only', action='store_true', help='Only students with a pending hostel request')
+        parser.add_argument('--batch-year', type=int, help='Only this 2-digit batch year (e.g. 22)')
+        parser.add_argument('--level', type=int, help='Only students currently at this level (e.g. 400)')
+        parser.add_argument('--auto-reject', action='store_true', help='Reject pending requests of ineligible students')
+
+    def handle(self, *args, **options):
+        result = evaluate_bulk_eligibility(
+            pending_only=options['pending_only'],
+            batch_year=options['batch_year'],
+            level=options['level'],
+            auto_reject=options['auto_reject'],
+        )
+
+        self.stdout.write(f"Semester: {result['semester_info']['display']}")
+        self.stdout.write(
+            f"Checked {result['checked']} students: "
+            f"{result['eligible']} eligible, {result['ineligible']} ineligible"
+        )
+        for row in result['by_level']:
+            level = f"{row['level']} Level" if row['level'] else 'Unknown level'
+            self.stdout.write(f"  {level:<14} eligible={row['eligible']} ineligible={row['ineligible']}")
+        for row in result['by_reason']:
+            self.stdout.write(f"  {row['count']:>6}  {row['reason']}")
+
+        self.stdout.write(f"Ineligible pending requests: {result['ineligible_pending_requests']}")
+        if options['auto_reject']:
+            self.stdout.write(f"Rejected {result['rejected']} requests")
+        self.stdout.write(self.style.SUCCESS('Done!'))
@@ -0,0 +1,26 @@
+"""
+Management command to print the public key gate verifiers need to check
+signed outpass tokens offline, or to generate a new key pair.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ImproperlyConfigured
+from student_requests.verification import generate_signing_key, load_signing_key, get_public_key, encode_public_key
+
+
+class Command(BaseCommand):
+    help = 'Print the outpass token public key, or generate a new Ed25519 key pair'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--generate', action='store_true', help='Generate a new private key for OUTPASS_TOKEN_PRIVATE_KEY')
+
+    def handle(self, *args, **options):
+        if options['generate']:
+            private_key = generate_signing_key()
+            self.stdout.write(f"OUTPASS_TOKEN_PRIVATE_KEY={private_key}")
+            self.stdout.write(f"Public key: {encode_public_key(load_signing_key(private_key).public_key())}")
+            return
+
+        try:
+            self.stdout.write(encode_public_key(get_public_key()))
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-19 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_requests', '0007_alter_hostelrequest_semester'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hostelrequest',
+            index=models.Index(fields=['student', 'status'], name='hostelreq_student_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hostelrequest',
+            index=models.Index(fields=['status', '-created_at'], name='hostelreq_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outpass',
+            index=models.Index(fields=['status', '-created_at'], name='outpass_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outpass',
+            index=models.Index(fields=['student', '-created_at'], name='outpass_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statushistory',
+            index=models.Index(fields=['content_type', 'object_id', '-created_at'], name='statushist_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['status', '-created_at'], name='swapreq_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-19 18:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_requests', '0008_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hostelrequest',
+            index=models.Index(fields=['-created_at', '-id'], name='hostelreq_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outpass',
+            index=models.Index(fields=['-created_at', '-id'], name='outpass_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='swaprequest',
+            index=models.Index(fields=['-created_at', '-id'], name='swapreq_created_id_idx'),
+        ),
+    ]
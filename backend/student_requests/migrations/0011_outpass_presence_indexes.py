@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_requests', '0010_swap_student_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outpass',
+            index=models.Index(fields=['status', 'leave_date', 'return_date'], name='outpass_status_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outpass',
+            index=models.Index(fields=['updated_at'], name='outpass_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_requests', '0011_outpass_presence_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='statushistory',
+            name='content_type',
+            field=models.CharField(choices=[('hostel_request', 'Hostel Request'), ('swap_request', 'Swap Request'), ('outpass', 'Outpass'), ('ticket', 'Maintenance Ticket'), ('allocation', 'Allocation')], max_length=20),
+        ),
+    ]
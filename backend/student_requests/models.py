@@ -31,6 +31,14 @@ class HostelRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Duplicate-request check and per-student listing by status
+            models.Index(fields=['student', 'status'], name='hostelreq_student_status_idx'),
+            # Warden list / allocation: filter by status, newest first
+            models.Index(fields=['status', '-created_at'], name='hostelreq_status_created_idx'),
+            # Unfiltered lists: keyset pagination on (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='hostelreq_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.semester} ({self.status})"
@@ -60,6 +68,14 @@ class SwapRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='swapreq_status_created_idx'),
+            # A student's swap list: student_a = user OR student_b = user, newest first
+            models.Index(fields=['student_a', '-created_at'], name='swapreq_a_created_idx'),
+            models.Index(fields=['student_b', '-created_at'], name='swapreq_b_created_idx'),
+            # Unfiltered lists: keyset pagination on (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='swapreq_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"Swap: {self.student_a.username} <-> {self.student_b.username} ({self.status})"
@@ -84,6 +100,15 @@ class OutPass(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='outpass_status_created_idx'),
+            models.Index(fields=['student', '-created_at'], name='outpass_student_created_idx'),
+            # Unfiltered lists: keyset pagination on (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='outpass_created_id_idx'),
+            # Presence ledger: date-range reads of approved outpasses and incremental sync
+            models.Index(fields=['status', 'leave_date', 'return_date'], name='outpass_status_dates_idx'),
+            models.Index(fields=['updated_at'], name='outpass_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Outpass: {self.student.username} ({self.leave_date} to {self.return_date})"
@@ -95,6 +120,7 @@ class StatusHistory(models.Model):
         ('swap_request', 'Swap Request'),
         ('outpass', 'Outpass'),
         ('ticket', 'Maintenance Ticket'),
+        ('allocation', 'Allocation'),
     )
     
     content_type = models.CharField(max_length=20, choices=CONTENT_TYPES)
@@ -109,6 +135,10 @@ class StatusHistory(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Status histories'
+        indexes = [
+            # Per-object history lookup, already in display order
+            models.Index(fields=['content_type', 'object_id', '-created_at'], name='statushist_object_idx'),
+        ]
     
     def __str__(self):
         return f"{self.content_type} #{self.object_id}: {self.old_status} -> {self.new_status}"
@@ -0,0 +1,74 @@
+from datetime import datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination for request/ticket lists, newest first.
+
+    The cursor holds the (created_at, id) of the row it continues from and
+    each page is a `(created_at, id) < position` range on the
+    (-created_at, -id) indexes, so deep pages cost the same as the first
+    (no OFFSET, no COUNT). Rows sharing a created_at are split by id rather
+    than by DRF's offset-within-ties, which only looks at the first ordering field.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+        if self.cursor and self.cursor.position:
+            created_at, pk = self.decode_position(self.cursor.position)
+            if reverse:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # One extra row tells whether there is another page in this direction
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Walking backwards from a cursor means there is a page after this one, and vice versa
+        self.has_next = bool(self.cursor) if reverse else has_more
+        self.has_previous = has_more if reverse else bool(self.cursor)
+        return self.page
+
+    def encode_position(self, obj):
+        return f'{obj.created_at.isoformat()}|{obj.pk}'
+
+    def decode_position(self, position):
+        try:
+            created_at, pk = position.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        # An empty page (rows deleted since the cursor was issued) continues from the same position
+        position = self.encode_position(self.page[-1]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.encode_position(self.page[0]) if self.page else self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
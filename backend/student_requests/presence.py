@@ -0,0 +1,211 @@
+"""
+Outpass presence ledger.
+
+Answers "who is out on a date", "who is overdue" and per-hostel absence
+counts from an in-memory index of approved outpasses instead of scanning the
+OutPass table per request.
+
+The ledger holds every APPROVED outpass as a [leave_date, return_date]
+interval in a centered interval tree (stabbing queries in O(log n + k)) and a
+list sorted by return date (overdue = a prefix). It syncs incrementally: each
+query first loads outpasses whose updated_at is past the last watermark (an
+indexed range read) into a small pending overlay, and the tree is rebuilt only
+once the overlay grows. A periodic full reload picks up deletions made by
+other processes.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from datetime import timedelta
+from django.utils import timezone
+from .models import OutPass, RequestStatus
+
+REBUILD_THRESHOLD = 256  # pending changes before the tree is rebuilt
+FULL_RELOAD_INTERVAL = 10 * 60  # seconds
+WATERMARK_SLACK = timedelta(minutes=1)  # re-read rows from transactions that committed late
+
+PresenceEntry = namedtuple('PresenceEntry', [
+    'outpass_id', 'student_id', 'student_name', 'enrollment', 'hostel', 'room', 'leave_date', 'return_date'
+])
+
+PRESENCE_FIELDS = (
+    'id', 'student_id', 'student__profile__full_name', 'student__profile__enrollment_number',
+    'student__allocation__room__hostel__name', 'student__allocation__room__room_number',
+    'leave_date', 'return_date',
+)
+
+class IntervalTree:
+    """Static centered interval tree over (start, end, key) with inclusive ends"""
+
+    def __init__(self, intervals):
+        self.root = self._build(list(intervals))
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = endpoints[len(endpoints) // 2]
+        left, right, overlapping = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+        return {
+            'center': center,
+            'by_start': sorted(overlapping, key=lambda interval: interval[0]),
+            'by_end': sorted(overlapping, key=lambda interval: interval[1], reverse=True),
+            'left': self._build(left),
+            'right': self._build(right),
+        }
+
+    def stab(self, point):
+        """Keys of all intervals containing `point`"""
+        keys = []
+        node = self.root
+        while node is not None:
+            if point < node['center']:
+                for start, _, key in node['by_start']:
+                    if start > point:
+                        break
+                    keys.append(key)
+                node = node['left']
+            elif point > node['center']:
+                for _, end, key in node['by_end']:
+                    if end < point:
+                        break
+                    keys.append(key)
+                node = node['right']
+            else:
+                keys.extend(key for _, _, key in node['by_start'])
+                break
+        return keys
+
+class PresenceLedger:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.pending = {}  # outpass id -> entry, or None if it left the ledger since the last rebuild
+        self.tree = IntervalTree([])
+        self.by_return = []  # (return_date, outpass id), sorted
+        self.watermark = None
+        self.loaded_at = None
+
+    def _load(self, queryset):
+        return [PresenceEntry(*row) for row in queryset.values_list(*PRESENCE_FIELDS)]
+
+    def _rebuild(self):
+        self.tree = IntervalTree(
+            (entry.leave_date, entry.return_date, entry.outpass_id) for entry in self.entries.values()
+        )
+        self.by_return = sorted((entry.return_date, entry.outpass_id) for entry in self.entries.values())
+        self.pending = {}
+
+    def _full_reload(self):
+        self.watermark = timezone.now()
+        self.entries = {
+            entry.outpass_id: entry
+            for entry in self._load(OutPass.objects.filter(status=RequestStatus.APPROVED))
+        }
+        self._rebuild()
+        self.loaded_at = time.monotonic()
+
+    def _sync(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > FULL_RELOAD_INTERVAL:
+            self._full_reload()
+            return
+
+        since = self.watermark - WATERMARK_SLACK
+        self.watermark = timezone.now()
+        changed = OutPass.objects.filter(updated_at__gte=since)
+        approved = {entry.outpass_id: entry for entry in self._load(changed.filter(status=RequestStatus.APPROVED))}
+        for outpass_id in changed.exclude(status=RequestStatus.APPROVED).values_list('id', flat=True):
+            self._apply(outpass_id, None)
+        for outpass_id, entry in approved.items():
+            self._apply(outpass_id, entry)
+        if len(self.pending) > REBUILD_THRESHOLD:
+            self._rebuild()
+
+    def _apply(self, outpass_id, entry):
+        if self.entries.get(outpass_id) == entry:
+            return
+        if entry is None:
+            self.entries.pop(outpass_id, None)
+        else:
+            self.entries[outpass_id] = entry
+        self.pending[outpass_id] = entry
+
+    def reset(self):
+        """Forget everything; the next query reloads from the database"""
+        with self.lock:
+            self.loaded_at = None
+
+    def discard(self, outpass_id):
+        """Drop an outpass (e.g. on delete, which the updated_at watermark cannot see)"""
+        with self.lock:
+            if self.loaded_at is not None:
+                self._apply(outpass_id, None)
+
+    def out_on(self, day):
+        """Entries of approved outpasses covering `day`"""
+        with self.lock:
+            self._sync()
+            ids = {outpass_id for outpass_id in self.tree.stab(day) if outpass_id not in self.pending}
+            ids.update(
+                outpass_id for outpass_id, entry in self.pending.items()
+                if entry is not None and entry.leave_date <= day <= entry.return_date
+            )
+            return [self.entries[outpass_id] for outpass_id in ids]
+
+    def overdue(self, today):
+        """Entries of outpasses still APPROVED (not marked returned) after their return date"""
+        with self.lock:
+            self._sync()
+            cutoff = bisect_left(self.by_return, (today,))
+            ids = {outpass_id for _, outpass_id in self.by_return[:cutoff] if outpass_id not in self.pending}
+            ids.update(
+                outpass_id for outpass_id, entry in self.pending.items()
+                if entry is not None and entry.return_date < today
+            )
+            return [self.entries[outpass_id] for outpass_id in ids]
+
+ledger = PresenceLedger()
+
+def entry_data(entry):
+    return {
+        'outpass_id': entry.outpass_id,
+        'student': entry.student_id,
+        'student_name': entry.student_name,
+        'enrollment': entry.enrollment,
+        'hostel': entry.hostel,
+        'room': entry.room,
+        'leave_date': entry.leave_date,
+        'return_date': entry.return_date,
+    }
+
+def students_out_on(day=None):
+    day = day or timezone.localdate()
+    entries = sorted(ledger.out_on(day), key=lambda entry: (entry.return_date, entry.outpass_id))
+    return {'date': day, 'count': len(entries), 'students': [entry_data(entry) for entry in entries]}
+
+def overdue_outpasses(today=None):
+    today = today or timezone.localdate()
+    entries = sorted(ledger.overdue(today), key=lambda entry: (entry.return_date, entry.outpass_id))
+    outpasses = []
+    for entry in entries:
+        data = entry_data(entry)
+        data['days_overdue'] = (today - entry.return_date).days
+        outpasses.append(data)
+    return {'date': today, 'count': len(outpasses), 'outpasses': outpasses}
+
+def absence_counts_by_hostel(day=None):
+    day = day or timezone.localdate()
+    counts = Counter(entry.hostel or 'Unallocated' for entry in ledger.out_on(day))
+    return {
+        'date': day,
+        'total': sum(counts.values()),
+        'hostels': [{'hostel': hostel, 'absent': count} for hostel, count in sorted(counts.items())],
+    }
@@ -19,13 +19,13 @@ Eligibility Rules:
 """
 
 from datetime import datetime, date
+from functools import lru_cache
 
-def get_current_semester_info():
+def compute_semester_info(today):
     """
-    Get current semester details based on current date.
+    Get semester details for the given date.
     Returns dict with semester number, academic year, and date range.
     """
-    today = date.today()
     month = today.month
     year = today.year
     
@@ -95,6 +95,8 @@ def get_batch_from_enrollment(enrollment_number):
         for part in parts:
             if part.isdigit() and len(part) == 2:
                 return int(part)
+        # Generated IDs (UWU/GEN/XXXXXXXX) carry no batch
+        return None
     
     # Fallback: Find 2 digits after letters (e.g., cst22001)
     match = re.search(r'[a-zA-Z]+(\d{2})', enrollment_number)
@@ -104,9 +106,9 @@ def get_batch_from_enrollment(enrollment_number):
     return None
 
 
-def get_level_from_batch(batch_year):
+def compute_level(batch_year, today):
     """
-    Calculate the academic level based on batch year.
+    Calculate the academic level based on batch year, as of `today`.
     
     Based on user specification:
     For Nov 2025 - March 2026 (academic year 2025/2026):
@@ -124,7 +126,6 @@ def get_level_from_batch(batch_year):
     if not batch_year:
         return None
     
-    today = date.today()
     current_year = today.year
     
     # Get current academic year start
@@ -163,31 +164,20 @@ def get_level_from_batch(batch_year):
         return None  # Future batch or invalid
 
 
-def check_hostel_eligibility(enrollment_number):
+NO_BATCH_ELIGIBILITY = {
+    'eligible': False,
+    'level': None,
+    'semester': None,
+    'academic_year': None,
+    'reason': 'Could not determine batch from enrollment number'
+}
+
+
+def evaluate_batch_eligibility(batch, level, semester_info):
     """
-    Check if a student is eligible for hostel accommodation.
-    
-    Returns:
-        dict: {
-            'eligible': bool,
-            'level': int,
-            'semester': int,
-            'academic_year': str,
-            'reason': str (if not eligible)
-        }
+    Apply the hostel eligibility rules to one batch year.
+    Returns the same dict as check_hostel_eligibility.
     """
-    batch = get_batch_from_enrollment(enrollment_number)
-    if not batch:
-        return {
-            'eligible': False,
-            'level': None,
-            'semester': None,
-            'academic_year': None,
-            'reason': 'Could not determine batch from enrollment number'
-        }
-    
-    level = get_level_from_batch(batch)
-    semester_info = get_current_semester_info()
     semester = semester_info['semester']
     academic_year = semester_info['academic_year']
     
@@ -223,6 +213,102 @@ def check_hostel_eligibility(enrollment_number):
     }
 
 
+class SemesterCalendar:
+    """
+    The academic calendar as of one day.
+    
+    Precomputes the semester info and the level and eligibility of every
+    2-digit batch year, so per-student checks are dict lookups and thousands
+    of enrollments can be evaluated at once.
+    """
+    BATCH_YEARS = range(1, 100)
+    
+    def __init__(self, today):
+        self.today = today
+        self.semester_info = compute_semester_info(today)
+        self.levels = {batch: compute_level(batch, today) for batch in self.BATCH_YEARS}
+        self.eligibility = {
+            batch: evaluate_batch_eligibility(batch, self.levels[batch], self.semester_info)
+            for batch in self.BATCH_YEARS
+        }
+    
+    def level_for_batch(self, batch_year):
+        return self.levels.get(batch_year)
+    
+    def check_eligibility(self, enrollment_number):
+        """Eligibility dict for one enrollment (a copy; callers may modify it)"""
+        batch = get_batch_from_enrollment(enrollment_number)
+        return dict(self.eligibility.get(batch, NO_BATCH_ELIGIBILITY))
+    
+    def check_many(self, enrollment_numbers):
+        """Eligibility for many enrollments: {enrollment_number: eligibility dict}"""
+        return {enrollment: self.check_eligibility(enrollment) for enrollment in enrollment_numbers}
+
+
+# Date source for the calendar; tests can swap it with set_clock()
+_clock = date.today
+
+
+def set_clock(clock):
+    """Replace the function returning today's date. Returns the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+@lru_cache(maxsize=4)
+def _calendar_for(day):
+    return SemesterCalendar(day)
+
+
+def get_semester_calendar(today=None):
+    """Calendar for `today` (default: the clock's date), built once per day"""
+    return _calendar_for(today or _clock())
+
+
+def get_current_semester_info():
+    """
+    Get current semester details based on current date.
+    Returns dict with semester number, academic year, and date range.
+    """
+    return dict(get_semester_calendar().semester_info)
+
+
+def get_level_from_batch(batch_year):
+    """Current academic level of a batch year (see compute_level)"""
+    return get_semester_calendar().level_for_batch(batch_year)
+
+
+def check_hostel_eligibility(enrollment_number):
+    """
+    Check if a student is eligible for hostel accommodation.
+    
+    Returns:
+        dict: {
+            'eligible': bool,
+            'level': int,
+            'semester': int,
+            'academic_year': str,
+            'reason': str (if not eligible)
+        }
+    """
+    return get_semester_calendar().check_eligibility(enrollment_number)
+
+
+def get_profile_eligibility_fields(enrollment_number, calendar=None):
+    """
+    Values for the materialized eligibility columns on StudentProfile.
+    Returns dict with batch_year, level and hostel_eligible.
+    Pass `calendar` to evaluate many profiles against the same day.
+    """
+    eligibility = (calendar or get_semester_calendar()).check_eligibility(enrollment_number)
+    return {
+        'batch_year': eligibility.get('batch'),
+        'level': eligibility['level'],
+        'hostel_eligible': eligibility['eligible'],
+    }
+
+
 def get_semester_display(enrollment_number):
     """
     Get a human-readable semester display for a student.
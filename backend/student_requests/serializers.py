@@ -1,8 +1,50 @@
 from rest_framework import serializers
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
 from .models import HostelRequest, SwapRequest, OutPass, StatusHistory, RequestStatus
 from users.models import StudentProfile
+from collections import defaultdict
 import uuid
 
+def prefetch_status_history(objects, content_type):
+    """
+    Load the status history of many objects in one query and attach it to each
+    object, so serializers do not query StatusHistory once per object.
+    """
+    objects = list(objects)
+    grouped = defaultdict(list)
+    if objects:
+        history = StatusHistory.objects.filter(
+            content_type=content_type,
+            object_id__in=[obj.id for obj in objects]
+        ).select_related('changed_by__profile')
+        for entry in history:
+            grouped[entry.object_id].append(entry)
+    for obj in objects:
+        obj._status_history = grouped[obj.id]
+    return objects
+
+def get_status_history_entries(obj, content_type):
+    """Prefetched history if available, otherwise a single-object query"""
+    history = getattr(obj, '_status_history', None)
+    if history is None:
+        history = StatusHistory.objects.filter(
+            content_type=content_type,
+            object_id=obj.id
+        ).select_related('changed_by__profile')
+    return history
+
+class StatusHistoryListSerializer(serializers.ListSerializer):
+    """
+    List serializer that loads the status history for a whole page of objects
+    in one query before the child renders them. The child serializer names its
+    history type in `status_history_content_type`.
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        objects = prefetch_status_history(iterable, self.child.status_history_content_type)
+        return super().to_representation(objects)
+
 class StatusHistorySerializer(serializers.ModelSerializer):
     changed_by_name = serializers.SerializerMethodField()
     
@@ -24,9 +66,11 @@ class HostelRequestSerializer(serializers.ModelSerializer):
     student_batch = serializers.SerializerMethodField()
     student_gender = serializers.SerializerMethodField()
     status_history = serializers.SerializerMethodField()
+    status_history_content_type = 'hostel_request'
     
     class Meta:
         model = HostelRequest
+        list_serializer_class = StatusHistoryListSerializer
         fields = ['id', 'student', 'student_name', 'student_enrollment', 
                   'student_batch', 'student_gender',
                   'academic_year', 'semester', 'status', 'reason', 'rejection_reason',
@@ -53,21 +97,26 @@ class HostelRequestSerializer(serializers.ModelSerializer):
         return obj.student.gender if hasattr(obj.student, 'gender') else None
     
     def get_status_history(self, obj):
-        history = StatusHistory.objects.filter(
-            content_type='hostel_request',
-            object_id=obj.id
-        )
+        history = get_status_history_entries(obj, self.status_history_content_type)
         return StatusHistorySerializer(history, many=True).data
 
+class HostelRequestListSerializer(HostelRequestSerializer):
+    """Lean list representation; history is only served by the detail view"""
+    class Meta(HostelRequestSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+        fields = [field for field in HostelRequestSerializer.Meta.fields if field != 'status_history']
+
 class SwapRequestSerializer(serializers.ModelSerializer):
     student_a_name = serializers.SerializerMethodField()
     student_b_name = serializers.SerializerMethodField()
     student_a_room = serializers.SerializerMethodField()
     student_b_room = serializers.SerializerMethodField()
     status_history = serializers.SerializerMethodField()
+    status_history_content_type = 'swap_request'
     
     class Meta:
         model = SwapRequest
+        list_serializer_class = StatusHistoryListSerializer
         fields = ['id', 'student_a', 'student_b', 'student_b_enrollment',
                   'student_a_name', 'student_b_name', 'student_a_room', 'student_b_room',
                   'reason', 'student_b_agreed', 'student_b_response_at',
@@ -98,10 +147,7 @@ class SwapRequestSerializer(serializers.ModelSerializer):
         return None
     
     def get_status_history(self, obj):
-        history = StatusHistory.objects.filter(
-            content_type='swap_request',
-            object_id=obj.id
-        )
+        history = get_status_history_entries(obj, self.status_history_content_type)
         return StatusHistorySerializer(history, many=True).data
     
     def validate_student_b_enrollment(self, value):
@@ -112,6 +158,12 @@ class SwapRequestSerializer(serializers.ModelSerializer):
         except StudentProfile.DoesNotExist:
             raise serializers.ValidationError("Student with this enrollment number not found.")
 
+class SwapRequestListSerializer(SwapRequestSerializer):
+    """Lean list representation; history is only served by the detail view"""
+    class Meta(SwapRequestSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+        fields = [field for field in SwapRequestSerializer.Meta.fields if field != 'status_history']
+
 class SwapRequestCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating swap requests"""
     class Meta:
@@ -136,13 +188,16 @@ class OutPassSerializer(serializers.ModelSerializer):
     student_enrollment = serializers.SerializerMethodField()
     status_history = serializers.SerializerMethodField()
     days_count = serializers.SerializerMethodField()
+    signed_token = serializers.SerializerMethodField()
+    status_history_content_type = 'outpass'
     
     class Meta:
         model = OutPass
+        list_serializer_class = StatusHistoryListSerializer
         fields = ['id', 'student', 'student_name', 'student_enrollment',
                   'leave_date', 'return_date', 'days_count', 'reason', 
                   'destination', 'emergency_contact', 'status', 
-                  'warden_notes', 'approved_at', 'verification_code',
+                  'warden_notes', 'approved_at', 'verification_code', 'signed_token',
                   'created_at', 'updated_at', 'status_history']
         read_only_fields = ['student', 'status', 'warden_notes', 'approved_at', 
                            'verification_code', 'created_at', 'updated_at']
@@ -160,13 +215,26 @@ class OutPassSerializer(serializers.ModelSerializer):
     def get_days_count(self, obj):
         return (obj.return_date - obj.leave_date).days + 1
     
+    def get_signed_token(self, obj):
+        if obj.status != RequestStatus.APPROVED:
+            return None
+        from .verification import make_outpass_token
+        try:
+            return make_outpass_token(obj, self.get_student_enrollment(obj) or '')
+        except ImproperlyConfigured:
+            # Reported by the student_requests system check; listing still works
+            return None
+    
     def get_status_history(self, obj):
-        history = StatusHistory.objects.filter(
-            content_type='outpass',
-            object_id=obj.id
-        )
+        history = get_status_history_entries(obj, self.status_history_content_type)
         return StatusHistorySerializer(history, many=True).data
 
+class OutPassListSerializer(OutPassSerializer):
+    """Lean list representation; history is only served by the detail view"""
+    class Meta(OutPassSerializer.Meta):
+        list_serializer_class = serializers.ListSerializer
+        fields = [field for field in OutPassSerializer.Meta.fields if field != 'status_history']
+
 class OutPassCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating outpass requests"""
     class Meta:
@@ -0,0 +1,239 @@
+import uuid
+from django.db import transaction
+from django.db.models import Case, When, Value
+from django.utils import timezone
+from .models import HostelRequest, HostelRequestStatus, OutPass, RequestStatus
+from .history import HistoryRecorder
+from .verification import make_outpass_token
+from .semester_utils import get_semester_calendar
+from users.models import StudentProfile, CustomUser
+
+# ================= Bulk Eligibility =================
+
+def evaluate_bulk_eligibility(pending_only=False, batch_year=None, level=None,
+                              auto_reject=False, changed_by=None, calendar=None):
+    """
+    Evaluate hostel eligibility for every student (or a filtered set) in one pass.
+
+    Reads one projection of student profiles and one of pending hostel requests,
+    evaluates each enrollment against the semester calendar, and returns counts
+    by level and by reason. With auto_reject, pending requests of ineligible
+    students are rejected in a single UPDATE and their history rows bulk-inserted.
+    """
+    calendar = calendar or get_semester_calendar()
+
+    pending = HostelRequest.objects.filter(status=HostelRequestStatus.PENDING)
+    if batch_year is not None:
+        pending = pending.filter(student__profile__batch_year=batch_year)
+    pending_by_student = {}
+    for request_id, student_id in pending.values_list('id', 'student_id'):
+        pending_by_student.setdefault(student_id, []).append(request_id)
+
+    profiles = StudentProfile.objects.filter(user__role=CustomUser.Role.STUDENT)
+    if batch_year is not None:
+        profiles = profiles.filter(batch_year=batch_year)
+    if pending_only:
+        profiles = profiles.filter(user_id__in=pending.values('student_id'))
+
+    checked = 0
+    eligible = 0
+    by_level = {}
+    by_reason = {}
+    reject_reasons = {}  # request id -> rejection reason
+    for student_id, enrollment_number in profiles.values_list('user_id', 'enrollment_number').iterator():
+        result = calendar.check_eligibility(enrollment_number)
+        if level is not None and result['level'] != level:
+            continue
+
+        checked += 1
+        counts = by_level.setdefault(result['level'], {'level': result['level'], 'eligible': 0, 'ineligible': 0})
+        if result['eligible']:
+            eligible += 1
+            counts['eligible'] += 1
+            continue
+
+        counts['ineligible'] += 1
+        by_reason[result['reason']] = by_reason.get(result['reason'], 0) + 1
+        for request_id in pending_by_student.get(student_id, []):
+            reject_reasons[request_id] = result['reason']
+
+    rejected = len(reject_hostel_requests(reject_reasons, changed_by)) if auto_reject else 0
+
+    return {
+        'date': calendar.today,
+        'semester_info': dict(calendar.semester_info),
+        'checked': checked,
+        'eligible': eligible,
+        'ineligible': checked - eligible,
+        'by_level': sorted(by_level.values(), key=lambda row: (row['level'] is None, row['level'] or 0)),
+        'by_reason': [
+            {'reason': reason, 'count': count}
+            for reason, count in sorted(by_reason.items(), key=lambda item: -item[1])
+        ],
+        'ineligible_pending_requests': len(reject_reasons),
+        'rejected': rejected,
+    }
+
+def reject_hostel_requests(reject_reasons, changed_by=None):
+    """
+    Reject the given pending hostel requests ({request id: reason}) with one UPDATE
+    and bulk-insert their status history. Requests no longer PENDING are skipped.
+    Returns the ids rejected.
+    """
+    if not reject_reasons:
+        return []
+
+    with transaction.atomic():
+        # Lock and re-check: a request may have been allocated since it was read
+        locked_ids = list(HostelRequest.objects.select_for_update().filter(
+            id__in=list(reject_reasons), status=HostelRequestStatus.PENDING
+        ).values_list('id', flat=True))
+        if not locked_ids:
+            return []
+
+        # Only a handful of distinct reasons, so one WHEN per reason
+        ids_by_reason = {}
+        for request_id in locked_ids:
+            ids_by_reason.setdefault(reject_reasons[request_id], []).append(request_id)
+
+        HostelRequest.objects.filter(id__in=locked_ids).update(
+            status=HostelRequestStatus.REJECTED,
+            rejection_reason=Case(
+                *[When(id__in=ids, then=Value(reason)) for reason, ids in ids_by_reason.items()],
+                default=Value('')
+            ),
+            updated_at=timezone.now()
+        )
+        with HistoryRecorder(changed_by=changed_by) as history:
+            for request_id in locked_ids:
+                history.record(
+                    'hostel_request', request_id, HostelRequestStatus.PENDING,
+                    HostelRequestStatus.REJECTED, reject_reasons[request_id]
+                )
+
+        # update() sends no post_save, so the dashboard cache is dropped here
+        from operations.services import invalidate_dashboard_stats
+        transaction.on_commit(invalidate_dashboard_stats)
+
+    return locked_ids
+
+# ================= Bulk Warden Actions =================
+
+MAX_BULK_IDS = 500
+
+def clean_bulk_ids(raw_ids):
+    """Validate a list of ids from a request body. Raises ValueError."""
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError('ids must be a non-empty list')
+    if len(raw_ids) > MAX_BULK_IDS:
+        raise ValueError(f'At most {MAX_BULK_IDS} ids per request')
+    try:
+        ids = [int(value) for value in raw_ids]
+    except (TypeError, ValueError):
+        raise ValueError('ids must be integers')
+    # Keep the caller's order, drop repeats
+    return list(dict.fromkeys(ids))
+
+def bulk_result(ids, errors, statuses, **extra):
+    """Per-id results plus totals, in the order the ids were given"""
+    results = []
+    for object_id in ids:
+        if object_id in errors:
+            results.append({'id': object_id, 'success': False, 'error': errors[object_id]})
+        else:
+            row = {'id': object_id, 'success': True, 'status': statuses[object_id]}
+            row.update({key: values[object_id] for key, values in extra.items() if object_id in values})
+            results.append(row)
+    return {
+        'processed': len(ids),
+        'succeeded': len(ids) - len(errors),
+        'failed': len(errors),
+        'results': results,
+    }
+
+def bulk_reject_hostel_requests(ids, rejection_reason, changed_by):
+    """Reject many pending hostel requests with the same reason"""
+    with transaction.atomic():
+        current = dict(HostelRequest.objects.filter(id__in=ids).values_list('id', 'status'))
+        errors = {}
+        for request_id in ids:
+            if request_id not in current:
+                errors[request_id] = 'Request not found'
+            elif current[request_id] != HostelRequestStatus.PENDING:
+                errors[request_id] = f'Cannot reject request with status {current[request_id]}'
+        
+        rejected = set(reject_hostel_requests(
+            {request_id: rejection_reason for request_id in ids if request_id not in errors}, changed_by
+        ))
+    
+    for request_id in ids:
+        if request_id not in errors and request_id not in rejected:
+            errors[request_id] = 'Request changed while processing'
+    statuses = {request_id: HostelRequestStatus.REJECTED for request_id in rejected}
+    return bulk_result(ids, errors, statuses)
+
+def generate_verification_codes(count):
+    """`count` distinct outpass verification codes not already in use"""
+    codes = set()
+    while len(codes) < count:
+        codes.update(str(uuid.uuid4())[:8].upper() for _ in range(count - len(codes)))
+        codes -= set(OutPass.objects.filter(verification_code__in=codes).values_list('verification_code', flat=True))
+    return list(codes)
+
+def bulk_process_outpasses(ids, approve, notes, changed_by):
+    """Approve or reject many outpasses; approved ones get verification codes and signed tokens"""
+    message = 'Outpass approved' if approve else 'Outpass rejected'
+    new_status = RequestStatus.APPROVED if approve else RequestStatus.REJECTED
+    
+    with transaction.atomic():
+        outpasses = {
+            outpass.id: outpass
+            for outpass in OutPass.objects.select_for_update(of=('self',)).filter(id__in=ids).select_related(
+                'student__profile'
+            ).only('id', 'status', 'leave_date', 'return_date', 'student__profile__enrollment_number')
+        }
+        errors = {}
+        for outpass_id in ids:
+            if outpass_id not in outpasses:
+                errors[outpass_id] = 'Request not found'
+            elif outpasses[outpass_id].status not in [RequestStatus.PENDING, RequestStatus.VIEWED]:
+                errors[outpass_id] = 'Cannot process this request'
+        
+        valid = [outpasses[outpass_id] for outpass_id in ids if outpass_id not in errors]
+        old_statuses = {outpass.id: outpass.status for outpass in valid}
+        codes = {}
+        tokens = {}
+        now = timezone.now()
+        
+        if approve:
+            # Each approval needs its own code, so these go out as one bulk_update
+            for outpass, code in zip(valid, generate_verification_codes(len(valid))):
+                outpass.status = new_status
+                outpass.approved_at = now
+                outpass.verification_code = code
+                outpass.warden_notes = notes
+                outpass.updated_at = now
+                codes[outpass.id] = code
+                tokens[outpass.id] = make_outpass_token(outpass)
+            OutPass.objects.bulk_update(
+                valid, ['status', 'approved_at', 'verification_code', 'warden_notes', 'updated_at']
+            )
+        elif valid:
+            OutPass.objects.filter(id__in=list(old_statuses)).update(
+                status=new_status, warden_notes=notes, updated_at=now
+            )
+        
+        with HistoryRecorder(changed_by=changed_by) as history:
+            for outpass_id, old_status in old_statuses.items():
+                history.record('outpass', outpass_id, old_status, new_status, f'{message}. {notes}')
+        
+        # update()/bulk_update() send no post_save, so the dashboard cache is dropped here
+        from operations.services import invalidate_dashboard_stats
+        transaction.on_commit(invalidate_dashboard_stats)
+        if approve and old_statuses:
+            from .verification import cache_verifications
+            approved_ids = list(old_statuses)
+            transaction.on_commit(lambda: cache_verifications(approved_ids))
+    
+    statuses = {outpass_id: new_status for outpass_id in old_statuses}
+    return bulk_result(ids, errors, statuses, verification_code=codes, signed_token=tokens)
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import OutPass
+from .verification import invalidate_verification, invalidate_revocations
+
+def invalidate_outpass_verification(sender, instance, **kwargs):
+    # Any write may change status or dates; the next scan re-reads and re-caches
+    code = instance.verification_code
+    if code:
+        transaction.on_commit(lambda: invalidate_verification(code))
+    if instance.approved_at:
+        transaction.on_commit(invalidate_revocations)
+
+post_save.connect(invalidate_outpass_verification, sender=OutPass,
+                  dispatch_uid='outpass_verification_save')
+post_delete.connect(invalidate_outpass_verification, sender=OutPass,
+                    dispatch_uid='outpass_verification_delete')
+
+def discard_outpass_presence(sender, instance, **kwargs):
+    # Deletions leave no updated_at for the presence ledger's watermark to find
+    from .presence import ledger
+    outpass_id = instance.id
+    transaction.on_commit(lambda: ledger.discard(outpass_id))
+
+post_delete.connect(discard_outpass_presence, sender=OutPass,
+                    dispatch_uid='outpass_presence_delete')
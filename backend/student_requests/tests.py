@@ -1,3 +1,490 @@
-from django.test import TestCase
+import tempfile
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signing import Signer
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.cache import cache_is_shared, cache_ttl
+from core.testing import make_student, make_warden, house_students
+from users.models import StudentProfile
+from .models import HostelRequest, SwapRequest, OutPass, RequestStatus, StatusHistory
+from .serializers import HostelRequestSerializer
+from .semester_utils import SemesterCalendar
+from .services import evaluate_bulk_eligibility
+from .history import HistoryRecorder
+from .checks import check_outpass_token_key
+from .presence import ledger, IntervalTree
+from .verification import (
+    verify_outpass, verification_cache_key, make_outpass_token, verify_outpass_token, verify_outpass_tokens,
+    build_revocations, generate_signing_key
+)
 
-# Create your tests here.
+TOKEN_KEY = generate_signing_key()
+
+
+class StatusHistoryListSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.requests = []
+        for n in range(1, 6):
+            student = make_student(n)
+            request = HostelRequest.objects.create(student=student)
+            for old, new in [('', 'PENDING'), ('PENDING', 'VIEWED')][:1 + n % 2]:
+                StatusHistory.objects.create(
+                    content_type='hostel_request', object_id=request.id,
+                    old_status=old, new_status=new, changed_by=student
+                )
+            # Same object id, different type: must not leak into the request's history
+            StatusHistory.objects.create(content_type='swap_request', object_id=request.id, new_status='PENDING')
+            cls.requests.append(request)
+
+    def test_page_histories_load_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = HostelRequestSerializer(
+                HostelRequest.objects.select_related('student__profile').order_by('id'), many=True
+            ).data
+        self.assertEqual(len(ctx.captured_queries), 2)  # the requests, then every history
+        self.assertEqual([len(row['status_history']) for row in data], [2, 1, 2, 1, 2])
+        self.assertEqual({entry['changed_by'] for entry in data[0]['status_history']}, {self.requests[0].student_id})
+
+
+class BulkEligibilityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        # cst22xxx is 300 Level (eligible), cst23xxx 200 Level (not) in December 2025
+        eligible = make_student(1)
+        ineligible = [make_student(n) for n in range(2, 4)]
+        for student in ineligible:
+            StudentProfile.objects.filter(user=student).update(
+                enrollment_number=student.profile.enrollment_number.replace('/22/', '/23/'), batch_year=23
+            )
+        cls.eligible_request = HostelRequest.objects.create(student=eligible)
+        cls.ineligible_requests = [HostelRequest.objects.create(student=student) for student in ineligible]
+
+    def test_counts_and_auto_reject(self):
+        result = evaluate_bulk_eligibility(
+            auto_reject=True, changed_by=self.warden, calendar=SemesterCalendar(date(2025, 12, 1))
+        )
+
+        self.assertEqual((result['checked'], result['eligible'], result['ineligible']), (3, 1, 2))
+        self.assertEqual([row['level'] for row in result['by_level']], [200, 300])
+        self.assertEqual(result['rejected'], 2)
+        for request in self.ineligible_requests:
+            request.refresh_from_db()
+            self.assertEqual(request.status, 'REJECTED')
+            self.assertIn('200 Level', request.rejection_reason)
+        self.eligible_request.refresh_from_db()
+        self.assertEqual(self.eligible_request.status, 'PENDING')
+        self.assertEqual(
+            StatusHistory.objects.filter(content_type='hostel_request', changed_by=self.warden).count(), 2
+        )
+
+    def test_report_only_by_default(self):
+        result = evaluate_bulk_eligibility(calendar=SemesterCalendar(date(2025, 12, 1)))
+        self.assertEqual(result['ineligible_pending_requests'], 2)
+        self.assertEqual(result['rejected'], 0)
+        self.assertFalse(HostelRequest.objects.exclude(status='PENDING').exists())
+
+
+class HistoryRecorderTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        cls.other = make_warden('caretaker')
+
+    def test_buffers_until_batch_size_then_flushes_on_exit(self):
+        with HistoryRecorder(changed_by=self.warden, batch_size=3) as history:
+            history.record_many('outpass', [1, 2], 'PENDING', 'APPROVED')
+            self.assertEqual(StatusHistory.objects.count(), 0)
+            history.record('outpass', 3, 'PENDING', 'REJECTED', changed_by=self.other)
+            self.assertEqual(StatusHistory.objects.count(), 3)
+            history.record('ticket', 4, None, 'OPEN')
+        self.assertEqual(history.written, 4)
+
+        rows = {row.object_id: row for row in StatusHistory.objects.all()}
+        self.assertEqual(rows[3].changed_by, self.other)
+        self.assertEqual(rows[1].changed_by, self.warden)
+        self.assertEqual(rows[4].old_status, '')
+
+    def test_exception_discards_buffered_rows(self):
+        with self.assertRaises(RuntimeError):
+            with HistoryRecorder(batch_size=2) as history:
+                history.record_many('outpass', [1, 2, 3], 'PENDING', 'APPROVED')
+                raise RuntimeError
+        # The full batch was already written; the buffered third row was not
+        self.assertEqual(list(StatusHistory.objects.values_list('object_id', flat=True).order_by('object_id')), [1, 2])
+
+
+@override_settings(OUTPASS_TOKEN_PRIVATE_KEY=TOKEN_KEY)
+class BulkWardenActionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        cls.students = [make_student(n) for n in range(1, 4)]
+        cls.requests = [HostelRequest.objects.create(student=student) for student in cls.students]
+        HostelRequest.objects.filter(pk=cls.requests[1].pk).update(status='ALLOCATED')
+        today = timezone.localdate()
+        cls.outpasses = [
+            OutPass.objects.create(student=student, leave_date=today, return_date=today, reason='Home')
+            for student in cls.students
+        ]
+        OutPass.objects.filter(pk=cls.outpasses[2].pk).update(status=RequestStatus.REJECTED)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.warden)
+
+    def test_bulk_reject_skips_ineligible_ids_and_records_history(self):
+        ids = [self.requests[0].id, self.requests[1].id, 999999, self.requests[2].id]
+        response = self.client.post(reverse('hostel-request-bulk-status'), {
+            'ids': ids, 'status': 'REJECTED', 'rejection_reason': 'Batch full'
+        }, format='json')
+
+        self.assertEqual((response.data['succeeded'], response.data['failed']), (2, 2))
+        self.assertEqual([row['success'] for row in response.data['results']], [True, False, False, True])
+        self.assertEqual(response.data['results'][1]['error'], 'Cannot reject request with status ALLOCATED')
+        self.assertEqual(
+            set(HostelRequest.objects.filter(status='REJECTED', rejection_reason='Batch full').values_list('id', flat=True)),
+            {self.requests[0].id, self.requests[2].id}
+        )
+        self.assertEqual(
+            sorted(StatusHistory.objects.filter(content_type='hostel_request').values_list('object_id', flat=True)),
+            sorted([self.requests[0].id, self.requests[2].id])
+        )
+
+    def test_bulk_reject_validates_input(self):
+        response = self.client.post(reverse('hostel-request-bulk-status'), {
+            'ids': ['x'], 'status': 'REJECTED', 'rejection_reason': 'r'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_approve_outpasses(self):
+        ids = [outpass.id for outpass in self.outpasses]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('outpass-bulk-approve'), {
+                'ids': ids, 'approve': True, 'notes': 'Ok'
+            }, format='json')
+
+        self.assertEqual(response.data['succeeded'], 2)
+        approved = response.data['results'][:2]
+        self.assertEqual(len({row['verification_code'] for row in approved}), 2)
+        self.assertTrue(all(row['signed_token'] for row in approved))
+        self.assertEqual(response.data['results'][2]['error'], 'Cannot process this request')
+        self.assertEqual(OutPass.objects.filter(status=RequestStatus.APPROVED).count(), 2)
+        self.assertEqual(StatusHistory.objects.filter(content_type='outpass', new_status='APPROVED').count(), 2)
+
+
+class CreatedAtCursorPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        student = make_student(1)
+        today = timezone.localdate()
+        outpasses = [
+            OutPass.objects.create(student=student, leave_date=today, return_date=today, reason='Home')
+            for _ in range(8)
+        ]
+        # Six rows share one created_at: pages must split them by id, not by offset
+        now = timezone.now()
+        OutPass.objects.filter(pk__in=[outpass.pk for outpass in outpasses[:6]]).update(created_at=now)
+        OutPass.objects.filter(pk=outpasses[6].pk).update(created_at=now + timedelta(seconds=1))
+        OutPass.objects.filter(pk=outpasses[7].pk).update(created_at=now - timedelta(seconds=1))
+        cls.expected = [outpasses[6].pk, *sorted((o.pk for o in outpasses[:6]), reverse=True), outpasses[7].pk]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.warden)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return response.data
+
+    def test_pages_do_not_overlap_and_walk_back(self):
+        pages = [self.get(reverse('outpass-list') + '?page_size=3')]
+        while pages[-1]['next']:
+            pages.append(self.get(pages[-1]['next']))
+
+        ids = [row['id'] for page in pages for row in page['results']]
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        back = self.get(pages[2]['previous'])
+        self.assertEqual([row['id'] for row in back['results']], self.expected[3:6])
+        back = self.get(back['previous'])
+        self.assertEqual([row['id'] for row in back['results']], self.expected[:3])
+        self.assertIsNone(back['previous'])
+        self.assertIsNotNone(back['next'])
+
+    def test_bad_cursor_is_404(self):
+        self.assertEqual(self.client.get(reverse('outpass-list'), {'cursor': 'garbage'}).status_code, 404)
+
+
+class HotFilterIndexTest(TestCase):
+    """The views' hot filters are answered from the composite indexes"""
+
+    def test_history_lookup_uses_object_index(self):
+        plan = StatusHistory.objects.filter(content_type='outpass', object_id=1).explain()
+        self.assertIn('statushist_object_idx', plan)
+
+    def test_pending_list_uses_status_index(self):
+        plan = OutPass.objects.filter(status=RequestStatus.PENDING).order_by('-created_at')[:50].explain()
+        self.assertIn('outpass_status_created_idx', plan)
+
+
+class SwapRequestListQueryCountTest(TestCase):
+    """Swap listings load both students' names and rooms without per-row queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        cls.students = [make_student(n) for n in range(1, 22)]
+        house_students(cls.students)
+
+        # The first student sends 10 swaps and receives 10
+        cls.student = cls.students[0]
+        for other in cls.students[1:11]:
+            SwapRequest.objects.create(
+                student_a=cls.student, student_b=other,
+                student_b_enrollment=other.profile.enrollment_number
+            )
+        for other in cls.students[11:21]:
+            SwapRequest.objects.create(
+                student_a=other, student_b=cls.student,
+                student_b_enrollment=cls.student.profile.enrollment_number
+            )
+
+    def list_swaps(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('swap-list'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], ctx.captured_queries
+
+    def test_student_sees_sent_and_received_in_one_query(self):
+        results, queries = self.list_swaps(self.student)
+
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(row['student_a_room'] and row['student_b_room'] for row in results))
+        self.assertEqual(len(queries), 1)
+
+    def test_warden_list_query_count(self):
+        results, queries = self.list_swaps(self.warden)
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(len(queries), 1)
+
+
+@override_settings(OUTPASS_TOKEN_PRIVATE_KEY=TOKEN_KEY)
+class OutPassVerificationCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        cls.student = make_student(1)
+        today = timezone.localdate()
+        cls.outpass = OutPass.objects.create(
+            student=cls.student, leave_date=today, return_date=today + timedelta(days=2),
+            reason='Home visit', destination='Kandy'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_approval_populates_shared_cache_and_scans_skip_database(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            self.assertTrue(cache_is_shared())
+            client = APIClient()
+            client.force_authenticate(self.warden)
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(reverse('outpass-approve', args=[self.outpass.pk]), {'approve': True})
+            code = response.data['verification_code']
+
+            with CaptureQueriesContext(connection) as ctx:
+                response = APIClient().get(reverse('outpass-verify', args=[code]))
+            self.assertTrue(response.data['valid'])
+            self.assertEqual(response.data['enrollment'], self.student.profile.enrollment_number)
+            self.assertEqual(len(ctx.captured_queries), 0)
+
+    @override_settings(OUTPASS_TOKEN_PRIVATE_KEY=None)
+    def test_approval_is_refused_without_token_key(self):
+        client = APIClient()
+        client.force_authenticate(self.warden)
+        response = client.post(reverse('outpass-approve', args=[self.outpass.pk]), {'approve': True})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('OUTPASS_TOKEN_PRIVATE_KEY', response.data['error'])
+        response = client.post(reverse('outpass-bulk-approve'), {'ids': [self.outpass.pk], 'approve': True}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(
+            [message.id for message in check_outpass_token_key(None)], ['student_requests.W001']
+        )
+        with override_settings(OUTPASS_TOKEN_PRIVATE_KEY='not-a-key'):
+            self.assertEqual(
+                [message.id for message in check_outpass_token_key(None)], ['student_requests.E001']
+            )
+        self.outpass.refresh_from_db()
+        self.assertEqual(self.outpass.status, RequestStatus.PENDING)
+        self.assertIsNone(self.outpass.verification_code)
+
+    def test_local_cache_hit_rechecks_status(self):
+        # A cancellation made by another worker leaves this worker's entry in place
+        OutPass.objects.filter(pk=self.outpass.pk).update(verification_code='ABCD1234', status=RequestStatus.APPROVED)
+        self.assertTrue(verify_outpass('ABCD1234')['valid'])
+        OutPass.objects.filter(pk=self.outpass.pk).update(status=RequestStatus.CANCELLED)
+
+        self.assertEqual(verify_outpass('ABCD1234'), {'valid': False, 'error': 'Outpass not approved'})
+        self.assertIsNone(cache.get(verification_cache_key('ABCD1234')))
+
+    def test_local_cache_caps_ttl(self):
+        self.assertFalse(cache_is_shared())
+        self.assertEqual(cache_ttl(60 * 60 * 24), settings.LOCAL_CACHE_MAX_TTL)
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertEqual(cache_ttl(60 * 60 * 24), 60 * 60 * 24)
+
+    def test_miss_uses_one_query_and_ignores_unapproved(self):
+        OutPass.objects.filter(pk=self.outpass.pk).update(verification_code='ABCD1234')
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertFalse(verify_outpass('ABCD1234')['valid'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIsNone(cache.get(verification_cache_key('ABCD1234')))
+
+        OutPass.objects.filter(pk=self.outpass.pk).update(status=RequestStatus.APPROVED)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(verify_outpass('ABCD1234')['valid'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIsNotNone(cache.get(verification_cache_key('ABCD1234')))
+
+
+@override_settings(OUTPASS_TOKEN_PRIVATE_KEY=TOKEN_KEY)
+class OutPassSignedTokenTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_student(1)
+        cls.today = timezone.localdate()
+        cls.outpass = OutPass.objects.create(
+            student=cls.student, leave_date=cls.today, return_date=cls.today + timedelta(days=2),
+            reason='Home visit', status=RequestStatus.APPROVED, approved_at=timezone.now()
+        )
+
+    def test_token_verifies_offline(self):
+        token = make_outpass_token(OutPass.objects.select_related('student__profile').get(pk=self.outpass.pk))
+
+        with CaptureQueriesContext(connection) as ctx:
+            result = verify_outpass_token(token, today=self.today)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertTrue(result['valid'])
+        self.assertEqual(result['enrollment'], self.student.profile.enrollment_number)
+
+        self.assertFalse(verify_outpass_token(token, today=self.today + timedelta(days=3))['valid'])
+        self.assertFalse(verify_outpass_token(token.replace(str(self.outpass.pk), '999', 1))['valid'])
+
+    def test_tokens_need_the_ed25519_key(self):
+        payload = make_outpass_token(self.outpass, enrollment='UWU/CST/22/001').rsplit(':', 1)[0]
+        # The old HMAC scheme, and anyone holding SECRET_KEY, cannot mint a token
+        hmac_token = Signer(key=settings.SECRET_KEY, salt='student_requests.outpass').sign(payload)
+        self.assertEqual(verify_outpass_token(hmac_token, today=self.today), {'valid': False, 'error': 'Invalid token'})
+        with override_settings(OUTPASS_TOKEN_PRIVATE_KEY=generate_signing_key()):
+            other_key_token = make_outpass_token(self.outpass, enrollment='UWU/CST/22/001')
+        self.assertFalse(verify_outpass_token(other_key_token, today=self.today)['valid'])
+
+        with override_settings(OUTPASS_TOKEN_PRIVATE_KEY=None):
+            with self.assertRaises(ImproperlyConfigured):
+                make_outpass_token(self.outpass, enrollment='UWU/CST/22/001')
+
+    def test_completed_or_rejected_outpass_fails_batch_verification(self):
+        token = make_outpass_token(self.outpass, enrollment=self.student.profile.enrollment_number)
+        cache.clear()
+        self.assertTrue(verify_outpass_tokens([token])[0]['valid'])
+
+        for new_status in (RequestStatus.COMPLETED, RequestStatus.REJECTED):
+            for status, valid in ((RequestStatus.APPROVED, True), (new_status, False)):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.outpass.status = status
+                    self.outpass.save()
+                self.assertEqual(verify_outpass_tokens([token])[0]['valid'], valid)
+
+    def test_cancelled_outpass_is_revoked(self):
+        token = make_outpass_token(self.outpass, enrollment=self.student.profile.enrollment_number)
+        OutPass.objects.filter(pk=self.outpass.pk).update(status=RequestStatus.REJECTED)
+
+        revoked = frozenset(build_revocations())
+        self.assertEqual(revoked, {self.outpass.pk})
+        result = verify_outpass_token(token, revoked, today=self.today)
+        self.assertEqual(result['error'], 'Outpass revoked')
+
+    def test_batch_endpoint(self):
+        cache.clear()
+        token = make_outpass_token(self.outpass, enrollment=self.student.profile.enrollment_number)
+        response = APIClient().post(
+            reverse('outpass-verify-batch'), {'tokens': [token, 'garbage']}, format='json'
+        )
+        self.assertEqual([row['valid'] for row in response.data['results']], [True, False])
+
+
+class IntervalTreeTest(TestCase):
+    def test_stab_matches_brute_force(self):
+        intervals = [(start, start + length, n) for n, (start, length) in enumerate(
+            [(1, 3), (2, 0), (5, 10), (7, 1), (0, 20), (12, 2), (3, 3), (9, 0)]
+        )]
+        tree = IntervalTree(intervals)
+        for point in range(-1, 23):
+            expected = sorted(key for start, end, key in intervals if start <= point <= end)
+            self.assertEqual(sorted(tree.stab(point)), expected)
+
+
+class OutPassPresenceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.warden = make_warden()
+        cls.students = [make_student(n) for n in range(1, 4)]
+        house_students(cls.students, per_room=3, beds=False)
+
+        cls.today = timezone.localdate()
+        spans = [(-1, 1), (-5, -2), (3, 4)]  # out now, overdue, out later
+        cls.outpasses = [
+            OutPass.objects.create(
+                student=student, leave_date=cls.today + timedelta(days=leave),
+                return_date=cls.today + timedelta(days=back), reason='Home',
+                status=RequestStatus.APPROVED
+            )
+            for student, (leave, back) in zip(cls.students, spans)
+        ]
+
+    def setUp(self):
+        ledger.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.warden)
+
+    def test_out_overdue_and_hostel_counts(self):
+        response = self.client.get(reverse('outpass-presence-out'))
+        self.assertEqual([row['outpass_id'] for row in response.data['students']], [self.outpasses[0].id])
+        self.assertEqual(response.data['students'][0]['hostel'], 'Block A')
+
+        response = self.client.get(reverse('outpass-presence-overdue'))
+        self.assertEqual([row['outpass_id'] for row in response.data['outpasses']], [self.outpasses[1].id])
+        self.assertEqual(response.data['outpasses'][0]['days_overdue'], 2)
+
+        later = (self.today + timedelta(days=3)).isoformat()
+        response = self.client.get(reverse('outpass-presence-hostels'), {'date': later})
+        self.assertEqual(response.data['hostels'], [{'hostel': 'Block A', 'absent': 1}])
+
+    def test_incremental_sync_sees_returns(self):
+        self.client.get(reverse('outpass-presence-overdue'))  # loads the ledger
+        response = self.client.post(reverse('outpass-return', args=[self.outpasses[1].pk]))
+        self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('outpass-presence-overdue'))
+        self.assertEqual(response.data['count'], 0)
+        self.assertEqual(len(ctx.captured_queries), 2)  # changed approved rows, changed other rows
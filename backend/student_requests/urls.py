@@ -3,12 +3,15 @@ from .views import (
     # Hostel Requests
     HostelRequestCreateView, HostelRequestListView, 
     HostelRequestDetailView, HostelRequestStatusView, HostelEligibilityView,
+    BulkEligibilityView, HostelRequestBulkStatusView,
     # Swap Requests
     SwapRequestCreateView, SwapRequestListView, 
     SwapRequestDetailView, SwapRequestRespondView, SwapRequestApprovalView,
     # Outpass
     OutPassCreateView, OutPassListView, 
     OutPassDetailView, OutPassApprovalView, OutPassVerifyView,
+    OutPassBulkApprovalView, OutPassTokenBatchVerifyView, OutPassRevocationListView,
+    OutPassReturnView, OutPassPresenceView, OutPassOverdueView, OutPassAbsenceByHostelView,
     # Status History
     StatusHistoryListView,
 )
@@ -17,9 +20,11 @@ urlpatterns = [
     # Hostel Requests
     path('hostel/', HostelRequestCreateView.as_view(), name='hostel-request-create'),
     path('hostel/eligibility/', HostelEligibilityView.as_view(), name='hostel-eligibility'),
+    path('hostel/eligibility/bulk/', BulkEligibilityView.as_view(), name='hostel-eligibility-bulk'),
     path('hostel/list/', HostelRequestListView.as_view(), name='hostel-request-list'),
     path('hostel/<int:pk>/', HostelRequestDetailView.as_view(), name='hostel-request-detail'),
     path('hostel/<int:pk>/status/', HostelRequestStatusView.as_view(), name='hostel-request-status'),
+    path('hostel/bulk/status/', HostelRequestBulkStatusView.as_view(), name='hostel-request-bulk-status'),
     
     # Swap Requests
     path('swap/', SwapRequestCreateView.as_view(), name='swap-create'),
@@ -33,7 +38,14 @@ urlpatterns = [
     path('outpass/list/', OutPassListView.as_view(), name='outpass-list'),
     path('outpass/<int:pk>/', OutPassDetailView.as_view(), name='outpass-detail'),
     path('outpass/<int:pk>/approve/', OutPassApprovalView.as_view(), name='outpass-approve'),
+    path('outpass/bulk/approve/', OutPassBulkApprovalView.as_view(), name='outpass-bulk-approve'),
+    path('outpass/verify/batch/', OutPassTokenBatchVerifyView.as_view(), name='outpass-verify-batch'),
     path('outpass/verify/<str:code>/', OutPassVerifyView.as_view(), name='outpass-verify'),
+    path('outpass/revocations/', OutPassRevocationListView.as_view(), name='outpass-revocations'),
+    path('outpass/<int:pk>/return/', OutPassReturnView.as_view(), name='outpass-return'),
+    path('outpass/presence/out/', OutPassPresenceView.as_view(), name='outpass-presence-out'),
+    path('outpass/presence/overdue/', OutPassOverdueView.as_view(), name='outpass-presence-overdue'),
+    path('outpass/presence/hostels/', OutPassAbsenceByHostelView.as_view(), name='outpass-presence-hostels'),
     
     # Status History
     path('history/', StatusHistoryListView.as_view(), name='status-history'),
@@ -0,0 +1,203 @@
+"""
+Outpass verification for gate scanning.
+
+Approving an outpass stores the verification response under its code until
+the end of its return date, so with a shared cache a scan is a cache read.
+A miss falls back to one select_related query (and re-caches approved
+outpasses); any later write to the outpass drops its entry. A process-local
+cache does not see other workers' drops, so there entries are capped by
+core.cache.cache_ttl and a hit still reads the outpass's status.
+
+Approved outpasses also carry a signed token that verifiers can check
+offline with the public key (see Signed Tokens below).
+"""
+import base64
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from cryptography.hazmat.primitives.serialization import Encoding, NoEncryption, PrivateFormat, PublicFormat
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from core.cache import cache_is_shared, cache_ttl
+from .models import OutPass, RequestStatus
+
+VERIFICATION_CACHE_PREFIX = 'outpass:verify:'
+
+def verification_cache_key(code):
+    return f'{VERIFICATION_CACHE_PREFIX}{code}'
+
+def build_verification_payload(outpass):
+    """Verification response for an approved outpass (student and profile must be loaded)"""
+    profile = getattr(outpass.student, 'profile', None)
+    return {
+        'valid': True,
+        'student_name': profile.full_name if profile else outpass.student.username,
+        'enrollment': profile.enrollment_number if profile else None,
+        'leave_date': outpass.leave_date,
+        'return_date': outpass.return_date,
+        'destination': outpass.destination,
+        'approved_at': outpass.approved_at,
+    }
+
+def verification_ttl(outpass):
+    """Seconds until the end of the outpass's return date (0 once it has passed)"""
+    expires = timezone.make_aware(datetime.combine(outpass.return_date + timedelta(days=1), time.min))
+    return max(int((expires - timezone.now()).total_seconds()), 0)
+
+def cache_verification(outpass):
+    """Cache an approved outpass's verification response until its return date ends"""
+    ttl = cache_ttl(verification_ttl(outpass))
+    if outpass.status == RequestStatus.APPROVED and outpass.verification_code and ttl:
+        cache.set(verification_cache_key(outpass.verification_code), build_verification_payload(outpass), ttl)
+
+def cache_verifications(outpass_ids):
+    """Cache many approved outpasses with one query"""
+    outpasses = OutPass.objects.filter(
+        id__in=outpass_ids, status=RequestStatus.APPROVED, verification_code__isnull=False
+    ).select_related('student__profile')
+    for outpass in outpasses:
+        cache_verification(outpass)
+
+def invalidate_verification(code):
+    if code:
+        cache.delete(verification_cache_key(code))
+
+def verify_outpass(code):
+    """Verification response for a scanned code: cached, or one query on a miss"""
+    payload = cache.get(verification_cache_key(code))
+    if payload is not None and cache_is_shared():
+        return payload
+    if payload is not None:
+        status = OutPass.objects.filter(verification_code=code).values_list('status', flat=True).first()
+        if status == RequestStatus.APPROVED:
+            return payload
+        invalidate_verification(code)
+        if status is None:
+            return {'valid': False, 'error': 'Invalid verification code'}
+        return {'valid': False, 'error': 'Outpass not approved'}
+
+    outpass = OutPass.objects.select_related('student__profile').filter(verification_code=code).first()
+    if outpass is None:
+        return {'valid': False, 'error': 'Invalid verification code'}
+    if outpass.status != RequestStatus.APPROVED:
+        return {'valid': False, 'error': 'Outpass not approved'}
+    cache_verification(outpass)
+    return build_verification_payload(outpass)
+
+# ================= Signed Tokens =================
+# A token is "id|enrollment|leave|return:signature", the signature being
+# Ed25519 over the payload with OUTPASS_TOKEN_PRIVATE_KEY. Gate verifiers
+# holding only the public key and a synced revocation list can validate it
+# without calling the backend, and cannot mint tokens themselves.
+
+REVOCATIONS_CACHE_KEY = 'outpass:revocations'
+REVOCATIONS_TTL = 60 * 5  # seconds; outpass writes invalidate it sooner
+MAX_BATCH_TOKENS = 500
+
+def encode_key_bytes(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+def decode_key_bytes(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+@lru_cache(maxsize=4)
+def load_signing_key(encoded):
+    try:
+        return Ed25519PrivateKey.from_private_bytes(decode_key_bytes(encoded))
+    except ValueError:
+        raise ImproperlyConfigured('OUTPASS_TOKEN_PRIVATE_KEY must be a base64 Ed25519 private key')
+
+def get_signing_key():
+    """The configured private key; there is deliberately no fallback to SECRET_KEY"""
+    encoded = settings.OUTPASS_TOKEN_PRIVATE_KEY
+    if not encoded:
+        raise ImproperlyConfigured('OUTPASS_TOKEN_PRIVATE_KEY is required to sign outpass tokens')
+    return load_signing_key(encoded)
+
+def get_public_key():
+    """Public half of the signing key, as handed to gate verifiers"""
+    return get_signing_key().public_key()
+
+def encode_public_key(public_key):
+    return encode_key_bytes(public_key.public_bytes(Encoding.Raw, PublicFormat.Raw))
+
+def load_public_key(encoded):
+    return Ed25519PublicKey.from_public_bytes(decode_key_bytes(encoded))
+
+def generate_signing_key():
+    """A new private key, encoded as OUTPASS_TOKEN_PRIVATE_KEY expects"""
+    return encode_key_bytes(Ed25519PrivateKey.generate().private_bytes(
+        Encoding.Raw, PrivateFormat.Raw, NoEncryption()
+    ))
+
+def make_outpass_token(outpass, enrollment=None):
+    """Signed token for an approved outpass (student profile must be loaded unless enrollment is given)"""
+    if enrollment is None:
+        profile = getattr(outpass.student, 'profile', None)
+        enrollment = profile.enrollment_number if profile else ''
+    payload = '|'.join([
+        str(outpass.id), enrollment,
+        outpass.leave_date.strftime('%Y%m%d'), outpass.return_date.strftime('%Y%m%d'),
+    ])
+    signature = get_signing_key().sign(payload.encode())
+    return f'{payload}:{encode_key_bytes(signature)}'
+
+def verify_outpass_token(token, revoked=frozenset(), today=None, public_key=None):
+    """
+    Check a token's signature, revocation and date window without touching the
+    database. Returns the same shape as verify_outpass.
+    """
+    try:
+        payload, signature = token.rsplit(':', 1)
+        (public_key or get_public_key()).verify(decode_key_bytes(signature), payload.encode())
+        outpass_id, enrollment, leave, return_ = payload.split('|')
+        outpass_id = int(outpass_id)
+        leave_date = datetime.strptime(leave, '%Y%m%d').date()
+        return_date = datetime.strptime(return_, '%Y%m%d').date()
+    except (InvalidSignature, ValueError, TypeError):
+        return {'valid': False, 'error': 'Invalid token'}
+
+    if outpass_id in revoked:
+        return {'valid': False, 'error': 'Outpass revoked', 'outpass_id': outpass_id}
+    today = today or timezone.localdate()
+    if not leave_date <= today <= return_date:
+        return {'valid': False, 'error': 'Outpass not valid today', 'outpass_id': outpass_id}
+    return {
+        'valid': True,
+        'outpass_id': outpass_id,
+        'enrollment': enrollment,
+        'leave_date': leave_date,
+        'return_date': return_date,
+    }
+
+def build_revocations(today=None):
+    """
+    Outpasses that were approved (so may carry a token) but no longer are,
+    while their return date has not passed. Expired tokens fail the date check
+    anyway, so the list stays small.
+    """
+    today = today or timezone.localdate()
+    return sorted(OutPass.objects.filter(
+        approved_at__isnull=False, return_date__gte=today
+    ).exclude(status=RequestStatus.APPROVED).values_list('id', flat=True))
+
+def get_revocations():
+    """Cached revocation list, rebuilt on a miss"""
+    revoked = cache.get(REVOCATIONS_CACHE_KEY)
+    if revoked is None:
+        revoked = build_revocations()
+        cache.set(REVOCATIONS_CACHE_KEY, revoked, cache_ttl(REVOCATIONS_TTL))
+    return revoked
+
+def invalidate_revocations():
+    cache.delete(REVOCATIONS_CACHE_KEY)
+
+def verify_outpass_tokens(tokens):
+    """Verify many tokens against one signer and one revocation list"""
+    public_key = get_public_key()
+    revoked = frozenset(get_revocations())
+    today = timezone.localdate()
+    return [verify_outpass_token(token, revoked, today, public_key) for token in tokens]
@@ -1,12 +1,18 @@
 from rest_framework import generics, permissions, status, views
 from rest_framework.response import Response
+from django.core.exceptions import ImproperlyConfigured
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from .models import HostelRequest, SwapRequest, OutPass, StatusHistory, RequestStatus
 from .serializers import (
-    HostelRequestSerializer, SwapRequestSerializer, SwapRequestCreateSerializer,
-    OutPassSerializer, OutPassCreateSerializer, StatusHistorySerializer
+    HostelRequestSerializer, HostelRequestListSerializer,
+    SwapRequestSerializer, SwapRequestListSerializer, SwapRequestCreateSerializer,
+    OutPassSerializer, OutPassListSerializer, OutPassCreateSerializer, StatusHistorySerializer
 )
+from .pagination import CreatedAtCursorPagination
+from .history import create_status_history
+from .verification import make_outpass_token
 from allocation.models import Allocation
 from users.models import StudentProfile
 import uuid
@@ -22,17 +28,6 @@ class IsOwnerOrWarden(permissions.BasePermission):
             return obj.student_a == request.user or obj.student_b == request.user
         return False
 
-def create_status_history(content_type, object_id, old_status, new_status, user, notes=''):
-    """Utility to create status history entry"""
-    StatusHistory.objects.create(
-        content_type=content_type,
-        object_id=object_id,
-        old_status=old_status,
-        new_status=new_status,
-        changed_by=user,
-        notes=notes
-    )
-
 # ================= Hostel Request Views =================
 
 class HostelRequestCreateView(generics.CreateAPIView):
@@ -102,33 +97,71 @@ class HostelEligibilityView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        from .semester_utils import check_hostel_eligibility, get_current_semester_info
+        from .semester_utils import get_semester_calendar
+        
+        # One calendar lookup serves both the eligibility and the semester info
+        calendar = get_semester_calendar()
         
         if not hasattr(request.user, 'profile') or not request.user.profile.enrollment_number:
             return Response({
                 'eligible': False,
                 'reason': 'Enrollment number not found. Please complete your profile.',
-                'semester_info': get_current_semester_info()
+                'semester_info': dict(calendar.semester_info)
             })
         
-        eligibility = check_hostel_eligibility(request.user.profile.enrollment_number)
-        eligibility['semester_info'] = get_current_semester_info()
+        eligibility = calendar.check_eligibility(request.user.profile.enrollment_number)
+        eligibility['semester_info'] = dict(calendar.semester_info)
         return Response(eligibility)
 
+class BulkEligibilityView(views.APIView):
+    """
+    Warden checks hostel eligibility for all students (or a filtered set).
+    GET reports counts by level and reason; POST with auto_reject=true also
+    rejects the pending requests of ineligible students.
+    Filters: pending_only, batch_year, level
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return self.evaluate(request, request.query_params, auto_reject=False)
+    
+    def post(self, request):
+        auto_reject = str(request.data.get('auto_reject', '')).lower() in ('1', 'true', 'yes')
+        return self.evaluate(request, request.data, auto_reject=auto_reject)
+    
+    def evaluate(self, request, params, auto_reject):
+        from .services import evaluate_bulk_eligibility
+        
+        filters = {}
+        for name in ('batch_year', 'level'):
+            if params.get(name) not in (None, ''):
+                try:
+                    filters[name] = int(params.get(name))
+                except (TypeError, ValueError):
+                    return Response({'error': f'{name} must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(evaluate_bulk_eligibility(
+            pending_only=str(params.get('pending_only', '')).lower() in ('1', 'true', 'yes'),
+            auto_reject=auto_reject,
+            changed_by=request.user,
+            **filters
+        ))
+
 class HostelRequestListView(generics.ListAPIView):
-    """List hostel requests - students see own, warden sees all"""
-    serializer_class = HostelRequestSerializer
+    """List hostel requests - students see own, warden sees all (cursor-paginated, without history)"""
+    serializer_class = HostelRequestListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         user = self.request.user
+        queryset = HostelRequest.objects.select_related('student__profile')
         if user.role == 'WARDEN' or user.is_staff:
-            queryset = HostelRequest.objects.all()
             status_filter = self.request.query_params.get('status')
             if status_filter:
                 queryset = queryset.filter(status=status_filter)
             return queryset
-        return HostelRequest.objects.filter(student=user)
+        return queryset.filter(student=user)
 
 class HostelRequestDetailView(generics.RetrieveUpdateAPIView):
     """View/update hostel request"""
@@ -189,6 +222,31 @@ class HostelRequestStatusView(views.APIView):
         except HostelRequest.DoesNotExist:
             return Response({'error': 'Request not found'}, status=status.HTTP_404_NOT_FOUND)
 
+class HostelRequestBulkStatusView(views.APIView):
+    """Warden rejects many hostel requests at once: {ids, status: REJECTED, rejection_reason}"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def post(self, request):
+        from .models import HostelRequestStatus
+        from .services import clean_bulk_ids, bulk_reject_hostel_requests
+        
+        try:
+            ids = clean_bulk_ids(request.data.get('ids'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if request.data.get('status') != HostelRequestStatus.REJECTED:
+            return Response(
+                {'error': 'Only rejection is allowed from this endpoint. Allocation is automatic.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        rejection_reason = str(request.data.get('rejection_reason', '')).strip()
+        if not rejection_reason:
+            return Response({'error': 'Rejection reason is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(bulk_reject_hostel_requests(ids, rejection_reason, request.user))
+
 # ================= Swap Request Views =================
 
 class SwapRequestCreateView(generics.CreateAPIView):
@@ -214,28 +272,34 @@ class SwapRequestCreateView(generics.CreateAPIView):
         )
 
 class SwapRequestListView(generics.ListAPIView):
-    """List swap requests"""
-    serializer_class = SwapRequestSerializer
+    """List swap requests (cursor-paginated, without history)"""
+    serializer_class = SwapRequestListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         user = self.request.user
+        # Names and rooms of both students come from this one query
+        queryset = SwapRequest.objects.select_related(
+            'student_a__profile', 'student_a__allocation__room__hostel',
+            'student_b__profile', 'student_b__allocation__room__hostel'
+        )
         if user.role == 'WARDEN' or user.is_staff:
-            queryset = SwapRequest.objects.all()
             status_filter = self.request.query_params.get('status')
             if status_filter:
                 queryset = queryset.filter(status=status_filter)
             return queryset
         # Students see swaps they initiated or received
-        return SwapRequest.objects.filter(
-            student_a=user
-        ) | SwapRequest.objects.filter(student_b=user)
+        return queryset.filter(Q(student_a=user) | Q(student_b=user))
 
 class SwapRequestDetailView(generics.RetrieveAPIView):
     """View swap request details"""
     serializer_class = SwapRequestSerializer
     permission_classes = [IsOwnerOrWarden]
-    queryset = SwapRequest.objects.all()
+    queryset = SwapRequest.objects.select_related(
+        'student_a__profile', 'student_a__allocation__room__hostel',
+        'student_b__profile', 'student_b__allocation__room__hostel'
+    )
 
 class SwapRequestRespondView(views.APIView):
     """Student B responds to swap request (agree/decline)"""
@@ -352,19 +416,20 @@ class OutPassCreateView(generics.CreateAPIView):
         )
 
 class OutPassListView(generics.ListAPIView):
-    """List outpasses"""
-    serializer_class = OutPassSerializer
+    """List outpasses (cursor-paginated, without history)"""
+    serializer_class = OutPassListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         user = self.request.user
+        queryset = OutPass.objects.select_related('student__profile')
         if user.role == 'WARDEN' or user.is_staff:
-            queryset = OutPass.objects.all()
             status_filter = self.request.query_params.get('status')
             if status_filter:
                 queryset = queryset.filter(status=status_filter)
             return queryset
-        return OutPass.objects.filter(student=user)
+        return queryset.filter(student=user)
 
 class OutPassDetailView(generics.RetrieveAPIView):
     """View outpass details"""
@@ -378,7 +443,7 @@ class OutPassApprovalView(views.APIView):
     
     def post(self, request, pk):
         try:
-            outpass = OutPass.objects.get(pk=pk)
+            outpass = OutPass.objects.select_related('student__profile').get(pk=pk)
             
             if outpass.status not in [RequestStatus.PENDING, RequestStatus.VIEWED]:
                 return Response({'error': 'Cannot process this request'}, status=status.HTTP_400_BAD_REQUEST)
@@ -396,6 +461,12 @@ class OutPassApprovalView(views.APIView):
                 outpass.status = RequestStatus.REJECTED
                 message = 'Outpass rejected'
             
+            # Signed before saving, so a missing token key refuses the approval outright
+            try:
+                signed_token = make_outpass_token(outpass) if approved else None
+            except ImproperlyConfigured as e:
+                return Response({'error': f'Outpass approval is unavailable: {e}'},
+                                status=status.HTTP_503_SERVICE_UNAVAILABLE)
             outpass.warden_notes = notes
             outpass.save()
             
@@ -404,36 +475,137 @@ class OutPassApprovalView(views.APIView):
                 request.user, f'{message}. {notes}'
             )
             
+            if approved:
+                # Gate scans are then served from cache until the return date
+                from .verification import cache_verification
+                transaction.on_commit(lambda: cache_verification(outpass))
+            
             return Response({
                 'message': message, 
                 'status': outpass.status,
-                'verification_code': outpass.verification_code if approved else None
+                'verification_code': outpass.verification_code if approved else None,
+                'signed_token': signed_token
             })
         except OutPass.DoesNotExist:
             return Response({'error': 'Request not found'}, status=status.HTTP_404_NOT_FOUND)
 
+class OutPassBulkApprovalView(views.APIView):
+    """Warden approves/rejects many outpasses at once: {ids, approve, notes}"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def post(self, request):
+        from .services import clean_bulk_ids, bulk_process_outpasses
+        
+        try:
+            ids = clean_bulk_ids(request.data.get('ids'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            return Response(bulk_process_outpasses(
+                ids, bool(request.data.get('approve', False)), request.data.get('notes', ''), request.user
+            ))
+        except ImproperlyConfigured as e:
+            return Response({'error': f'Outpass approval is unavailable: {e}'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
 class OutPassVerifyView(views.APIView):
     """Verify outpass by verification code (for authorities)"""
     permission_classes = [permissions.AllowAny]  # Authorities may not be logged in
     
     def get(self, request, code):
+        from .verification import verify_outpass
+        return Response(verify_outpass(code))
+
+class OutPassTokenBatchVerifyView(views.APIView):
+    """Verify many signed outpass tokens at once: {tokens: [...]}"""
+    permission_classes = [permissions.AllowAny]  # Gate devices, like OutPassVerifyView
+    
+    def post(self, request):
+        from .verification import verify_outpass_tokens, MAX_BATCH_TOKENS
+        
+        tokens = request.data.get('tokens')
+        if not isinstance(tokens, list) or not all(isinstance(token, str) for token in tokens):
+            return Response({'error': 'tokens must be a list of strings'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(tokens) > MAX_BATCH_TOKENS:
+            return Response({'error': f'At most {MAX_BATCH_TOKENS} tokens per request'}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            outpass = OutPass.objects.get(verification_code=code)
-            
-            if outpass.status != RequestStatus.APPROVED:
-                return Response({'valid': False, 'error': 'Outpass not approved'})
-            
-            return Response({
-                'valid': True,
-                'student_name': outpass.student.profile.full_name if hasattr(outpass.student, 'profile') else outpass.student.username,
-                'enrollment': outpass.student.profile.enrollment_number if hasattr(outpass.student, 'profile') else None,
-                'leave_date': outpass.leave_date,
-                'return_date': outpass.return_date,
-                'destination': outpass.destination,
-                'approved_at': outpass.approved_at
-            })
+            return Response({'results': verify_outpass_tokens(tokens)})
+        except ImproperlyConfigured as e:
+            return Response({'error': f'Token verification is unavailable: {e}'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+class OutPassRevocationListView(views.APIView):
+    """Revoked outpass ids that offline verifiers must reject"""
+    permission_classes = [permissions.AllowAny]
+    
+    def get(self, request):
+        from .verification import get_revocations
+        return Response({'revoked': get_revocations(), 'generated_at': timezone.now()})
+
+class OutPassReturnView(views.APIView):
+    """Warden marks a student back from an approved outpass"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def post(self, request, pk):
+        try:
+            outpass = OutPass.objects.get(pk=pk)
         except OutPass.DoesNotExist:
-            return Response({'valid': False, 'error': 'Invalid verification code'})
+            return Response({'error': 'Request not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if outpass.status != RequestStatus.APPROVED:
+            return Response({'error': 'Only approved outpasses can be marked returned'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        outpass.status = RequestStatus.COMPLETED
+        outpass.save()
+        create_status_history(
+            'outpass', pk, RequestStatus.APPROVED, RequestStatus.COMPLETED,
+            request.user, 'Student returned'
+        )
+        return Response({'message': 'Student marked as returned', 'status': outpass.status})
+
+# ================= Outpass Presence Views =================
+
+def parse_presence_date(request):
+    """?date=YYYY-MM-DD, defaulting to today; None if malformed"""
+    from datetime import date
+    value = request.query_params.get('date')
+    if not value:
+        return timezone.localdate()
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+class OutPassPresenceView(views.APIView):
+    """Students out on an approved outpass on ?date= (default today)"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        from .presence import students_out_on
+        day = parse_presence_date(request)
+        if day is None:
+            return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(students_out_on(day))
+
+class OutPassOverdueView(views.APIView):
+    """Approved outpasses past their return date that are not marked returned"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        from .presence import overdue_outpasses
+        return Response(overdue_outpasses())
+
+class OutPassAbsenceByHostelView(views.APIView):
+    """Number of students out per hostel on ?date= (default today)"""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        from .presence import absence_counts_by_hostel
+        day = parse_presence_date(request)
+        if day is None:
+            return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(absence_counts_by_hostel(day))
 
 # ================= Status History View =================
 
@@ -450,5 +622,5 @@ class StatusHistoryListView(generics.ListAPIView):
             return StatusHistory.objects.filter(
                 content_type=content_type,
                 object_id=object_id
-            )
+            ).select_related('changed_by__profile')
         return StatusHistory.objects.none()
@@ -0,0 +1,266 @@
+"""
+Bulk import of students and survey profiles from registrar exports.
+
+Records are streamed from CSV or JSON Lines (plain JSON arrays are also
+accepted but are parsed whole), validated, and inserted with bulk_create in
+batches. bulk_create does not send post_save, so create_student_profile is
+bypassed and profiles are built here with the same email-derived enrollment.
+
+Bad records (including JSON Lines that do not parse or are not objects) are
+rejected one by one. If the stream itself becomes unreadable part way through,
+the import stops there and the report carries the error next to what was
+already created.
+"""
+import csv
+import json
+import time
+from datetime import datetime
+from django.db import transaction
+from django.contrib.auth.hashers import make_password
+from .models import CustomUser, StudentProfile, enrollment_from_email, generate_fallback_enrollment
+
+SUPPORTED_FORMATS = ('csv', 'json', 'jsonl')
+SURVEY_SCALE_FIELDS = ('cleanliness', 'guest_tolerance', 'dominance')
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', ''}
+
+
+class ImportRecordError(ValueError):
+    """A record that cannot be imported; the message is reported as the reject reason"""
+
+
+def iter_records(stream, fmt):
+    """
+    Yield (line_number, record) from a text stream. Records should be dicts;
+    a JSON Lines line that does not parse is yielded as its ImportRecordError.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    record = ImportRecordError(f'invalid JSON: {e}')
+                yield line_number, record
+    elif fmt == 'json':
+        records = json.load(stream)
+        if not isinstance(records, list):
+            raise ValueError('expected a JSON array of records')
+        for index, record in enumerate(records, start=1):
+            yield index, record
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value or '').strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ImportRecordError(f"requires_darkness: '{value}' is not a yes/no value")
+
+
+def record_email(record):
+    """The raw email of a record for reject reports, if it has one"""
+    return record.get('email') if isinstance(record, dict) else None
+
+
+def clean_record(record):
+    """Normalize and validate one input record. Raises ImportRecordError."""
+    if isinstance(record, ImportRecordError):
+        raise record
+    if not isinstance(record, dict):
+        raise ImportRecordError('record is not an object')
+
+    email = str(record.get('email') or '').strip().lower()
+    if not email or '@' not in email:
+        raise ImportRecordError('email is missing or invalid')
+
+    gender = str(record.get('gender') or CustomUser.Gender.MALE).strip().upper()
+    if gender not in CustomUser.Gender.values:
+        raise ImportRecordError(f"gender: '{gender}' is not one of {', '.join(CustomUser.Gender.values)}")
+
+    cleaned = {
+        'email': email,
+        'username': email.split('@')[0],
+        'first_name': str(record.get('first_name') or '').strip()[:150],
+        'last_name': str(record.get('last_name') or '').strip()[:150],
+        'full_name': str(record.get('full_name') or '').strip()[:200],
+        'gender': gender,
+        'wake_up_time': None,
+        'requires_darkness': _parse_bool(record.get('requires_darkness')),
+    }
+
+    wake_up_time = str(record.get('wake_up_time') or '').strip()
+    if wake_up_time:
+        try:
+            cleaned['wake_up_time'] = datetime.strptime(wake_up_time[:5], '%H:%M').time()
+        except ValueError:
+            raise ImportRecordError(f"wake_up_time: '{wake_up_time}' is not HH:MM")
+
+    for field in SURVEY_SCALE_FIELDS:
+        raw = record.get(field)
+        if raw in (None, ''):
+            cleaned[field] = 3
+            continue
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            raise ImportRecordError(f"{field}: '{raw}' is not a number")
+        if not 1 <= value <= 5:
+            raise ImportRecordError(f"{field}: {value} is outside the 1-5 scale")
+        cleaned[field] = value
+
+    # Survey counts as complete when the registrar export carries the answers
+    cleaned['is_profile_complete'] = bool(wake_up_time) and all(
+        record.get(field) not in (None, '') for field in SURVEY_SCALE_FIELDS
+    )
+    return cleaned
+
+
+class StudentImporter:
+    """Validate and bulk-insert student records in batches"""
+
+    def __init__(self, batch_size=1000, dry_run=False, progress=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.created = 0
+        self.processed = 0
+        self.rejects = []
+        self.error = None
+        # Password hashing is slow; every imported student shares one unusable hash
+        self.unusable_password = make_password(None)
+
+    def run(self, records):
+        started = time.perf_counter()
+        batch = []
+        records = iter(records)
+        while True:
+            try:
+                line_number, record = next(records)
+            except StopIteration:
+                break
+            except (ValueError, csv.Error) as e:
+                # Undecodable or malformed stream: nothing after this point can be read
+                self.error = f'Could not parse file after record {self.processed}: {e}'
+                break
+            self.processed += 1
+            try:
+                batch.append((line_number, clean_record(record)))
+            except ImportRecordError as e:
+                self.rejects.append({'line': line_number, 'email': record_email(record), 'reason': str(e)})
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+        elapsed = time.perf_counter() - started
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'rejected': len(self.rejects),
+            'rejects': self.rejects,
+            'elapsed_seconds': round(elapsed, 2),
+            'rows_per_second': round(self.processed / elapsed) if elapsed > 0 else self.processed,
+            'dry_run': self.dry_run,
+            'error': self.error,
+        }
+
+    def _reject(self, line_number, cleaned, reason):
+        self.rejects.append({'line': line_number, 'email': cleaned['email'], 'reason': reason})
+
+    def _flush(self, batch):
+        emails = [cleaned['email'] for _, cleaned in batch]
+        usernames = [cleaned['username'] for _, cleaned in batch]
+        existing_emails = set(CustomUser.objects.filter(email__in=emails).values_list('email', flat=True))
+        existing_usernames = set(CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+        accepted = []
+        for line_number, cleaned in batch:
+            if cleaned['email'] in existing_emails:
+                self._reject(line_number, cleaned, 'email already exists')
+                continue
+            if cleaned['username'] in existing_usernames:
+                self._reject(line_number, cleaned, 'username already exists')
+                continue
+            existing_emails.add(cleaned['email'])
+            existing_usernames.add(cleaned['username'])
+            enrollment, batch_year = enrollment_from_email(cleaned['email'])
+            accepted.append((line_number, cleaned, enrollment or generate_fallback_enrollment(),
+                             batch_year, enrollment is None))
+
+        # Enrollment numbers must be unique across the table and within the batch
+        taken = set(StudentProfile.objects.filter(
+            enrollment_number__in=[enrollment for _, _, enrollment, _, _ in accepted]
+        ).values_list('enrollment_number', flat=True))
+
+        rows = []
+        for line_number, cleaned, enrollment, batch_year, generated in accepted:
+            if enrollment in taken:
+                if not generated:
+                    self._reject(line_number, cleaned, f'enrollment {enrollment} already exists')
+                    continue
+                while enrollment in taken or StudentProfile.objects.filter(enrollment_number=enrollment).exists():
+                    enrollment = generate_fallback_enrollment()
+            taken.add(enrollment)
+            rows.append((cleaned, enrollment, batch_year))
+
+        if not self.dry_run and rows:
+            self._insert(rows)
+        # In a dry run this counts the students that would have been created
+        self.created += len(rows)
+        self._report()
+
+    def _insert(self, rows):
+        with transaction.atomic():
+            CustomUser.objects.bulk_create([
+                CustomUser(
+                    email=cleaned['email'],
+                    username=cleaned['username'],
+                    first_name=cleaned['first_name'],
+                    last_name=cleaned['last_name'],
+                    password=self.unusable_password,
+                    role=CustomUser.Role.STUDENT,
+                    gender=cleaned['gender'],
+                    is_profile_complete=cleaned['is_profile_complete'],
+                )
+                for cleaned, _, _ in rows
+            ], batch_size=self.batch_size)
+
+            # Not every backend returns primary keys from bulk_create (MySQL does not)
+            user_ids = dict(CustomUser.objects.filter(
+                email__in=[cleaned['email'] for cleaned, _, _ in rows]
+            ).values_list('email', 'id'))
+
+            profiles = [
+                StudentProfile(
+                    user_id=user_ids[cleaned['email']],
+                    enrollment_number=enrollment,
+                    batch=batch_year,
+                    full_name=cleaned['full_name'] or
+                    f"{cleaned['first_name']} {cleaned['last_name']}".strip() or cleaned['username'],
+                    wake_up_time=cleaned['wake_up_time'],
+                    requires_darkness=cleaned['requires_darkness'],
+                    cleanliness=cleaned['cleanliness'],
+                    guest_tolerance=cleaned['guest_tolerance'],
+                    dominance=cleaned['dominance'],
+                )
+                for cleaned, enrollment, batch_year in rows
+            ]
+            # bulk_create skips save(), so fill the materialized columns here
+            for profile in profiles:
+                profile.refresh_eligibility()
+            StudentProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+
+    def _report(self):
+        if self.progress:
+            self.progress(self.processed, self.created, len(self.rejects))
@@ -1,82 +1,133 @@
 """
 Management command to fix empty enrollment numbers in the database.
+
+Works set-based: all existing enrollment numbers are loaded once, new ones are
+generated in memory against that set, and changes are written with
+bulk_update/bulk_create in chunks.
 """
-import uuid
-import re
 from django.core.management.base import BaseCommand
-from users.models import StudentProfile, CustomUser
+from django.db import transaction
+from users.models import StudentProfile, CustomUser, enrollment_from_email, generate_fallback_enrollment
+from users.me import invalidate_all_me
 
 
 class Command(BaseCommand):
     help = 'Fix empty or duplicate enrollment numbers in StudentProfile'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--verbose-rows', action='store_true', help='Print every fixed/created profile')
+
     def handle(self, *args, **options):
-        # Find profiles with empty enrollment_number
-        empty_profiles = StudentProfile.objects.filter(enrollment_number='')
-        
-        self.stdout.write(f"Found {empty_profiles.count()} profiles with empty enrollment numbers")
-        
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.verbose_rows = options['verbose_rows']
+
+        # Every enrollment number already in use, loaded once
+        used = set(
+            StudentProfile.objects.exclude(enrollment_number='').values_list('enrollment_number', flat=True)
+        )
+
+        fixed = self.fix_empty_enrollments(used)
+        created = self.create_missing_profiles(used)
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING(f"[dry run] Would fix {fixed} and create {created} profiles"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} and created {created} profiles"))
+        self.stdout.write(self.style.SUCCESS('Done!'))
+
+    def unique_enrollment(self, email, used):
+        """Enrollment derived from email, or a generated one, not already in `used`"""
+        enrollment, batch = enrollment_from_email(email)
+        if not enrollment:
+            enrollment = generate_fallback_enrollment()
+        while enrollment in used:
+            enrollment = generate_fallback_enrollment()
+        used.add(enrollment)
+        return enrollment, batch
+
+    def progress(self, label, done, total):
+        self.stdout.write(f"  {label}: {done}/{total}", ending='\r')
+
+    def fix_empty_enrollments(self, used):
+        # Materialized up front: the writes below change the rows this filter matches
+        empty_profiles = list(StudentProfile.objects.filter(
+            enrollment_number=''
+        ).select_related('user').only(
+            'id', 'batch', 'enrollment_number', 'batch_year', 'level', 'hostel_eligible', 'user__email'
+        ))
+
+        total = len(empty_profiles)
+        self.stdout.write(f"Found {total} profiles with empty enrollment numbers")
+
+        pending = []
+        done = 0
         for profile in empty_profiles:
-            user = profile.user
-            email = user.email
-            
-            # Try to generate from email
-            match = re.search(r'^([a-zA-Z]{2,4})(\d{2})(\d{3})@std\.uwu\.ac\.lk$', email)
-            if match:
-                deg = match.group(1).upper()
-                yr = match.group(2)
-                num = match.group(3)
-                enrollment = f"UWU/{deg}/{yr}/{num}"
-                profile.batch = yr
-            else:
-                # Fallback: Generate unique ID
-                short_id = str(uuid.uuid4())[:8].upper()
-                enrollment = f"UWU/GEN/{short_id}"
-            
-            # Ensure uniqueness
-            while StudentProfile.objects.filter(enrollment_number=enrollment).exclude(pk=profile.pk).exists():
-                short_id = str(uuid.uuid4())[:8].upper()
-                enrollment = f"UWU/GEN/{short_id}"
-            
+            enrollment, batch = self.unique_enrollment(profile.user.email, used)
             profile.enrollment_number = enrollment
-            profile.save()
-            self.stdout.write(self.style.SUCCESS(f"Fixed: {user.email} -> {enrollment}"))
-        
+            if batch:
+                profile.batch = batch
+            profile.refresh_eligibility()
+            pending.append(profile)
+            if self.verbose_rows:
+                self.stdout.write(f"Fixed: {profile.user.email} -> {enrollment}")
+
+            if len(pending) >= self.batch_size:
+                done += self.write_updates(pending)
+                pending = []
+                self.progress('fixed', done, total)
+        done += self.write_updates(pending)
+        self.stdout.write('')
+        return done
+
+    def write_updates(self, profiles):
+        if profiles and not self.dry_run:
+            with transaction.atomic():
+                StudentProfile.objects.bulk_update(
+                    profiles, ['enrollment_number', 'batch', 'batch_year', 'level', 'hostel_eligible']
+                )
+                # bulk_update sends no post_save, so cached "me" payloads are dropped here
+                transaction.on_commit(invalidate_all_me)
+        return len(profiles)
+
+    def create_missing_profiles(self, used):
         # Also create profiles for students who don't have one
-        students_without_profile = CustomUser.objects.filter(
-            role=CustomUser.Role.STUDENT
-        ).exclude(
-            id__in=StudentProfile.objects.values_list('user_id', flat=True)
-        )
-        
-        self.stdout.write(f"Found {students_without_profile.count()} students without profiles")
-        
+        students_without_profile = list(CustomUser.objects.filter(
+            role=CustomUser.Role.STUDENT,
+            profile__isnull=True
+        ).only('id', 'email', 'username', 'first_name', 'last_name'))
+
+        total = len(students_without_profile)
+        self.stdout.write(f"Found {total} students without profiles")
+
+        pending = []
+        done = 0
         for user in students_without_profile:
-            email = user.email
-            
-            match = re.search(r'^([a-zA-Z]{2,4})(\d{2})(\d{3})@std\.uwu\.ac\.lk$', email)
-            if match:
-                deg = match.group(1).upper()
-                yr = match.group(2)
-                num = match.group(3)
-                enrollment = f"UWU/{deg}/{yr}/{num}"
-                batch = yr
-            else:
-                short_id = str(uuid.uuid4())[:8].upper()
-                enrollment = f"UWU/GEN/{short_id}"
-                batch = ''
-            
-            # Ensure uniqueness
-            while StudentProfile.objects.filter(enrollment_number=enrollment).exists():
-                short_id = str(uuid.uuid4())[:8].upper()
-                enrollment = f"UWU/GEN/{short_id}"
-            
-            StudentProfile.objects.create(
+            enrollment, batch = self.unique_enrollment(user.email, used)
+            profile = StudentProfile(
                 user=user,
                 enrollment_number=enrollment,
                 full_name=user.get_full_name() or user.username,
                 batch=batch
             )
-            self.stdout.write(self.style.SUCCESS(f"Created profile: {user.email} -> {enrollment}"))
-        
-        self.stdout.write(self.style.SUCCESS('Done!'))
+            profile.refresh_eligibility()
+            pending.append(profile)
+            if self.verbose_rows:
+                self.stdout.write(f"Created profile: {user.email} -> {enrollment}")
+
+            if len(pending) >= self.batch_size:
+                done += self.write_creates(pending)
+                pending = []
+                self.progress('created', done, total)
+        done += self.write_creates(pending)
+        self.stdout.write('')
+        return done
+
+    def write_creates(self, profiles):
+        if profiles and not self.dry_run:
+            with transaction.atomic():
+                StudentProfile.objects.bulk_create(profiles)
+                transaction.on_commit(invalidate_all_me)
+        return len(profiles)
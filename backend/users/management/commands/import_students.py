@@ -0,0 +1,51 @@
+"""
+Management command to bulk import students from a registrar export (CSV, JSON Lines or JSON).
+
+Expected columns/keys: email (required), first_name, last_name, full_name, gender,
+wake_up_time (HH:MM), requires_darkness, cleanliness, guest_tolerance, dominance.
+"""
+import os
+from django.core.management.base import BaseCommand, CommandError
+from users.importers import StudentImporter, iter_records, SUPPORTED_FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Bulk import students and survey profiles from a CSV/JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=SUPPORTED_FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, do not write')
+        parser.add_argument('--show-rejects', type=int, default=20, help='How many rejects to print')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in SUPPORTED_FORMATS:
+            raise CommandError(f"Cannot infer format from '{path}'. Pass --format.")
+
+        def progress(processed, created, rejected):
+            self.stdout.write(f"  processed {processed}, created {created}, rejected {rejected}", ending='\r')
+
+        importer = StudentImporter(
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            progress=progress
+        )
+        with open(path, newline='', encoding='utf-8-sig') as stream:
+            result = importer.run(iter_records(stream, fmt))
+
+        self.stdout.write('')
+        for reject in result['rejects'][:options['show_rejects']]:
+            self.stdout.write(self.style.WARNING(f"Line {reject['line']} ({reject['email']}): {reject['reason']}"))
+
+        verb = 'Would create' if result['dry_run'] else 'Created'
+        self.stdout.write(
+            f"{verb} {result['created']} of {result['processed']} students, "
+            f"rejected {result['rejected']} in {result['elapsed_seconds']}s "
+            f"({result['rows_per_second']} rows/s)"
+        )
+        if result['error']:
+            raise CommandError(result['error'])
+        self.stdout.write(self.style.SUCCESS('Done!'))
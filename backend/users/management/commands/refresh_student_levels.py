@@ -0,0 +1,55 @@
+"""
+Management command to refresh the materialized batch_year, level and hostel_eligible columns.
+
+Levels move at the start of each academic year (November) and 400 Level eligibility
+changes between semesters, so schedule this at every semester rollover
+(e.g. cron on 1 November and 1 April).
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from users.models import StudentProfile
+from users.me import invalidate_all_me
+from student_requests.semester_utils import get_profile_eligibility_fields, get_semester_calendar
+
+ELIGIBILITY_FIELDS = ['batch_year', 'level', 'hostel_eligible']
+
+
+class Command(BaseCommand):
+    help = 'Recompute batch year, level and hostel eligibility for every student profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        profiles = StudentProfile.objects.only('id', 'enrollment_number', *ELIGIBILITY_FIELDS)
+
+        # One calendar for the whole run, even if it crosses midnight
+        calendar = get_semester_calendar()
+
+        changed = []
+        checked = 0
+        updated = 0
+        for profile in profiles.iterator(chunk_size=batch_size):
+            checked += 1
+            fields = get_profile_eligibility_fields(profile.enrollment_number, calendar)
+            if any(getattr(profile, field) != value for field, value in fields.items()):
+                for field, value in fields.items():
+                    setattr(profile, field, value)
+                changed.append(profile)
+
+            if len(changed) >= batch_size:
+                updated += self.write(changed)
+                changed = []
+        updated += self.write(changed)
+
+        self.stdout.write(f"Checked {checked} profiles, updated {updated}")
+        self.stdout.write(self.style.SUCCESS('Done!'))
+
+    def write(self, profiles):
+        if profiles:
+            with transaction.atomic():
+                StudentProfile.objects.bulk_update(profiles, ELIGIBILITY_FIELDS)
+                # bulk_update sends no post_save, so cached "me" payloads are dropped here
+                transaction.on_commit(invalidate_all_me)
+        return len(profiles)
@@ -0,0 +1,108 @@
+"""
+The "me" payload served by CurrentUserView on every page load.
+
+It is assembled from two queries (the user joined to profile, allocation,
+room, hostel and bed; then the room's beds joined to their occupants) and
+cached per user. Roommates without a bed are not reached through the beds,
+so when the room has any, a third query lists roommates by allocation. Serializers are fed the pre-loaded objects, so the payload
+keeps the exact shape of UserSerializer/AllocationSerializer output.
+
+Invalidation:
+  - profile or user writes drop the user's entry and their roommates' (who
+    see the name and enrollment);
+  - allocation, bed, room or hostel writes bump a generation number that is
+    part of every key, since they can change many students' rooms and
+    roommates at once. Those are rare compared with page loads.
+Both only reach other workers through a shared cache; on a process-local one
+entries expire within core.cache.cache_ttl's cap instead.
+"""
+import time
+from django.core.cache import cache
+from django.db.models import Count
+from core.cache import cache_ttl
+from .models import CustomUser
+
+ME_CACHE_PREFIX = 'users:me'
+ME_GENERATION_KEY = 'users:me:generation'
+ME_CACHE_TTL = 60 * 10  # seconds; writes invalidate it sooner
+
+def _generation():
+    generation = cache.get(ME_GENERATION_KEY)
+    if generation is None:
+        # A fresh, never-used number, so entries from before an eviction stay unreachable
+        cache.add(ME_GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(ME_GENERATION_KEY)
+    return generation
+
+def me_cache_key(user_id, generation=None):
+    return f'{ME_CACHE_PREFIX}:{generation or _generation()}:{user_id}'
+
+def build_me_payload(user_id):
+    """The CurrentUserView response for a user, from two queries (three if a roommate has no bed)"""
+    from housing.models import Bed
+    from allocation.serializers import AllocationSerializer
+    from .serializers import StudentProfileSerializer
+
+    user = CustomUser.objects.select_related(
+        'profile', 'allocation__room__hostel', 'allocation__bed'
+    ).annotate(room_allocations=Count('allocation__room__allocations')).get(pk=user_id)
+
+    profile = getattr(user, 'profile', None)
+    allocation = getattr(user, 'allocation', None)
+
+    allocation_data = None
+    if allocation is not None:
+        room = allocation.room
+        beds = list(Bed.objects.filter(room=room).select_related('allocation__student__profile'))
+        # RoomSerializer lists room.beds; get_roommates uses the occupants already joined
+        room._prefetched_objects_cache = {'beds': beds}
+        occupants = [bed.allocation for bed in beds if getattr(bed, 'allocation', None) is not None]
+        if len(occupants) == user.room_allocations:
+            allocation.prefetched_roommates = [
+                occupant for occupant in occupants if occupant.student_id != user.id
+            ]
+        # Otherwise some allocations have no bed and get_roommates queries them itself
+        allocation_data = AllocationSerializer(allocation).data
+
+    return {
+        'id': user.id,
+        'email': user.email,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'role': user.role,
+        'gender': user.gender,
+        'is_profile_complete': user.is_profile_complete,
+        'profile': StudentProfileSerializer(profile).data if profile else None,
+        'allocation': allocation_data
+    }
+
+def get_me_payload(user):
+    """Cached "me" payload, rebuilt on a miss"""
+    key = me_cache_key(user.id)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_me_payload(user.id)
+        cache.set(key, payload, cache_ttl(ME_CACHE_TTL))
+    return payload
+
+def invalidate_me(user_ids):
+    """Drop the cached payloads of specific users"""
+    generation = _generation()
+    cache.delete_many([me_cache_key(user_id, generation) for user_id in user_ids])
+
+def invalidate_me_with_roommates(user_id):
+    """Drop a user's payload and those of everyone sharing their room"""
+    from allocation.models import Allocation
+    room_id = Allocation.objects.filter(student_id=user_id).values_list('room_id', flat=True).first()
+    user_ids = {user_id}
+    if room_id is not None:
+        user_ids.update(Allocation.objects.filter(room_id=room_id).values_list('student_id', flat=True))
+    invalidate_me(user_ids)
+
+def invalidate_all_me():
+    """Make every cached payload stale (old generations simply expire)"""
+    try:
+        cache.incr(ME_GENERATION_KEY)
+    except ValueError:
+        cache.set(ME_GENERATION_KEY, time.time_ns(), None)
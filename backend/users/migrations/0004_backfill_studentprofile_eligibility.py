@@ -0,0 +1,65 @@
+# Generated by Django 6.0 on 2026-10-19 11:42
+
+import re
+from datetime import date
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def eligibility_fields(enrollment_number, today):
+    """
+    batch_year, level and hostel_eligible under the rules of
+    student_requests.semester_utils as they stood when this migration was
+    written. Copied rather than imported so the backfill does not change with
+    them; refresh_student_levels applies the current rules afterwards.
+    """
+    batch_year = None
+    if enrollment_number and '/' in enrollment_number:
+        # UWU/CST/22/002; generated UWU/GEN/XXXXXXXX carry no batch
+        batch_year = next(
+            (int(part) for part in enrollment_number.split('/') if part.isdigit() and len(part) == 2), None
+        )
+    elif enrollment_number:
+        match = re.search(r'[a-zA-Z]+(\d{2})', enrollment_number)
+        batch_year = int(match.group(1)) if match else None
+    if not batch_year:
+        return {'batch_year': None, 'level': None, 'hostel_eligible': False}
+
+    # Academic years start in November; April-September is the 2nd semester
+    academic_start_year = today.year if today.month >= 11 else today.year - 1
+    years_in_system = academic_start_year - (2000 + batch_year) + 1
+    if years_in_system < 1:
+        level = None
+    else:
+        level = {1: 100, 2: 100, 3: 200, 4: 300}.get(years_in_system, 400)
+    semester = 2 if 4 <= today.month <= 9 else 1
+
+    eligible = level != 200 and not (level == 400 and semester == 2)
+    return {'batch_year': batch_year, 'level': level, 'hostel_eligible': eligible}
+
+
+def backfill_eligibility(apps, schema_editor):
+    StudentProfile = apps.get_model('users', 'StudentProfile')
+    today = date.today()
+    pending = []
+    for profile in StudentProfile.objects.only('id', 'enrollment_number').iterator(chunk_size=BATCH_SIZE):
+        for field, value in eligibility_fields(profile.enrollment_number, today).items():
+            setattr(profile, field, value)
+        pending.append(profile)
+        if len(pending) >= BATCH_SIZE:
+            StudentProfile.objects.bulk_update(pending, ['batch_year', 'level', 'hostel_eligible'])
+            pending = []
+    if pending:
+        StudentProfile.objects.bulk_update(pending, ['batch_year', 'level', 'hostel_eligible'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_studentprofile_eligibility_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_eligibility, migrations.RunPython.noop),
+    ]
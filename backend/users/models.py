@@ -3,6 +3,7 @@ from django.contrib.auth.models import AbstractUser
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 import re
+import uuid
 
 class CustomUser(AbstractUser):
     class Role(models.TextChoices):
@@ -30,6 +31,12 @@ class StudentProfile(models.Model):
     enrollment_number = models.CharField(max_length=50, unique=True)
     batch = models.CharField(max_length=10, blank=True)
     
+    # Materialized from enrollment_number and the academic calendar so eligibility
+    # filters are indexed lookups. Refreshed on save and by refresh_student_levels.
+    batch_year = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True)
+    level = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True)
+    hostel_eligible = models.BooleanField(default=False, db_index=True)
+    
     # Survey Data
     wake_up_time = models.TimeField(null=True, blank=True)
     requires_darkness = models.BooleanField(default=False)
@@ -39,6 +46,37 @@ class StudentProfile(models.Model):
 
     def __str__(self):
         return f"{self.enrollment_number} ({self.user.username})"
+    
+    def refresh_eligibility(self):
+        """Recompute batch_year, level and hostel_eligible (does not save)"""
+        from student_requests.semester_utils import get_profile_eligibility_fields
+        for field, value in get_profile_eligibility_fields(self.enrollment_number).items():
+            setattr(self, field, value)
+    
+    def save(self, *args, **kwargs):
+        self.refresh_eligibility()
+        super().save(*args, **kwargs)
+
+# UWU student email format: degYrNum@std.uwu.ac.lk (e.g., cst22001@std.uwu.ac.lk)
+STUDENT_EMAIL_REGEX = re.compile(r'^([a-zA-Z]{2,4})(\d{2})(\d{3})@std\.uwu\.ac\.lk$')
+
+def enrollment_from_email(email):
+    """
+    Derive (enrollment_number, batch) from a UWU student email.
+    Returns (None, '') when the email does not follow the UWU format.
+    """
+    match = STUDENT_EMAIL_REGEX.search(email or '')
+    if not match:
+        return None, ''
+    deg = match.group(1).upper()
+    yr = match.group(2)
+    num = match.group(3)
+    return f"UWU/{deg}/{yr}/{num}", yr
+
+def generate_fallback_enrollment():
+    """Random enrollment for students whose email does not encode one"""
+    short_id = str(uuid.uuid4())[:8].upper()
+    return f"UWU/GEN/{short_id}"
 
 @receiver(post_save, sender=CustomUser)
 def create_student_profile(sender, instance, created, **kwargs):
@@ -46,24 +84,11 @@ def create_student_profile(sender, instance, created, **kwargs):
         # Check if profile already exists
         if StudentProfile.objects.filter(user=instance).exists():
             return
-            
-        email = instance.email
-        enrollment = None
-        batch = ''
         
-        # Try to parse UWU email format: degYrNum@std.uwu.ac.lk
-        match = re.search(r'^([a-zA-Z]{2,4})(\d{2})(\d{3})@std\.uwu\.ac\.lk$', email)
-        if match:
-            deg = match.group(1).upper()
-            yr = match.group(2)
-            num = match.group(3)
-            enrollment = f"UWU/{deg}/{yr}/{num}"
-            batch = yr
-        else:
-            # Fallback: Generate from user ID and email
-            import uuid
-            short_id = str(uuid.uuid4())[:8].upper()
-            enrollment = f"UWU/GEN/{short_id}"
+        # Try to parse UWU email format, otherwise generate from a random ID
+        enrollment, batch = enrollment_from_email(instance.email)
+        if not enrollment:
+            enrollment = generate_fallback_enrollment()
         
         StudentProfile.objects.create(
             user=instance,
@@ -71,4 +96,3 @@ def create_student_profile(sender, instance, created, **kwargs):
             full_name=instance.get_full_name() or instance.username,
             batch=batch
         )
-
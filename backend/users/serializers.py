@@ -9,8 +9,8 @@ class StudentProfileSerializer(serializers.ModelSerializer):
         model = StudentProfile
         fields = ['id', 'email', 'username', 'full_name', 'enrollment_number', 
                   'wake_up_time', 'requires_darkness', 'cleanliness', 
-                  'guest_tolerance', 'dominance']
-        read_only_fields = ('enrollment_number',)
+                  'guest_tolerance', 'dominance', 'batch_year', 'level', 'hostel_eligible']
+        read_only_fields = ('enrollment_number', 'batch_year', 'level', 'hostel_eligible')
 
 class UserSerializer(serializers.ModelSerializer):
     profile = StudentProfileSerializer(read_only=True)
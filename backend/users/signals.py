@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import CustomUser, StudentProfile
+from .me import invalidate_me_with_roommates, invalidate_all_me
+from allocation.models import Allocation
+from housing.models import Hostel, Room, Bed
+
+# Models whose writes can change many students' room, beds or roommates in the "me" payload
+ME_ROOM_MODELS = [Allocation, Bed, Room, Hostel]
+
+def invalidate_me_on_user_write(sender, instance, **kwargs):
+    user_id = instance.user_id if sender is StudentProfile else instance.id
+    # Defer until commit so a concurrent read cannot re-cache uncommitted state
+    transaction.on_commit(lambda: invalidate_me_with_roommates(user_id))
+
+def invalidate_me_on_room_write(sender, **kwargs):
+    transaction.on_commit(invalidate_all_me)
+
+for model in [CustomUser, StudentProfile]:
+    post_save.connect(invalidate_me_on_user_write, sender=model,
+                      dispatch_uid=f'me_user_save_{model.__name__}')
+    post_delete.connect(invalidate_me_on_user_write, sender=model,
+                        dispatch_uid=f'me_user_delete_{model.__name__}')
+
+for model in ME_ROOM_MODELS:
+    post_save.connect(invalidate_me_on_room_write, sender=model,
+                      dispatch_uid=f'me_room_save_{model.__name__}')
+    post_delete.connect(invalidate_me_on_room_write, sender=model,
+                        dispatch_uid=f'me_room_delete_{model.__name__}')
@@ -1,3 +1,230 @@
+import io
+import os
+import tempfile
+from datetime import date
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.testing import make_student, make_warden, house_students
+from housing.models import Bed
+from allocation.models import Allocation
+from allocation.serializers import AllocationSerializer
+from allocation.services import get_eligible_students
+from student_requests.models import HostelRequest
+from student_requests.semester_utils import set_clock, get_semester_calendar
+from .models import CustomUser, StudentProfile
+from .importers import StudentImporter, iter_records
+from .serializers import StudentProfileSerializer
+from .me import build_me_payload
 
-# Create your tests here.
+
+class CurrentUserPayloadTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [make_student(n) for n in range(1, 4)]
+        room, = house_students(cls.students, per_room=3)
+        Bed.objects.create(room=room, bed_number='3')
+        cls.student = cls.students[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_payload_matches_serializers_in_two_queries(self):
+        user = CustomUser.objects.get(pk=self.student.pk)
+        expected_allocation = AllocationSerializer(user.allocation).data
+        expected_profile = StudentProfileSerializer(user.profile).data
+
+        with CaptureQueriesContext(connection) as ctx:
+            payload = build_me_payload(self.student.pk)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(payload['allocation'], expected_allocation)
+        self.assertEqual(payload['profile'], expected_profile)
+        self.assertEqual(len(payload['allocation']['roommates']), 2)
+        self.assertEqual(len(payload['allocation']['room']['beds']), 4)
+
+    def test_roommates_without_beds_are_listed(self):
+        Allocation.objects.filter(student=self.students[2]).update(bed=None)
+        user = CustomUser.objects.get(pk=self.student.pk)
+        expected_allocation = AllocationSerializer(user.allocation).data
+
+        with CaptureQueriesContext(connection) as ctx:
+            payload = build_me_payload(self.student.pk)
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertEqual(payload['allocation'], expected_allocation)
+        self.assertEqual(len(payload['allocation']['roommates']), 2)
+        self.assertIn(None, [mate['bed'] for mate in payload['allocation']['roommates']])
+
+    def test_cached_and_invalidated_on_roommate_profile_update(self):
+        self.client.get(reverse('current-user'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('current-user'))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        roommate = self.students[1].profile
+        with self.captureOnCommitCallbacks(execute=True):
+            roommate.full_name = 'Renamed Roommate'
+            roommate.save()
+        response = self.client.get(reverse('current-user'))
+        names = [mate['name'] for mate in response.data['allocation']['roommates']]
+        self.assertIn('Renamed Roommate', names)
+
+    def test_invalidated_on_allocation_change(self):
+        self.client.get(reverse('current-user'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Allocation.objects.filter(student=self.students[2]).delete()
+        response = self.client.get(reverse('current-user'))
+        self.assertEqual(len(response.data['allocation']['roommates']), 1)
+
+
+class StudentImportTest(TestCase):
+    CSV_HEADER = 'email,first_name,gender,wake_up_time,cleanliness,guest_tolerance,dominance\n'
+
+    def csv_rows(self, first, count):
+        return ''.join(f'cst23{n:03d}@std.uwu.ac.lk,Student{n},MALE,06:30,4,2,3\n' for n in range(first, first + count))
+
+    def test_jsonl_rejects_bad_records_per_line(self):
+        make_student(1)
+        lines = [
+            '{"email": "cst23001@std.uwu.ac.lk", "full_name": "A", "cleanliness": 5}',
+            '[1, 2]',
+            '"x"',
+            '{"email": ',
+            '{"email": "cst22001@std.uwu.ac.lk"}',
+            '{"email": "cst23002@std.uwu.ac.lk", "cleanliness": 9}',
+        ]
+        result = StudentImporter().run(iter_records(io.StringIO('\n'.join(lines)), 'jsonl'))
+
+        self.assertEqual(result['created'], 1)
+        self.assertIsNone(result['error'])
+        self.assertEqual(sorted((reject['line'], reject['email']) for reject in result['rejects']), [
+            (2, None), (3, None), (4, None), (5, 'cst22001@std.uwu.ac.lk'), (6, 'cst23002@std.uwu.ac.lk')
+        ])
+        self.assertEqual(result['rejects'][0]['reason'], 'record is not an object')
+        self.assertTrue(result['rejects'][2]['reason'].startswith('invalid JSON'))
+
+        profile = StudentProfile.objects.get(user__email='cst23001@std.uwu.ac.lk')
+        self.assertEqual(profile.enrollment_number, 'UWU/CST/23/001')
+        self.assertEqual((profile.cleanliness, profile.batch_year), (5, 23))
+
+    def test_unreadable_stream_keeps_saved_batches_and_reports_them(self):
+        data = (self.CSV_HEADER + self.csv_rows(1, 300)).encode() + b'\xff\xfe' + self.csv_rows(301, 5).encode()
+        stream = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline='')
+        result = StudentImporter(batch_size=50).run(iter_records(stream, 'csv'))
+
+        self.assertIsNotNone(result['error'])
+        self.assertGreater(result['created'], 0)
+        self.assertEqual(StudentProfile.objects.count(), result['created'])
+
+    def test_command_dry_run_then_import(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write(self.CSV_HEADER + self.csv_rows(1, 3))
+        self.addCleanup(os.remove, handle.name)
+
+        call_command('import_students', handle.name, '--dry-run', stdout=io.StringIO())
+        self.assertFalse(CustomUser.objects.exists())
+        call_command('import_students', handle.name, stdout=io.StringIO())
+        self.assertEqual(CustomUser.objects.filter(is_profile_complete=True).count(), 3)
+
+    def test_upload_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(make_warden())
+        upload = SimpleUploadedFile('students.csv', (self.CSV_HEADER + self.csv_rows(1, 2)).encode())
+        response = client.post(reverse('student-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+
+        upload = SimpleUploadedFile('students.json', b'{"email": "cst23009@std.uwu.ac.lk"}')
+        response = client.post(reverse('student-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+
+
+class FixEnrollmentsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [make_student(n) for n in range(1, 5)]
+        # Student 2's email-derived number is held by student 3, so 2 needs a generated one
+        StudentProfile.objects.filter(user=cls.students[1]).update(enrollment_number='')
+        StudentProfile.objects.filter(user=cls.students[2]).update(enrollment_number='UWU/CST/22/002')
+        StudentProfile.objects.filter(user=cls.students[3]).delete()
+
+    def enrollments(self):
+        return dict(StudentProfile.objects.values_list('user_id', 'enrollment_number'))
+
+    def test_dry_run_writes_nothing(self):
+        before = self.enrollments()
+        call_command('fix_enrollments', '--dry-run', stdout=io.StringIO())
+        self.assertEqual(self.enrollments(), before)
+
+    def test_fills_empty_and_missing_profiles_with_unique_numbers(self):
+        call_command('fix_enrollments', '--batch-size', '1', stdout=io.StringIO())
+
+        enrollments = self.enrollments()
+        self.assertTrue(enrollments[self.students[1].id].startswith('UWU/GEN/'))
+        self.assertEqual(enrollments[self.students[3].id], 'UWU/CST/22/004')
+        self.assertEqual(len(set(enrollments.values())), 4)
+        self.assertEqual(StudentProfile.objects.get(user=self.students[3]).batch_year, 22)
+
+
+class StudentEligibilityColumnsTest(TestCase):
+    def setUp(self):
+        # 2025/2026 1st semester: batch 22 is 300 Level, 23 is 200 Level
+        self.today = date(2025, 12, 1)
+        previous = set_clock(lambda: self.today)
+        self.addCleanup(set_clock, previous)
+
+    def test_save_materializes_batch_level_and_eligibility(self):
+        profile = make_student(1).profile
+        self.assertEqual((profile.batch_year, profile.level, profile.hostel_eligible), (22, 300, True))
+
+        profile.enrollment_number = 'UWU/CST/23/001'
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual((profile.batch_year, profile.level, profile.hostel_eligible), (23, 200, False))
+
+    def test_eligible_students_by_batch(self):
+        student = make_student(1)
+        CustomUser.objects.filter(pk=student.pk).update(is_profile_complete=True)
+        HostelRequest.objects.create(student=student)
+
+        self.assertEqual(list(get_eligible_students('2025/2026', batch='22')), [student])
+        self.assertFalse(get_eligible_students('2025/2026', batch='23').exists())
+        self.assertFalse(get_eligible_students('2025/2026', batch='2a').exists())
+
+
+class RefreshStudentLevelsTest(TestCase):
+    def setUp(self):
+        self.today = date(2025, 12, 1)
+        previous = set_clock(lambda: self.today)
+        self.addCleanup(set_clock, previous)
+
+    def test_calendar_is_built_once_per_day(self):
+        calendar = get_semester_calendar()
+        self.assertIs(get_semester_calendar(), calendar)
+        self.today = date(2026, 5, 1)
+        self.assertIsNot(get_semester_calendar(), calendar)
+        self.assertEqual(get_semester_calendar().semester_info['semester'], 2)
+
+    def test_rollover_updates_every_changed_profile(self):
+        # Batch 21 is 400 Level: eligible in the 1st semester only
+        for n in range(1, 6):
+            CustomUser.objects.create_user(
+                username=f'cst21{n:03d}', email=f'cst21{n:03d}@std.uwu.ac.lk', password=None
+            )
+        make_student(1)  # batch 22 stays eligible
+        self.assertEqual(StudentProfile.objects.filter(hostel_eligible=True).count(), 6)
+
+        self.today = date(2026, 5, 1)
+        out = io.StringIO()
+        call_command('refresh_student_levels', '--batch-size', '2', stdout=out)
+        self.assertIn('Checked 6 profiles, updated 5', out.getvalue())
+        self.assertEqual(
+            list(StudentProfile.objects.filter(hostel_eligible=True).values_list('batch_year', flat=True)), [22]
+        )
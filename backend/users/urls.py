@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import ProfileUpdateView, GoogleLoginView, CurrentUserView
+from .views import ProfileUpdateView, GoogleLoginView, CurrentUserView, StudentImportView
 
 urlpatterns = [
     path('profile/update/', ProfileUpdateView.as_view(), name='profile-update'),
     path('auth/google/', GoogleLoginView.as_view(), name='google-login'),
     path('me/', CurrentUserView.as_view(), name='current-user'),
+    path('students/import/', StudentImportView.as_view(), name='student-import'),
 ]
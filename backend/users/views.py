@@ -1,11 +1,14 @@
 from rest_framework import generics, permissions, status, views
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
-from .models import StudentProfile
+from .models import StudentProfile, enrollment_from_email, generate_fallback_enrollment
 from .serializers import StudentProfileSerializer, GoogleAuthSerializer
+from .importers import StudentImporter, iter_records, SUPPORTED_FORMATS
 from google.oauth2 import id_token
 from google.auth.transport import requests
+import io
 import os
 
 User = get_user_model()
@@ -25,29 +28,13 @@ class ProfileUpdateView(generics.RetrieveUpdateAPIView):
             return user.profile
         except StudentProfile.DoesNotExist:
             # Profile doesn't exist - create one with proper enrollment
-            import uuid
-            import re
-            
-            email = user.email
-            enrollment = None
-            batch = ''
-            
-            # Try to parse UWU email format
-            match = re.search(r'^([a-zA-Z]{2,4})(\d{2})(\d{3})@std\.uwu\.ac\.lk$', email)
-            if match:
-                deg = match.group(1).upper()
-                yr = match.group(2)
-                num = match.group(3)
-                enrollment = f"UWU/{deg}/{yr}/{num}"
-                batch = yr
-            else:
-                short_id = str(uuid.uuid4())[:8].upper()
-                enrollment = f"UWU/GEN/{short_id}"
+            enrollment, batch = enrollment_from_email(user.email)
+            if not enrollment:
+                enrollment = generate_fallback_enrollment()
             
             # Ensure uniqueness
             while StudentProfile.objects.filter(enrollment_number=enrollment).exists():
-                short_id = str(uuid.uuid4())[:8].upper()
-                enrollment = f"UWU/GEN/{short_id}"
+                enrollment = generate_fallback_enrollment()
             
             return StudentProfile.objects.create(
                 user=user,
@@ -172,31 +159,44 @@ class GoogleLoginView(views.APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class CurrentUserView(views.APIView):
-    """Get current user's data"""
+    """Get current user's data (cached; see users.me)"""
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        user = request.user
+        from .me import get_me_payload
+        return Response(get_me_payload(request.user))
+
+
+class StudentImportView(views.APIView):
+    """Warden uploads a registrar export (CSV/JSON) to bulk create students"""
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+    
+    # Keep the response small for large files with many bad rows
+    MAX_REJECTS_IN_RESPONSE = 500
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
-        profile_data = None
-        if hasattr(user, 'profile') and user.profile:
-            profile_data = StudentProfileSerializer(user.profile).data
+        fmt = (request.data.get('format') or os.path.splitext(upload.name)[1].lstrip('.')).lower()
+        if fmt not in SUPPORTED_FORMATS:
+            return Response(
+                {'error': f"Unsupported format. Use one of: {', '.join(SUPPORTED_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        allocation_data = None
-        if hasattr(user, 'allocation'):
-            from allocation.serializers import AllocationSerializer
-            allocation_data = AllocationSerializer(user.allocation).data
+        dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
         
-        return Response({
-            'id': user.id,
-            'email': user.email,
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'role': user.role,
-            'gender': user.gender,
-            'is_profile_complete': user.is_profile_complete,
-            'profile': profile_data,
-            'allocation': allocation_data
-        })
-
+        # Read the upload as a text stream so large files are not loaded whole
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = StudentImporter(dry_run=dry_run).run(iter_records(stream, fmt))
+        
+        result['rejects_truncated'] = len(result['rejects']) > self.MAX_REJECTS_IN_RESPONSE
+        result['rejects'] = result['rejects'][:self.MAX_REJECTS_IN_RESPONSE]
+        # A parse error stops the import, but earlier batches are already saved:
+        # the report says how many
+        if result['error']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
@@ -38,8 +38,10 @@ const StudentDashboard = () => {
                 const reqRes = await axios.get(`${API_URL}/api/requests/hostel/list/`, {
                     headers: getAuthHeader()
                 });
-                if (reqRes.data && reqRes.data.length > 0) {
-                    setHostelRequest(reqRes.data[0]);
+                // List endpoints are cursor-paginated, newest first
+                const hostelRequests = reqRes.data?.results || [];
+                if (hostelRequests.length > 0) {
+                    setHostelRequest(hostelRequests[0]);
                 }
             } catch (err) { }
 
@@ -61,9 +63,9 @@ const StudentDashboard = () => {
                     axios.get(`${API_URL}/api/operations/ticket/list/`, { headers: getAuthHeader() })
                 ]);
                 setRequests({
-                    swaps: swapsRes.data,
-                    outpasses: outpassRes.data,
-                    tickets: ticketsRes.data
+                    swaps: swapsRes.data.results,
+                    outpasses: outpassRes.data.results,
+                    tickets: ticketsRes.data.results
                 });
             } catch (err) { }
         } finally {
@@ -10,6 +10,7 @@ const WardenRequestsPage = () => {
     const navigate = useNavigate();
     const { API_URL, getAuthHeader } = useContext(AuthContext);
     const [requests, setRequests] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [loading, setLoading] = useState(true);
     const [filter, setFilter] = useState('');
     const [selectedRequest, setSelectedRequest] = useState(null);
@@ -41,13 +42,26 @@ const WardenRequestsPage = () => {
             if (filter) url += `?status=${filter}`;
 
             const res = await axios.get(url, { headers: getAuthHeader() });
-            setRequests(res.data);
+            setRequests(res.data.results);
+            setNextPage(res.data.next);
         } catch (err) {
         } finally {
             setLoading(false);
         }
     };
 
+    // List endpoints are cursor-paginated; `next` is the URL of the following page
+    const loadMore = async () => {
+        if (!nextPage) return;
+        try {
+            const res = await axios.get(nextPage, { headers: getAuthHeader() });
+            setRequests(prev => [...prev, ...res.data.results]);
+            setNextPage(res.data.next);
+        } catch (err) {
+            toast.error('Could not load more requests');
+        }
+    };
+
     const handleAction = async (requestId, action, approve = true) => {
         setActionLoading(true);
         try {
@@ -227,6 +241,13 @@ const WardenRequestsPage = () => {
                         </tbody>
                     </table>
                 )}
+                {nextPage && (
+                    <div className="text-center p-4">
+                        <button className="btn btn-secondary" onClick={loadMore}>
+                            Load more
+                        </button>
+                    </div>
+                )}
             </div>
 
             {/* Review Modal */}